@@ -0,0 +1,131 @@
+from __future__ import annotations
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+CacheKey = Tuple[Hashable, ...]
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    expires_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    stored_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def fresh(self) -> bool:
+        return self.expires_at > time.monotonic()
+
+
+def token_fingerprint(token: str | None) -> str:
+    """Stable, non-reversible cache scope for a bearer token."""
+    if not token:
+        return "anonymous"
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()[:32]
+
+
+class ResponseCache:
+    """In-process TTL + LRU cache for upstream responses.
+
+    - keys are scoped by endpoint, arguments and a hash of the caller's token;
+    - expired entries are kept (until evicted) so they can be revalidated with
+      ETag / Last-Modified instead of being downloaded again;
+    - concurrent misses for one key share a single upstream call.
+    """
+    def __init__(self, *, max_entries: int = 1024, ttl: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[CacheKey, CacheEntry]" = OrderedDict()
+        self._inflight: Dict[CacheKey, asyncio.Task] = {}  # shared fetch task per key
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(endpoint: str, *args: Hashable, token: str | None = None) -> CacheKey:
+        return (endpoint, args, token_fingerprint(token))
+
+    def entry(self, value: Any, *, etag: str | None = None, last_modified: str | None = None) -> CacheEntry:
+        return CacheEntry(
+            value=value,
+            expires_at=time.monotonic() + self.ttl,
+            etag=etag,
+            last_modified=last_modified,
+        )
+
+    def revalidate(self, stale: CacheEntry) -> CacheEntry:
+        """Upstream answered 304 Not Modified: extend the stale entry."""
+        self.revalidated += 1
+        return self.entry(stale.value, etag=stale.etag, last_modified=stale.last_modified)
+
+    def peek(self, key: CacheKey) -> CacheEntry | None:
+        return self._entries.get(key)
+
+    def invalidate(self, key: CacheKey | None = None) -> None:
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def _store(self, key: CacheKey, entry: CacheEntry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_fetch(
+        self, key: CacheKey, fetch: Callable[[CacheEntry | None], Awaitable[CacheEntry]]
+    ) -> Any:
+        """Return a fresh cached value or call `fetch(stale_entry)` once for all waiters."""
+        entry = self._entries.get(key)
+        if entry is not None and entry.fresh:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            # the fetch runs in its own task so that cancelling the request that started it
+            # does not cancel (or fail) the requests coalesced onto it
+            task = asyncio.create_task(self._fetch(key, fetch, entry))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, key=key: self._fetched(key, t))
+        return await asyncio.shield(task)
+
+    async def _fetch(
+        self, key: CacheKey, fetch: Callable[[CacheEntry | None], Awaitable[CacheEntry]], stale: CacheEntry | None
+    ) -> Any:
+        fresh = await fetch(stale)
+        self._store(key, fresh)
+        return fresh.value
+
+    def _fetched(self, key: CacheKey, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved when every waiter has gone
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "revalidated": self.revalidated,
+            "evictions": self.evictions,
+            "hit_ratio": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+        }
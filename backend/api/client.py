@@ -1,84 +1,369 @@
 from __future__ import annotations
+import asyncio
+import time
+from collections import defaultdict
 from contextlib import asynccontextmanager
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Tuple
 import httpx
 from fastapi import HTTPException  # NEW
 
+from .cache import CacheEntry, ResponseCache
 from .config import ExternalAPISettings
+from .jsonlib import loads
+from .metrics import UPSTREAM_LATENCY, UPSTREAM_RESPONSE_SIZE
+from .resilience import (
+    NO_RETRY, CircuitBreaker, LatencyTracker, RetryPolicy, hedged, is_retryable, is_upstream_failure,
+)
 
 class ExternalAPIError(RuntimeError):
     pass
 
+class CircuitOpenError(HTTPException):
+    """Upstream marked unhealthy: fail fast instead of waiting for timeouts."""
+    def __init__(self, retry_after: float):
+        super().__init__(
+            status_code=503,
+            detail={"error": "Upstream API unavailable (circuit open)"},
+            headers={"Retry-After": str(max(1, round(retry_after)))},
+        )
+
 class ExternalAPIClient:
     """Thin async HTTP client for the external API.
     Forwards user Authorization if provided; falls back to service token if configured.
+
+    One instance is meant to live for the whole application (see `backend.main`
+    lifespan): `open()` builds the pooled `httpx.AsyncClient`, `aclose()` releases it.
     """
-    def __init__(self, settings: ExternalAPISettings):
+    def __init__(self, settings: ExternalAPISettings, *, transport: httpx.AsyncBaseTransport | None = None):
         self.settings = settings
+        self._transport = transport
         self._client: httpx.AsyncClient | None = None
+        self.cache: ResponseCache | None = (
+            ResponseCache(max_entries=settings.cache_max_entries, ttl=settings.cache_ttl)
+            if settings.cache_enabled else None
+        )
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.breaker_failure_threshold,
+            reset_timeout=settings.breaker_reset_timeout,
+        )
+        # Only idempotent GETs are retried; login (POST) goes through the breaker once
+        read_policy = RetryPolicy(
+            attempts=settings.retry_attempts,
+            base_delay=settings.retry_base_delay,
+            max_delay=settings.retry_max_delay,
+        )
+        self.retry_policies: Dict[str, RetryPolicy] = {
+            "fields_list": read_policy,
+            "field": read_policy,
+            "fields": read_policy,
+            "field_geometry": read_policy,
+            "login": NO_RETRY,
+        }
+        self.latency: Dict[str, LatencyTracker] = defaultdict(LatencyTracker)
+        self.hedges_fired = 0
+        self.stale_served = 0
 
-    @asynccontextmanager
-    async def session(self):
+    async def open(self) -> "ExternalAPIClient":
         if self._client is None:
             self._client = httpx.AsyncClient(
                 base_url=str(self.settings.base_url),
                 timeout=self.settings.timeout,
                 verify=self.settings.verify_ssl,
+                http2=self.settings.http2,
+                limits=httpx.Limits(
+                    max_connections=self.settings.max_connections,
+                    max_keepalive_connections=self.settings.max_keepalive_connections,
+                    keepalive_expiry=self.settings.keepalive_expiry,
+                ),
                 headers={"Accept": "application/json"},
+                transport=self._transport,
             )
+        return self
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            client, self._client = self._client, None
+            await client.aclose()
+
+    @asynccontextmanager
+    async def session(self):
+        await self.open()
         try:
             yield self
         finally:
-            pass  # keep-alive across requests
+            pass  # keep-alive across requests; the pool is closed on app shutdown
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Live snapshot of the underlying connection pool."""
+        stats: Dict[str, Any] = {
+            "open": self._client is not None,
+            "http2_enabled": self.settings.http2,
+            "max_connections": self.settings.max_connections,
+            "max_keepalive_connections": self.settings.max_keepalive_connections,
+            "keepalive_expiry": self.settings.keepalive_expiry,
+            "connections": 0,
+            "active": 0,
+            "idle": 0,
+            "http2_connections": 0,
+            "queued_requests": 0,
+        }
+        # httpx does not expose pool state publicly; read httpcore's pool defensively.
+        pool = getattr(getattr(self._client, "_transport", None), "_pool", None)
+        if pool is None:
+            return stats
+        connections = list(getattr(pool, "connections", None) or [])
+        stats["connections"] = len(connections)
+        for conn in connections:
+            if conn.is_idle():
+                stats["idle"] += 1
+            elif not conn.is_closed():
+                stats["active"] += 1
+            if "HTTP/2" in conn.info():
+                stats["http2_connections"] += 1
+        requests = list(getattr(pool, "_requests", None) or [])
+        stats["queued_requests"] = sum(1 for req in requests if getattr(req, "is_queued", lambda: False)())
+        return stats
 
     async def _request(
         self, method: str, url: str, *, user_token: Optional[str] = None, **kwargs: Any
     ) -> httpx.Response:
         assert self._client is not None, "Use `async with client.session()`"
-        headers = kwargs.pop("headers", {})
+        headers = self._auth_headers(user_token, kwargs.pop("headers", {}))
+        return await self._client.request(method, url, headers=headers, **kwargs)
+
+    def _auth_headers(self, user_token: Optional[str], headers: Dict[str, str]) -> Dict[str, str]:
         if user_token:
             headers["Authorization"] = f"Bearer {user_token}"
         elif self.settings.service_token:
             headers["Authorization"] = f"Bearer {self.settings.service_token}"
-        return await self._client.request(method, url, headers=headers, **kwargs)
+        return headers
+
+    async def _send(
+        self,
+        endpoint: str,
+        method: str,
+        url: str,
+        *,
+        user_token: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
+        hedge: bool = False,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """`_request` with the endpoint's retry policy, the circuit breaker and optional hedging.
+
+        Returns the last response (possibly an error status); raises `CircuitOpenError`
+        when upstream is marked unhealthy and 502/504 `HTTPException` on transport errors.
+        """
+        policy = self.retry_policies.get(endpoint, NO_RETRY)
+        # the budget bounds the whole call, attempts included: a retry only gets what is left of it,
+        # so retrying a slow upstream never takes longer than the budget (the first attempt keeps
+        # the full timeout)
+        deadline = time.monotonic() + max(self.settings.retry_budget, self.settings.timeout)
+        hedge = hedge and self.settings.hedge_enabled
+
+        def attempt() -> Any:
+            timeout = httpx.Timeout(min(self.settings.timeout, deadline - time.monotonic()))
+            return self._request(
+                method, url, user_token=user_token, headers=dict(headers or {}), timeout=timeout, **kwargs
+            )
+
+        for n in range(policy.attempts):
+            if not self.breaker.allow():
+                UPSTREAM_LATENCY.observe(endpoint, "circuit_open", value=0.0)
+                raise CircuitOpenError(self.breaker.retry_after())
+            started = time.monotonic()
+            try:
+                if hedge:
+                    result: httpx.Response | httpx.TransportError = await hedged(
+                        attempt, self._hedge_delay(endpoint), on_hedge=self._count_hedge
+                    )
+                else:
+                    result = await attempt()
+            except httpx.TransportError as exc:
+                result = exc
+            elapsed = time.monotonic() - started
+            if isinstance(result, httpx.Response):
+                UPSTREAM_LATENCY.observe(endpoint, str(result.status_code), value=elapsed)
+                UPSTREAM_RESPONSE_SIZE.observe(endpoint, value=len(result.content))
+            else:
+                UPSTREAM_LATENCY.observe(endpoint, type(result).__name__, value=elapsed)
+            if is_upstream_failure(result):
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+                self.latency[endpoint].observe(elapsed)
+            if not is_retryable(result):
+                break
+            delay = policy.delay(n, result if isinstance(result, httpx.Response) else None)
+            if n + 1 >= policy.attempts or deadline - time.monotonic() - delay <= 0:
+                break
+            await asyncio.sleep(delay)
+
+        if isinstance(result, httpx.TimeoutException):
+            raise HTTPException(status_code=504, detail={"error": f"Upstream timeout on {method} {url}"})
+        if isinstance(result, httpx.TransportError):
+            raise HTTPException(status_code=502, detail={"error": f"Upstream unreachable: {result!r}"})
+        return result
+
+    def _hedge_delay(self, endpoint: str) -> float:
+        p = self.latency[endpoint].percentile(self.settings.hedge_quantile)
+        return max(self.settings.hedge_min_delay, p if p is not None else self.settings.hedge_default_delay)
+
+    def _count_hedge(self) -> None:
+        self.hedges_fired += 1
+
+    def resilience_stats(self) -> Dict[str, Any]:
+        return {
+            "breaker": self.breaker.stats(),
+            "hedges_fired": self.hedges_fired,
+            "stale_served": self.stale_served,
+            "latency_p95": {name: t.percentile(0.95) for name, t in self.latency.items()},
+        }
+
+    async def _cached_get(
+        self, endpoint: str, url: str, *, user_token: Optional[str], error: str, hedge: bool = False
+    ) -> Any:
+        """GET through the response cache (revalidating with ETag / Last-Modified).
+
+        While upstream fails (5xx, unreachable, circuit open) an expired entry is served
+        instead of an error, if there is one.
+        """
+        if self.cache is None:
+            r = await self._send(endpoint, "GET", url, user_token=user_token, hedge=hedge)
+            _raise_for_status(r, error)
+            return _json(r)
+
+        async def fetch(stale: CacheEntry | None) -> CacheEntry:
+            headers: Dict[str, str] = {}
+            if stale is not None:
+                if stale.etag:
+                    headers["If-None-Match"] = stale.etag
+                if stale.last_modified:
+                    headers["If-Modified-Since"] = stale.last_modified
+            serve_stale = stale is not None and self.settings.serve_stale_on_error
+            try:
+                r = await self._send(endpoint, "GET", url, user_token=user_token, headers=headers, hedge=hedge)
+            except HTTPException as exc:
+                if serve_stale and exc.status_code >= 500:
+                    self.stale_served += 1
+                    return stale
+                raise
+            if r.status_code == 304 and stale is not None:
+                return self.cache.revalidate(stale)
+            if serve_stale and r.status_code >= 500:
+                self.stale_served += 1
+                return stale
+            _raise_for_status(r, error)
+            return self.cache.entry(
+                _json(r),
+                etag=r.headers.get("ETag"),
+                last_modified=r.headers.get("Last-Modified"),
+            )
+
+        key = self.cache.make_key(endpoint, url, token=user_token or self.settings.service_token)
+        return await self.cache.get_or_fetch(key, fetch)
 
     # --- Auth ---
     async def login(self, username: str, password: str, grant_type: str = "password") -> Dict[str, Any]:
         """POST /login with x-www-form-urlencoded; returns token dict."""
         data = {"username": username, "password": password, "grant_type": grant_type}
         headers = {"Content-Type": "application/x-www-form-urlencoded", "Accept": "application/json"}
-        r = await self._request("POST", "/login", data=data, headers=headers)
+        r = await self._send("login", "POST", "/login", data=data, headers=headers)
         _raise_for_status(r, "Failed to login")
-        return r.json()
+        return _json(r)
 
     # --- Generic (optional upstream endpoints) ---
     async def get_fields(self, *, page: int = 1, limit: int = 100, user_token: Optional[str] = None) -> Dict[str, Any]:
-        r = await self._request("GET", "/fields", params={"page": page, "limit": limit}, user_token=user_token)
+        r = await self._send("fields", "GET", "/fields", params={"page": page, "limit": limit}, user_token=user_token)
         _raise_for_status(r, "Failed to fetch fields")
-        return r.json()
+        return _json(r)
 
     async def get_field_geometry(self, field_id: str, *, user_token: Optional[str] = None) -> Dict[str, Any]:
-        r = await self._request("GET", f"/fields/{field_id}/geometry", user_token=user_token)
+        r = await self._send("field_geometry", "GET", f"/fields/{field_id}/geometry", user_token=user_token)
         _raise_for_status(r, f"Failed to fetch geometry for field {field_id}")
-        return r.json()
+        return _json(r)
 
     # --- VKU specific ---
     async def get_fields_list(self, *, user_token: str | None = None):
-        r = await self._request("GET", "/fields/list", user_token=user_token)
-        _raise_for_status(r, "Failed to fetch fields list")
-        return r.json()
+        return await self._cached_get(
+            "fields_list", "/fields/list", user_token=user_token, error="Failed to fetch fields list"
+        )
 
     async def get_field(self, field_id: str | int, *, user_token: str | None = None):
-        r = await self._request("GET", f"/field/get/{field_id}", user_token=user_token)
-        _raise_for_status(r, f"Failed to fetch field {field_id}")
-        return r.json()
+        return await self._cached_get(
+            "field", f"/field/get/{field_id}", user_token=user_token, error=f"Failed to fetch field {field_id}",
+            hedge=True,
+        )
+
+    async def open_field_stream(self, field_id: str | int, *, user_token: str | None = None) -> httpx.Response:
+        """Start GET /field/get/{id} without reading the body (passthrough mode).
+
+        The caller owns the returned response and must `aclose()` it.
+        """
+        assert self._client is not None, "Use `async with client.session()`"
+        request = self._client.build_request(
+            "GET", f"/field/get/{field_id}", headers=self._auth_headers(user_token, {})
+        )
+        if not self.breaker.allow():
+            raise CircuitOpenError(self.breaker.retry_after())
+        started = time.monotonic()
+        try:
+            r = await self._client.send(request, stream=True)
+        except httpx.TransportError as exc:
+            self.breaker.record_failure()
+            UPSTREAM_LATENCY.observe("field_stream", type(exc).__name__, value=time.monotonic() - started)
+            raise
+        # time to headers; the body is streamed to the caller
+        UPSTREAM_LATENCY.observe("field_stream", str(r.status_code), value=time.monotonic() - started)
+        if is_upstream_failure(r):
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        if r.is_error:
+            try:
+                await r.aread()
+            finally:
+                await r.aclose()
+            _raise_for_status(r, f"Failed to fetch field {field_id}")
+        return r
+
+    async def iter_fields(
+        self,
+        field_ids: Iterable[str | int],
+        *,
+        user_token: str | None = None,
+        concurrency: int | None = None,
+    ) -> AsyncIterator[Tuple[str | int, Any]]:
+        """Fetch many fields concurrently, yielding `(field_id, result_or_exception)` as they complete.
+
+        At most `concurrency` upstream calls are in flight; a failing field does not stop the others.
+        """
+        semaphore = asyncio.Semaphore(concurrency or self.settings.batch_concurrency)
+
+        async def fetch_one(field_id: str | int) -> Tuple[str | int, Any]:
+            async with semaphore:
+                try:
+                    return field_id, await self.get_field(field_id, user_token=user_token)
+                except (HTTPException, httpx.HTTPError, ValueError) as exc:
+                    return field_id, exc
+
+        tasks = [asyncio.create_task(fetch_one(fid)) for fid in dict.fromkeys(field_ids)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+def _json(resp: httpx.Response) -> Any:
+    return loads(resp.content)
 
 def _raise_for_status(resp: httpx.Response, message: str):
     try:
         resp.raise_for_status()
     except httpx.HTTPStatusError as e:
         try:
-            detail = e.response.json()
+            detail = _json(e.response)
         except Exception:
             detail = e.response.text
         # Пробрасываем реальный код апстрима (401/403/404/5xx) вместо 500
@@ -1,3 +1,4 @@
+from typing import Literal
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import AnyHttpUrl, Field
 
@@ -9,14 +10,194 @@ class ExternalAPISettings(BaseSettings):
       - TIMEOUT (seconds)
       - VERIFY_SSL (bool)
       - SERVICE_TOKEN (optional fallback)
+      - MAX_CONNECTIONS / MAX_KEEPALIVE_CONNECTIONS (connection pool size)
+      - KEEPALIVE_EXPIRY (seconds an idle pooled connection is kept open)
+      - HTTP2 (bool, requires the `h2` package)
+      - CACHE_ENABLED / CACHE_TTL (seconds) / CACHE_MAX_ENTRIES (response cache)
+      - BATCH_CONCURRENCY / BATCH_MAX_IDS (POST /external/fields/batch fan-out)
+      - RETRY_ATTEMPTS / RETRY_BASE_DELAY / RETRY_MAX_DELAY (idempotent GETs) / RETRY_BUDGET
+        (seconds for all attempts of one call together, never less than TIMEOUT)
+      - BREAKER_FAILURE_THRESHOLD / BREAKER_RESET_TIMEOUT (circuit breaker)
+      - SERVE_STALE_ON_ERROR (serve expired cache entries while upstream fails)
+      - HEDGE_ENABLED / HEDGE_QUANTILE / HEDGE_MIN_DELAY / HEDGE_DEFAULT_DELAY (field reads)
     """
     base_url: AnyHttpUrl = Field(...)
     timeout: float = Field(10.0)
     verify_ssl: bool = Field(True)
     service_token: str | None = Field(None)
 
+    max_connections: int = Field(100, ge=1)
+    max_keepalive_connections: int = Field(20, ge=0)
+    keepalive_expiry: float = Field(30.0, ge=0)
+    http2: bool = Field(False)
+
+    cache_enabled: bool = Field(True)
+    cache_ttl: float = Field(60.0, ge=0)
+    cache_max_entries: int = Field(1024, ge=1)
+
+    batch_concurrency: int = Field(16, ge=1)
+    batch_max_ids: int = Field(500, ge=1)
+
+    retry_attempts: int = Field(3, ge=1)
+    retry_base_delay: float = Field(0.1, ge=0)
+    retry_max_delay: float = Field(2.0, ge=0)
+    retry_budget: float = Field(15.0, ge=0)
+    breaker_failure_threshold: int = Field(5, ge=1)
+    breaker_reset_timeout: float = Field(30.0, ge=0)
+    serve_stale_on_error: bool = Field(True)
+    hedge_enabled: bool = Field(False)
+    hedge_quantile: float = Field(0.95, gt=0, lt=1)
+    hedge_min_delay: float = Field(0.05, ge=0)
+    hedge_default_delay: float = Field(1.0, ge=0)
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_prefix="EXTERNAL_API_",
         case_sensitive=False,
     )
+
+
+class TileSettings(BaseSettings):
+    """
+    Vector tile (MVT) settings. Env vars (with prefix TILES_):
+      - CACHE_MAX_BYTES (in-memory tile cache budget)
+      - CACHE_DIR (optional on-disk cache shared by workers)
+      - EXTENT / BUFFER (MVT tile extent and buffer, in tile units)
+      - MAX_AGE (Cache-Control max-age for clients, seconds)
+    """
+    cache_max_bytes: int = Field(256 * 1024 * 1024, ge=0)
+    cache_dir: str | None = Field(None)
+    extent: int = Field(4096, ge=256)
+    buffer: int = Field(64, ge=0)
+    max_age: int = Field(60, ge=0)
+
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_prefix="TILES_",
+        case_sensitive=False,
+        extra="ignore",
+    )
+
+
+class SpatialSettings(BaseSettings):
+    """
+    Nearest/radius query settings. Env vars (with prefix SPATIAL_):
+      - INDEX_ENABLED (bool, keep an in-process KD-tree snapshot; needs scipy)
+      - MAX_POINTS (max query coordinates per request)
+    """
+    index_enabled: bool = Field(True)
+    max_points: int = Field(10_000, ge=1)
+
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_prefix="SPATIAL_",
+        case_sensitive=False,
+        extra="ignore",
+    )
+
+
+class SurfaceSettings(BaseSettings):
+    """
+    Interpolated soil moisture surfaces and their PNG/GeoTIFF tiles. Env vars (with prefix SURFACES_):
+      - CELL_SIZE (grid cell, degrees) / NEIGHBOURS (points per cell) / MAX_DISTANCE_KM (no data beyond)
+      - IDW_POWER / VARIOGRAM_MODEL (exponential, spherical, gaussian; for kriging)
+      - WORKERS (process pool size, default CPU count) / PARALLEL_MIN_CELLS (smaller grids stay in-thread)
+      - MAX_SURFACES (computed grids kept in memory)
+      - TILE_CACHE_MAX_BYTES / TILE_CACHE_DIR / MAX_AGE (as for TILES_)
+    """
+    cell_size: float = Field(0.05, gt=0, le=1)
+    neighbours: int = Field(12, ge=1, le=64)
+    max_distance_km: float | None = Field(250.0, gt=0)
+    idw_power: float = Field(2.0, gt=0)
+    variogram_model: Literal["exponential", "spherical", "gaussian"] = Field("exponential")
+    workers: int | None = Field(None, ge=1)
+    parallel_min_cells: int = Field(200_000, ge=0)
+    max_surfaces: int = Field(16, ge=1)
+    tile_cache_max_bytes: int = Field(128 * 1024 * 1024, ge=0)
+    tile_cache_dir: str | None = Field(None)
+    max_age: int = Field(300, ge=0)
+
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_prefix="SURFACES_",
+        case_sensitive=False,
+        extra="ignore",
+    )
+
+
+class JobSettings(BaseSettings):
+    """
+    Background jobs (table `jobs`, backend.jobs). Env vars (with prefix JOBS_):
+      - ENABLED (bool, default off: the API only queues jobs and `python -m backend.jobs.runner`
+        runs them; on = a runner inside every API worker process)
+      - PROCESS_WORKERS (concurrent CPU-bound jobs, one process each; default 1 per API worker
+        process when ENABLED, CPU count - 1 for the standalone runner)
+      - THREAD_WORKERS (concurrent DB/IO-bound jobs)
+      - PROCESS_NICE (niceness added to job processes so API requests keep priority)
+      - POLL_INTERVAL / HEARTBEAT_INTERVAL / STALE_AFTER (seconds; running jobs of a runner
+        silent for STALE_AFTER are requeued) / MAX_ATTEMPTS
+      - RESULT_DIR (files produced by jobs, e.g. exports)
+      - INPUT_DIR (files jobs may read, e.g. gridded NetCDF / GeoTIFF; paths in job
+        parameters are relative to it)
+    """
+    enabled: bool = Field(False)
+    process_workers: int | None = Field(None, ge=1)
+    thread_workers: int = Field(4, ge=1)
+    process_nice: int = Field(10, ge=0, le=19)
+    poll_interval: float = Field(1.0, gt=0)
+    heartbeat_interval: float = Field(10.0, gt=0)
+    stale_after: float = Field(60.0, gt=0)
+    max_attempts: int = Field(2, ge=1)
+    result_dir: str = Field("job_results")
+    input_dir: str = Field("job_inputs")
+
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_prefix="JOBS_",
+        case_sensitive=False,
+        extra="ignore",
+    )
+
+
+class FieldMirrorSettings(BaseSettings):
+    """
+    Local mirror of upstream fields (tables `fields` / `plots`). Env vars (with prefix FIELD_MIRROR_):
+      - ENABLED (bool, run the background sync in the app)
+      - INTERVAL (seconds between syncs)
+      - CONCURRENCY (parallel /field/get calls during a sync)
+      - SERVE_READS (bool, answer /external/fields/list and /external/field/get from the mirror)
+    """
+    enabled: bool = Field(False)
+    interval: float = Field(300.0, ge=1)
+    concurrency: int = Field(8, ge=1)
+    serve_reads: bool = Field(True)
+
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_prefix="FIELD_MIRROR_",
+        case_sensitive=False,
+        extra="ignore",
+    )
+
+
+class MetricsSettings(BaseSettings):
+    """
+    Instrumentation settings. Env vars (with prefix METRICS_):
+      - ENABLED (bool, request/upstream/DB timings and GET /metrics)
+      - PROFILE_TOKEN (requests sending this value in PROFILE_HEADER are profiled; unset = off)
+      - PROFILE_HEADER / PROFILE_DIR / PROFILE_INTERVAL (sampling interval, seconds)
+      - PROFILE_MIN_DURATION (only keep profiles of requests slower than this, seconds)
+    """
+    enabled: bool = Field(True)
+    profile_token: str | None = Field(None)
+    profile_header: str = Field("X-Profile")
+    profile_dir: str = Field("profiles")
+    profile_interval: float = Field(0.001, gt=0)
+    profile_min_duration: float = Field(0.0, ge=0)
+
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_prefix="METRICS_",
+        case_sensitive=False,
+        extra="ignore",
+    )
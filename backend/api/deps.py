@@ -1,15 +1,60 @@
-from fastapi import Depends
+from functools import lru_cache
+from typing import AsyncIterator
+from fastapi import Depends, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from .config import ExternalAPISettings
+from sqlalchemy.ext.asyncio import AsyncSession
+from .config import ExternalAPISettings, FieldMirrorSettings, JobSettings, MetricsSettings, SpatialSettings, SurfaceSettings, TileSettings
 from .client import ExternalAPIClient
+from ..db.config import DatabaseSettings
+from ..jobs.runner import JobRunner
+from ..services.comparison import ComparisonCache
+from ..services.field_mirror import FieldMirror
+from ..services.spatial import SpatialIndex
+from ..services.surfaces import SurfaceCache
+from ..services.tiles import TileCache
+from ..services.zonal import ZonalCache
 
 _security = HTTPBearer(auto_error=False)
 
+@lru_cache
 def get_settings() -> ExternalAPISettings:
     return ExternalAPISettings()
 
-def get_api_client(settings: ExternalAPISettings = Depends(get_settings)) -> ExternalAPIClient:
-    return ExternalAPIClient(settings)
+@lru_cache
+def get_db_settings() -> DatabaseSettings:
+    return DatabaseSettings()
+
+@lru_cache
+def get_tile_settings() -> TileSettings:
+    return TileSettings()
+
+@lru_cache
+def get_surface_settings() -> SurfaceSettings:
+    return SurfaceSettings()
+
+@lru_cache
+def get_spatial_settings() -> SpatialSettings:
+    return SpatialSettings()
+
+@lru_cache
+def get_field_mirror_settings() -> FieldMirrorSettings:
+    return FieldMirrorSettings()
+
+@lru_cache
+def get_job_settings() -> JobSettings:
+    return JobSettings()
+
+@lru_cache
+def get_metrics_settings() -> MetricsSettings:
+    return MetricsSettings()
+
+def get_api_client(request: Request) -> ExternalAPIClient:
+    """Shared client created in the app lifespan (see `backend.main`)."""
+    client = getattr(request.app.state, "api_client", None)
+    if client is None:
+        # Lifespan did not run (e.g. app mounted without it): build once and keep it.
+        client = request.app.state.api_client = ExternalAPIClient(get_settings())
+    return client
 
 async def get_user_token(
     credentials: HTTPAuthorizationCredentials | None = Depends(_security),
@@ -17,3 +62,29 @@ async def get_user_token(
     if credentials and credentials.scheme.lower() == "bearer" and credentials.credentials:
         return credentials.credentials
     return None
+
+async def get_db(request: Request) -> AsyncIterator[AsyncSession]:
+    async with request.app.state.db_sessionmaker() as session:
+        yield session
+
+def get_tile_cache(request: Request) -> TileCache:
+    return request.app.state.tile_cache
+
+def get_spatial_index(request: Request) -> SpatialIndex | None:
+    return getattr(request.app.state, "spatial_index", None)
+
+def get_field_mirror(request: Request) -> FieldMirror | None:
+    return getattr(request.app.state, "field_mirror", None)
+
+def get_comparison_cache(request: Request) -> ComparisonCache:
+    return request.app.state.comparison_cache
+
+def get_surface_cache(request: Request) -> SurfaceCache:
+    return request.app.state.surface_cache
+
+def get_zonal_cache(request: Request) -> ZonalCache:
+    return request.app.state.zonal_cache
+
+def get_job_runner(request: Request) -> JobRunner | None:
+    """Runner of this process, if JOBS_ENABLED; jobs are queued either way."""
+    return getattr(request.app.state, "job_runner", None)
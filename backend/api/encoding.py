@@ -0,0 +1,98 @@
+"""ETag revalidation and content negotiation (gzip / brotli) for computed bodies."""
+from __future__ import annotations
+import asyncio
+import gzip
+import hashlib
+from typing import Dict
+
+from fastapi import Request, Response
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip is offered
+    brotli = None
+
+MIN_COMPRESS_BYTES = 1024
+THREAD_COMPRESS_BYTES = 256 * 1024  # compress larger bodies off the event loop
+
+
+def etag_for(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def _accepted(accept_encoding: str) -> Dict[str, float]:
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.lower()] = q
+    return accepted
+
+
+def accepts(accept_encoding: str, encoding: str) -> bool:
+    """Whether an Accept-Encoding header value allows `encoding` (q > 0, `*` as fallback)."""
+    accepted = _accepted(accept_encoding)
+    return accepted.get(encoding.lower(), accepted.get("*", 0.0)) > 0
+
+
+def negotiate(request: Request) -> str | None:
+    accept_encoding = request.headers.get("accept-encoding", "")
+    for encoding in (("br",) if brotli is not None else ()) + ("gzip",):
+        if accepts(accept_encoding, encoding):
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+def coded_etag(etag: str, encoding: str | None) -> str:
+    """Strong validators must differ per content coding (RFC 9110 8.8.3): `"tag"` -> `"tag-gzip"`."""
+    if encoding is None:
+        return etag
+    return f'{etag[:-1]}-{encoding}"' if etag.endswith('"') else f"{etag}-{encoding}"
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match (weak comparison) against `etag` in any of the codings it is served in."""
+    if if_none_match.strip() == "*":
+        return True
+    candidates = {coded_etag(etag, c) for c in (None, "gzip", "br")}
+    return any(tag.strip().removeprefix("W/") in candidates for tag in if_none_match.split(","))
+
+
+async def encoded_response(
+    request: Request,
+    body: bytes,
+    *,
+    media_type: str,
+    headers: Dict[str, str] | None = None,
+    etag: str | None = None,
+) -> Response:
+    """`body` with a strong ETag (304 on If-None-Match) and the best accepted compression.
+
+    The ETag is derived from the uncompressed body with the content coding appended
+    (`"…-gzip"`, `"…-br"`), so each encoded representation has its own validator;
+    a tag received for any coding of the same body revalidates.
+    """
+    etag = etag or etag_for(body)
+    encoding = negotiate(request) if len(body) >= MIN_COMPRESS_BYTES else None
+    headers = {**(headers or {}), "ETag": coded_etag(etag, encoding), "Vary": "Accept-Encoding"}
+    if _matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    if encoding is not None:
+        if len(body) >= THREAD_COMPRESS_BYTES:
+            body = await asyncio.to_thread(compress, body, encoding)
+        else:
+            body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=media_type, headers=headers)
@@ -0,0 +1,274 @@
+from __future__ import annotations
+import re
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+LabelValues = Tuple[str, ...]
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = tuple(float(2 ** n) for n in range(8, 28, 2))  # 256 B .. 64 MiB
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _num(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def set_total(self, *labels: str, value: float) -> None:
+        """Copy a running total kept elsewhere (e.g. a cache's own hit count) at scrape time."""
+        with self._lock:
+            self._values[labels] = value
+
+    def expose(self) -> Iterator[str]:
+        yield from self.header()
+        for labels, value in sorted(self._values.items()):
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_num(value)}"
+
+
+class Gauge(_Metric):
+    """Gauge set at scrape time (pool sizes, cache sizes, ...)."""
+    kind = "gauge"
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, *labels: str, value: float) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def expose(self) -> Iterator[str]:
+        yield from self.header()
+        for labels, value in sorted(self._values.items()):
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_num(value)}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, *args: Any, buckets: Sequence[float] = LATENCY_BUCKETS, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [count per bucket (non-cumulative, last = +Inf), sum]
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, *labels: str, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def expose(self) -> Iterator[str]:
+        yield from self.header()
+        for labels, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_num(bound)}"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {_num(total[0])}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}"
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> Any:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.expose())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_LATENCY: Histogram = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "Time to serve a request, by route template.",
+    ("method", "route", "status"),
+))
+HTTP_RESPONSE_SIZE: Histogram = REGISTRY.register(Histogram(
+    "http_response_size_bytes", "Response body size, by route template.",
+    ("route",), buckets=SIZE_BUCKETS,
+))
+UPSTREAM_LATENCY: Histogram = REGISTRY.register(Histogram(
+    "upstream_request_duration_seconds", "External API call duration, by client endpoint and outcome.",
+    ("endpoint", "status"),
+))
+UPSTREAM_RESPONSE_SIZE: Histogram = REGISTRY.register(Histogram(
+    "upstream_response_size_bytes", "External API response body size, by client endpoint.",
+    ("endpoint",), buckets=SIZE_BUCKETS,
+))
+DB_QUERY_LATENCY: Histogram = REGISTRY.register(Histogram(
+    "db_query_duration_seconds", "Database statement duration, by statement label.",
+    ("label",),
+))
+DB_QUERY_ERRORS: Counter = REGISTRY.register(Counter(
+    "db_query_errors_total", "Failed database statements, by statement label.",
+    ("label",),
+))
+POOL_CONNECTIONS: Gauge = REGISTRY.register(Gauge(
+    "pool_connections", "Connection pool usage at scrape time.",
+    ("pool", "state"),
+))
+CACHE_LOOKUPS: Counter = REGISTRY.register(Counter(
+    "cache_lookups_total", "Cache lookups, by cache and result (hit, miss, coalesced, revalidated).",
+    ("cache", "result"),
+))
+CACHE_HIT_RATIO: Gauge = REGISTRY.register(Gauge(
+    "cache_hit_ratio", "Cache hits / lookups since start; for a window use rate() of cache_lookups_total.",
+    ("cache",),
+))
+CACHE_SIZE: Gauge = REGISTRY.register(Gauge(
+    "cache_entries", "Entries currently held, by cache.",
+    ("cache",),
+))
+JOBS_RUNNING: Gauge = REGISTRY.register(Gauge(
+    "jobs_running", "Background jobs running in this process's runner, by pool.",
+    ("pool",),
+))
+BREAKER_OPEN: Gauge = REGISTRY.register(Gauge(
+    "upstream_circuit_open", "1 while the external API circuit breaker rejects calls.",
+))
+
+
+def observe_cache(name: str, hits: int, misses: int, entries: int, **extra: int) -> None:
+    CACHE_LOOKUPS.set_total(name, "hit", value=hits)
+    CACHE_LOOKUPS.set_total(name, "miss", value=misses)
+    for result, value in extra.items():
+        CACHE_LOOKUPS.set_total(name, result, value=value)
+    # only hits are served without work; coalesced / revalidated lookups still waited on a fetch
+    lookups = hits + misses + sum(extra.values())
+    CACHE_HIT_RATIO.set(name, value=hits / lookups if lookups else 0.0)
+    CACHE_SIZE.set(name, value=entries)
+
+
+def observe_pool(name: str, stats: Dict[str, Any], states: Iterable[str]) -> None:
+    for state in states:
+        if isinstance(stats.get(state), (int, float)):
+            POOL_CONNECTIONS.set(name, state, value=stats[state])
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: latency and response size per route template.
+
+    Labels use the matched route's path (`/tiles/{layer}/{z}/{x}/{y}.mvt`), never
+    the raw URL, so the number of series stays bounded. Streaming bodies are
+    counted as they are sent.
+    """
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "<unmatched>"
+            HTTP_LATENCY.observe(scope["method"], template, str(status), value=time.perf_counter() - started)
+            HTTP_RESPONSE_SIZE.observe(template, value=size)
+
+
+_VERB = re.compile(r"^\s*(?:/\*.*?\*/\s*)?(\w+)", re.S)
+_TARGET = re.compile(r"\b(?:FROM|INTO|UPDATE|TABLE|JOIN)\s+([\w.\"]+)", re.I)
+
+
+def statement_label(statement: str) -> str:
+    """`verb:first_table` for statements without an explicit `metrics_label`."""
+    verb = _VERB.match(statement)
+    target = _TARGET.search(statement)
+    label = verb.group(1).lower() if verb else "sql"
+    if target:
+        label += ":" + target.group(1).strip('"').lower()
+    return label
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Time every statement; label with `execution_options(metrics_label=...)` or the statement itself."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["metrics_started"].pop()
+        DB_QUERY_LATENCY.observe(_label(context, statement), value=time.perf_counter() - started)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("metrics_started"):
+            conn.info["metrics_started"].pop()
+        statement = exception_context.statement or ""
+        DB_QUERY_ERRORS.inc(_label(exception_context.execution_context, statement))
+
+
+def _label(context: Any, statement: str) -> str:
+    options = getattr(context, "execution_options", None) or {}
+    return options.get("metrics_label") or statement_label(statement)
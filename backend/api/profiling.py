@@ -0,0 +1,87 @@
+from __future__ import annotations
+import logging
+import os
+import time
+import uuid
+from typing import Any, Dict
+
+try:
+    from pyinstrument import Profiler
+except ImportError:  # optional: without pyinstrument the profile header is ignored
+    Profiler = None
+
+log = logging.getLogger(__name__)
+
+
+class ProfilingMiddleware:
+    """Opt-in sampling profiler for single requests.
+
+    A request carrying `<header>: <token>` is run under pyinstrument (async-aware,
+    so only this request's task is sampled) and, if it took at least `min_duration`
+    seconds, an HTML flamegraph is written to `directory/<id>.html`. The id is
+    returned in the `X-Profile-Id` response header. One request is profiled at a
+    time per worker; concurrent ones run normally.
+    """
+    def __init__(
+        self,
+        app: Any,
+        *,
+        token: str | None,
+        header: str = "x-profile",
+        directory: str = "profiles",
+        interval: float = 0.001,
+        min_duration: float = 0.0,
+    ):
+        self.app = app
+        self.token = token
+        self.header = header.lower().encode("latin-1")
+        self.directory = directory
+        self.interval = interval
+        self.min_duration = min_duration
+        self._busy = False
+        if token and Profiler is None:
+            log.warning("profiling token set but pyinstrument is not installed; profiling disabled")
+
+    def _requested(self, scope: Dict[str, Any]) -> bool:
+        if scope["type"] != "http" or not self.token or Profiler is None or self._busy:
+            return False
+        for name, value in scope.get("headers", ()):
+            if name == self.header:
+                return value.decode("latin-1") == self.token
+        return False
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                message = dict(message, headers=[*message.get("headers", []), (b"x-profile-id", profile_id.encode())])
+            await send(message)
+
+        self._busy = True
+        profiler = Profiler(interval=self.interval, async_mode="enabled")
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.stop()
+            self._busy = False
+            elapsed = time.perf_counter() - started
+            if elapsed >= self.min_duration:
+                self._save(profile_id, profiler, scope, elapsed)
+
+    def _save(self, profile_id: str, profiler: Any, scope: Dict[str, Any], elapsed: float) -> None:
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f"{profile_id}.html")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(profiler.output_html())
+        except OSError:
+            log.warning("could not write profile %s", profile_id, exc_info=True)
+            return
+        log.info("profiled %s %s in %.3fs -> %s", scope["method"], scope["path"], elapsed, path)
@@ -0,0 +1,158 @@
+from __future__ import annotations
+import asyncio
+import email.utils
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+import httpx
+
+RETRYABLE_STATUSES = frozenset({429, 502, 503, 504})
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Retries with capped exponential backoff and full jitter."""
+    attempts: int = 3
+    base_delay: float = 0.1
+    max_delay: float = 2.0
+
+    def delay(self, attempt: int, response: httpx.Response | None = None) -> float:
+        retry_after = _retry_after(response) if response is not None else None
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+NO_RETRY = RetryPolicy(attempts=1)
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, parsed.timestamp() - time.time())
+
+
+def is_upstream_failure(result: httpx.Response | BaseException) -> bool:
+    """Failures that say something about upstream health (not 4xx client errors)."""
+    if isinstance(result, BaseException):
+        return isinstance(result, httpx.TransportError)
+    return result.status_code >= 500
+
+
+def is_retryable(result: httpx.Response | BaseException) -> bool:
+    if isinstance(result, BaseException):
+        return isinstance(result, httpx.TransportError)
+    return result.status_code in RETRYABLE_STATUSES
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker: closed -> open -> half-open (one probe) -> closed."""
+    def __init__(self, *, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._probe_started: float | None = None
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def retry_after(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        # One probe at a time; a probe that never reported back (e.g. cancelled) expires
+        now = time.monotonic()
+        if state == "half_open" and (self._probe_started is None or now - self._probe_started > self.reset_timeout):
+            self._probe_started = now
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._probe_started = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._probe_started is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self._probe_started = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "retry_after": round(self.retry_after(), 3),
+            "rejected": self.rejected,
+        }
+
+
+class LatencyTracker:
+    """Rolling window of request durations for percentile estimates."""
+    def __init__(self, window: int = 200):
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, q: float) -> float | None:
+        if len(self._samples) < 20:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def hedged(
+    make: Callable[[], Awaitable[httpx.Response]],
+    delay: float,
+    on_hedge: Callable[[], None] | None = None,
+) -> httpx.Response:
+    """Start `make()`; if it has not finished after `delay` seconds start a second copy.
+
+    Returns the first healthy response (or the last result if both fail);
+    the other request is cancelled.
+    """
+    pending = {asyncio.ensure_future(make())}
+    last: asyncio.Future | None = None
+    try:
+        done, pending = await asyncio.wait(pending, timeout=delay)
+        if done:
+            return done.pop().result()
+        if on_hedge is not None:
+            on_hedge()
+        pending.add(asyncio.ensure_future(make()))
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                last = task
+                if task.exception() is None and not is_upstream_failure(task.result()):
+                    return task.result()
+        return last.result()
+    finally:
+        for task in pending:
+            task.cancel()
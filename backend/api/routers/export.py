@@ -0,0 +1,48 @@
+import datetime as dt
+import uuid
+from typing import List, Literal
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+
+from ...services import export
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+@router.get("/{dataset}")
+async def export_dataset(
+    dataset: Literal["meteo_daily", "meteo_decadal", "soil_decadal_manual", "soil_decadal_external"],
+    request: Request,
+    format: Literal["parquet", "arrow", "csv"] = Query("parquet"),
+    station_id: List[uuid.UUID] | None = Query(None),
+    soil_point_id: List[uuid.UUID] | None = Query(None),
+    source: List[str] | None = Query(None),
+    depth: List[Literal["0-20", "0-50", "0-100"]] | None = Query(None),
+    date_from: dt.date | None = Query(None, alias="from"),
+    date_to: dt.date | None = Query(None, alias="to"),
+    batch_size: int = Query(50_000, ge=1_000, le=500_000, description="Rows per row group / record batch"),
+):
+    """
+    Потоковая выгрузка ряда (Parquet / Arrow IPC stream / CSV) через серверный курсор.
+    Память не зависит от объёма результата: каждая порция строк сразу уходит клиенту.
+    """
+    spec = export.DATASETS[dataset]
+    try:
+        sql, params = export.build_query(
+            spec,
+            {"station_id": station_id, "soil_point_id": soil_point_id, "source": source, "depth": depth},
+            date_from, date_to,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if format != "csv":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise HTTPException(status_code=501, detail=f"format={format} requires pyarrow on the server")
+
+    media_type, extension = export.FORMATS[format]
+    return StreamingResponse(
+        export.stream_export(request.app.state.db_engine, spec, format, sql, params, batch_size),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{dataset}.{extension}"'},
+    )
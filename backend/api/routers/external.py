@@ -1,16 +1,49 @@
-from fastapi import APIRouter, Depends, Query, Form, HTTPException
-from ..deps import get_api_client, get_user_token
+import asyncio
+import logging
+from typing import Any, Awaitable, Dict, Literal
+import httpx
+from fastapi import APIRouter, Depends, Query, Form, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..deps import (
+    get_api_client, get_db, get_field_mirror, get_field_mirror_settings, get_settings, get_user_token,
+)
 from ..client import ExternalAPIClient
+from ..config import ExternalAPISettings, FieldMirrorSettings
+from ..encoding import accepts, encoded_response
+from ..jsonlib import dumps
+from ...services.field_mirror import FieldMirror, soil_points_within
+from ...services.geojson import compact_collection, to_topojson
 from ..schemas import (
     TokenResponse,
     FieldsResponse,
     GeometryResponse,
     FieldListItem,
     FeatureCollection,
+    FieldsBatchRequest,
+    FieldsBatchResponse,
 )
 
 router = APIRouter(prefix="/external", tags=["external"])
 
+log = logging.getLogger(__name__)
+
+def _use_mirror(
+    mirror: FieldMirror | None, settings: FieldMirrorSettings, token: str | None, live: bool = False,
+) -> bool:
+    """The mirror holds what the service account sees, so a caller's own token always goes upstream."""
+    return mirror is not None and settings.serve_reads and token is None and not live
+
+async def _from_mirror(read: Awaitable[Any]) -> Any:
+    """Mirror read, or None when it has no answer (not synced yet, DB unavailable)."""
+    try:
+        return await read
+    except (SQLAlchemyError, OSError):
+        log.warning("field mirror read failed, falling back to upstream", exc_info=True)
+        return None
+
 # -------- AUTH (form-data) --------
 @router.post("/login", response_model=TokenResponse)
 async def login(
@@ -57,9 +90,16 @@ async def get_field_geometry(
 # -------- VKU specific --------
 @router.get("/fields/list", response_model=list[FieldListItem])
 async def list_fields_raw(
+    live: bool = Query(False, description="Bypass the local mirror and ask upstream"),
     api: ExternalAPIClient = Depends(get_api_client),
     token: str | None = Depends(get_user_token),
+    mirror: FieldMirror | None = Depends(get_field_mirror),
+    mirror_settings: FieldMirrorSettings = Depends(get_field_mirror_settings),
 ):
+    if _use_mirror(mirror, mirror_settings, token, live):
+        data = await _from_mirror(mirror.fields_list())
+        if data is not None:
+            return data
     async with api.session():
         data = await api.get_fields_list(user_token=token)
     return data
@@ -67,9 +107,214 @@ async def list_fields_raw(
 @router.get("/field/get/{field_id}", response_model=FeatureCollection)
 async def get_field(
     field_id: int,
+    request: Request,
+    passthrough: bool = Query(False, description="Stream the upstream body as-is, without validation"),
+    live: bool = Query(False, description="Bypass the local mirror and ask upstream"),
+    precision: int | None = Query(None, ge=0, le=10, description="Round coordinates to this many decimals"),
+    zoom: int | None = Query(None, ge=0, le=24, description="Drop vertices below one pixel at this zoom"),
+    simplify: Literal["dp", "visvalingam"] = Query("dp", description="Simplification algorithm used with `zoom`"),
+    format: Literal["geojson", "topojson"] = Query("geojson", description="`topojson` stores shared plot borders once"),
     api: ExternalAPIClient = Depends(get_api_client),
     token: str | None = Depends(get_user_token),
+    mirror: FieldMirror | None = Depends(get_field_mirror),
+    mirror_settings: FieldMirrorSettings = Depends(get_field_mirror_settings),
 ):
+    if passthrough:
+        return await _stream_field(api, field_id, token, request.headers.get("accept-encoding", ""))
+    data = None
+    if _use_mirror(mirror, mirror_settings, token, live):
+        data = await _from_mirror(mirror.field(field_id))
+    if data is None:
+        async with api.session():
+            data = await api.get_field(field_id, user_token=token)
+    return await _field_response(request, field_id, data, precision, zoom, simplify, format)
+
+async def _field_response(
+    request: Request,
+    field_id: int,
+    data: Dict[str, Any],
+    precision: int | None,
+    zoom: int | None,
+    simplify: str,
+    format: str,
+) -> Response:
+    """
+    Компактная выдача поля: упрощение под зум, округление координат, опционально TopoJSON.
+    Тело сжимается (br/gzip) и помечается ETag, повторный запрос с If-None-Match получает 304.
+    """
+    try:
+        FeatureCollection.model_validate(data)
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=502,
+            detail={"error": f"Unexpected upstream payload for field {field_id}", "validation": e.errors()[:5]},
+        )
+
+    def render() -> bytes:
+        compact = data
+        if precision is not None or zoom is not None:
+            compact = compact_collection(data, precision=precision, zoom=zoom, method=simplify)
+        if format == "topojson":
+            return dumps(to_topojson(compact, precision=6 if precision is None else precision, name="field"))
+        return dumps(compact)
+
+    try:
+        body = await asyncio.to_thread(render)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    media_type = "application/json" if format == "topojson" else "application/geo+json"
+    return await encoded_response(request, body, media_type=media_type)
+
+async def _stream_field(
+    api: ExternalAPIClient, field_id: int, token: str | None, accept_encoding: str
+) -> StreamingResponse:
+    """
+    Отдаём тело апстрима потоком, без r.json() и без pydantic-валидации.
+    Проверяем только дешёвое: content-type и что тело начинается с JSON-объекта.
+    Сжатое тело пересылаем как есть, если клиент принимает эту кодировку.
+    """
     async with api.session():
-        data = await api.get_field(field_id, user_token=token)
-    return data
+        upstream = await api.open_field_stream(field_id, user_token=token)
+    encoding = upstream.headers.get("content-encoding", "").lower()
+    forward_raw = bool(encoding) and accepts(accept_encoding, encoding)
+    chunks = upstream.aiter_raw() if forward_raw else upstream.aiter_bytes()
+    try:
+        content_type = upstream.headers.get("content-type", "")
+        head = b""
+        if not forward_raw:
+            async for chunk in chunks:
+                head += chunk
+                if head.strip():
+                    break
+        if "json" not in content_type or not (forward_raw or head.lstrip().startswith(b"{")):
+            raise HTTPException(
+                status_code=502,
+                detail={"error": f"Unexpected upstream payload for field {field_id}", "content_type": content_type},
+            )
+    except BaseException:
+        await upstream.aclose()
+        raise
+
+    async def body():
+        try:
+            yield head
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await upstream.aclose()
+
+    headers = {
+        name: upstream.headers[name]
+        for name in ("etag", "last-modified")
+        if name in upstream.headers
+    }
+    if forward_raw:
+        headers["content-encoding"] = encoding
+        headers["vary"] = "Accept-Encoding"
+    return StreamingResponse(body(), media_type="application/geo+json", headers=headers)
+
+def _batch_error(field_id: int, exc: Exception) -> Dict[str, Any]:
+    if isinstance(exc, HTTPException):
+        return {"id": field_id, "status_code": exc.status_code, "detail": exc.detail}
+    if isinstance(exc, httpx.TimeoutException):
+        return {"id": field_id, "status_code": 504, "detail": {"error": "Upstream timeout"}}
+    return {"id": field_id, "status_code": 502, "detail": {"error": str(exc) or type(exc).__name__}}
+
+def _tag_features(field_id: int, collection: Dict[str, Any]) -> list[Dict[str, Any]]:
+    # Копируем: объекты могут лежать в общем кэше ответов
+    return [
+        {**feature, "properties": {**(feature.get("properties") or {}), "field_id": field_id}}
+        for feature in collection.get("features", [])
+    ]
+
+@router.post("/fields/batch", response_model=FieldsBatchResponse)
+async def get_fields_batch(
+    body: FieldsBatchRequest,
+    stream: bool = Query(False, description="Stream one NDJSON line per field as it completes"),
+    api: ExternalAPIClient = Depends(get_api_client),
+    token: str | None = Depends(get_user_token),
+    settings: ExternalAPISettings = Depends(get_settings),
+):
+    """
+    Загружает много полей параллельно (не более `concurrency` запросов к апстриму).
+    Ошибки по отдельным полям возвращаются в `errors`, а не валят весь запрос.
+    """
+    if len(body.ids) > settings.batch_max_ids:
+        raise HTTPException(status_code=422, detail=f"At most {settings.batch_max_ids} ids per batch")
+    concurrency = min(body.concurrency or settings.batch_concurrency, settings.batch_concurrency)
+    results = api.iter_fields(body.ids, user_token=token, concurrency=concurrency)
+
+    if stream:
+        async def ndjson():
+            async for field_id, result in results:
+                if isinstance(result, Exception):
+                    line = {"id": field_id, "ok": False, "error": _batch_error(field_id, result)}
+                else:
+                    line = {"id": field_id, "ok": True, "data": result}
+                yield dumps(line) + b"\n"
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+    features: list[Dict[str, Any]] = []
+    errors: list[Dict[str, Any]] = []
+    async for field_id, result in results:
+        if isinstance(result, Exception):
+            errors.append(_batch_error(field_id, result))
+        else:
+            features.extend(_tag_features(field_id, result))
+    errors.sort(key=lambda e: e["id"])
+    return {"type": "FeatureCollection", "features": features, "errors": errors}
+
+# -------- Local mirror --------
+@router.get("/field/{field_id}/soil-points")
+async def get_field_soil_points(
+    field_id: int,
+    api: ExternalAPIClient = Depends(get_api_client),
+    token: str | None = Depends(get_user_token),
+    mirror: FieldMirror | None = Depends(get_field_mirror),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Наши точки почвенных измерений внутри контура поля. Без пользовательского токена — по
+    локальному зеркалу полей; с токеном контур запрашивается во внешнем API от имени пользователя.
+    """
+    if token is not None:
+        async with api.session():
+            data = await api.get_field(field_id, user_token=token)
+        if not isinstance(data, dict) or not isinstance(data.get("features"), list):
+            raise HTTPException(status_code=502, detail={"error": f"Unexpected upstream payload for field {field_id}"})
+        return await soil_points_within(db, data)
+    if mirror is None:
+        raise HTTPException(status_code=503, detail="Field mirror is disabled (FIELD_MIRROR_ENABLED)")
+    points = await mirror.soil_points(field_id)
+    if points is None:
+        raise HTTPException(status_code=404, detail=f"Field {field_id} geometry is not mirrored yet")
+    return points
+
+@router.get("/mirror", include_in_schema=False)
+async def mirror_status(mirror: FieldMirror | None = Depends(get_field_mirror)):
+    """Last sync report of the field mirror."""
+    return mirror.status() if mirror is not None else {"enabled": False}
+
+@router.post("/mirror/sync", status_code=202, include_in_schema=False)
+async def mirror_sync(mirror: FieldMirror | None = Depends(get_field_mirror)):
+    """Run the next mirror sync now."""
+    if mirror is None:
+        raise HTTPException(status_code=503, detail="Field mirror is disabled (FIELD_MIRROR_ENABLED)")
+    mirror.trigger()
+    return {"scheduled": True}
+
+# -------- Diagnostics --------
+@router.get("/pool", include_in_schema=False)
+async def pool_stats(api: ExternalAPIClient = Depends(get_api_client)):
+    """Live connection-pool statistics of the shared upstream client."""
+    return api.pool_stats()
+
+@router.get("/cache", include_in_schema=False)
+async def cache_stats(api: ExternalAPIClient = Depends(get_api_client)):
+    """Hit/miss counters of the upstream response cache."""
+    return api.cache.stats() if api.cache is not None else {"enabled": False}
+
+@router.get("/health", include_in_schema=False)
+async def upstream_health(api: ExternalAPIClient = Depends(get_api_client)):
+    """Circuit breaker state, hedging and stale-serving counters."""
+    return api.resilience_stats()
@@ -0,0 +1,69 @@
+import logging
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..client import ExternalAPIClient
+from ..config import FieldMirrorSettings
+from ..deps import get_api_client, get_db, get_field_mirror, get_field_mirror_settings, get_user_token, get_zonal_cache
+from ...services import zonal
+from ...services.field_mirror import FieldMirror
+
+router = APIRouter(prefix="/fields", tags=["fields"])
+
+log = logging.getLogger(__name__)
+
+
+@router.get("/{field_id}/soil-moisture")
+async def field_soil_moisture(
+    field_id: int,
+    depth: Literal["0-20", "0-50", "0-100"] = Query("0-20"),
+    source: Literal["kazhydromet", "uni", "manual"] = Query("kazhydromet", description="Источник ручных измерений"),
+    year: int | None = Query(None, ge=1900, le=2100),
+    month: int | None = Query(None, ge=1, le=12),
+    decade: int | None = Query(None, ge=1, le=3, description="Без year/month/decade — последняя декада с данными"),
+    max_distance_km: float = Query(25.0, ge=0, le=500, description="Радиус поиска ближайшей точки для участков без точек"),
+    api: ExternalAPIClient = Depends(get_api_client),
+    token: str | None = Depends(get_user_token),
+    mirror: FieldMirror | None = Depends(get_field_mirror),
+    mirror_settings: FieldMirrorSettings = Depends(get_field_mirror_settings),
+    db: AsyncSession = Depends(get_db),
+    cache: zonal.ZonalCache = Depends(get_zonal_cache),
+):
+    """
+    Зональная статистика влажности почвы (мм) по участкам поля: среднее, минимум, максимум и
+    покрытие по точкам внутри участка (или ближайшей точке) — ручные измерения и ERA5-Land / AMSR2.
+    Кэшируется по хэшу геометрии поля и декаде до изменения исходных таблиц.
+    С пользовательским токеном контур поля всегда берётся из внешнего API, не из зеркала.
+    """
+    parts = (year, month, decade)
+    if any(v is not None for v in parts) and any(v is None for v in parts):
+        raise HTTPException(status_code=422, detail="year, month and decade go together")
+    collection = None
+    if mirror is not None and mirror_settings.serve_reads and token is None:
+        try:
+            collection = await mirror.field(field_id)
+        except (SQLAlchemyError, OSError):
+            log.warning("field mirror read failed, falling back to upstream", exc_info=True)
+    if collection is None:
+        async with api.session():
+            collection = await api.get_field(field_id, user_token=token)
+    if not isinstance(collection, dict) or not isinstance(collection.get("features"), list):
+        raise HTTPException(status_code=502, detail={"error": f"Unexpected upstream payload for field {field_id}"})
+
+    geometry_hash = zonal.geometry_hash(collection)
+    key = (geometry_hash, None if year is None else (year, month, decade), depth, source, max_distance_km)
+    result = cache.get(key)
+    if result is None:
+        generation = cache.generation
+        try:
+            snapshot = await cache.points(db)
+            result = await zonal.field_stats(
+                db, snapshot, collection, depth=depth, source=source,
+                decade=key[1], max_distance_km=max_distance_km,
+            )
+        except ImportError:
+            raise HTTPException(status_code=501, detail="Zonal statistics need shapely installed")
+        cache.put(key, result, generation)
+    return {"field_id": field_id, "geometry_hash": geometry_hash, **result}
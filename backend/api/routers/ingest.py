@@ -0,0 +1,90 @@
+from typing import List
+from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..deps import get_db, get_db_settings, get_job_runner
+from ...db.config import DatabaseSettings
+from ...db.session import asyncpg_dsn
+from ...ingest import meteo_daily, soil_manual
+from ...jobs import runner
+from ...jobs.runner import JobRunner
+
+router = APIRouter(prefix="/ingest", tags=["ingest"])
+
+SOURCES = ("kazhydromet", "uni", "manual", "era5_land", "amsr2")
+
+
+async def _queue(db: AsyncSession, job_runner: JobRunner | None, *kinds: str) -> List[str]:
+    """Queue the follow-up recomputations; repeated uploads collapse into the pending jobs."""
+    job_ids = [str((await runner.submit(db, kind))[0]["job_id"]) for kind in kinds]
+    if job_runner is not None:
+        job_runner.wake()
+    return job_ids
+
+@router.post("/meteo-daily")
+async def ingest_meteo_daily(
+    file: UploadFile = File(..., description="CSV or XLSX with station code, date and daily values"),
+    source: str = Form("kazhydromet"),
+    chunk_size: int = Form(meteo_daily.DEFAULT_CHUNK_SIZE, ge=1_000, le=500_000),
+    sheet: str | None = Form(None),
+    db_settings: DatabaseSettings = Depends(get_db_settings),
+    db: AsyncSession = Depends(get_db),
+    job_runner: JobRunner | None = Depends(get_job_runner),
+):
+    """
+    Потоковая загрузка суточных данных в meteo_daily: чтение по частям,
+    COPY в staging-таблицу и upsert по uq_meteo_daily. Возвращает статистику (rows/sec).
+    После загрузки ставятся задачи пересчёта ГТК и декадных агрегатов (см. /jobs), их id — в `jobs`.
+    """
+    dsn = asyncpg_dsn(db_settings.url)
+    if source not in SOURCES:
+        raise HTTPException(status_code=422, detail=f"source must be one of {SOURCES}")
+    try:
+        report = await meteo_daily.ingest_file(
+            dsn,
+            file.file,
+            file.filename or "upload.csv",
+            source=source,
+            chunk_size=chunk_size,
+            sheet=sheet,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    jobs = await _queue(db, job_runner, "htc", "meteo_decadal") if report.rows_written else []
+    return {**report.as_dict(), "jobs": jobs}
+
+
+@router.post("/soil-decadal-manual")
+async def ingest_soil_decadal_manual(
+    file: UploadFile = File(..., description="CSV or XLSX with point code, decade (or date), depth and value_mm"),
+    source: str = Form("kazhydromet"),
+    chunk_size: int = Form(soil_manual.DEFAULT_CHUNK_SIZE, ge=1_000, le=500_000),
+    sheet: str | None = Form(None),
+    qc: bool = Form(True, description="Run the quality-control stage after the load"),
+    db_settings: DatabaseSettings = Depends(get_db_settings),
+    db: AsyncSession = Depends(get_db),
+    job_runner: JobRunner | None = Depends(get_job_runner),
+):
+    """
+    Потоковая загрузка ручных декадных измерений влажности почвы в soil_decadal_manual
+    (COPY в staging-таблицу и upsert по uq_soil_decadal_manual). После загрузки затронутые
+    декады проходят контроль качества, который заполняет quality_flag; в ответе — счётчики по флагам.
+    Пересчёт климатологии ставится в очередь задач (см. /jobs).
+    """
+    dsn = asyncpg_dsn(db_settings.url)
+    if source not in ("kazhydromet", "uni", "manual"):
+        raise HTTPException(status_code=422, detail="source must be one of ('kazhydromet', 'uni', 'manual')")
+    try:
+        report = await soil_manual.ingest_file(
+            dsn,
+            file.file,
+            file.filename or "upload.csv",
+            source=source,
+            chunk_size=chunk_size,
+            sheet=sheet,
+            qc=qc,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    jobs = await _queue(db, job_runner, "climatology") if report.rows_written else []
+    return {**report.as_dict(), "jobs": jobs}
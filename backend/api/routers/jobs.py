@@ -0,0 +1,109 @@
+import os
+import uuid
+from typing import Any, Dict, Literal
+from fastapi import APIRouter, Body, Depends, HTTPException, Path, Query
+from fastapi.responses import FileResponse
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..deps import get_db, get_job_runner
+from ...jobs import handlers, runner
+from ...jobs.runner import JobRunner
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+Status = Literal["pending", "running", "succeeded", "failed", "cancelled"]
+
+
+@router.get("/kinds")
+async def list_job_kinds():
+    """
+    Доступные типы задач: пул исполнения (process — CPU, thread — БД/файлы) и схема параметров.
+    """
+    return [
+        {"kind": h.kind, "pool": h.pool, "description": h.description, "params": h.params.model_json_schema()}
+        for h in handlers.HANDLERS.values()
+    ]
+
+
+@router.post("", status_code=202)
+async def submit_job(
+    kind: str = Body(..., embed=True),
+    params: Dict[str, Any] = Body(default_factory=dict, embed=True),
+    db: AsyncSession = Depends(get_db),
+    job_runner: JobRunner | None = Depends(get_job_runner),
+):
+    """
+    Поставить задачу в очередь. Ответ возвращается сразу; состояние — GET /jobs/{job_id}.
+    Если такая же задача (тип и параметры) ещё ждёт в очереди, возвращается она (`deduplicated`).
+    """
+    if kind not in handlers.HANDLERS:
+        raise HTTPException(status_code=422, detail=f"kind must be one of {sorted(handlers.HANDLERS)}")
+    try:
+        job, deduplicated = await runner.submit(db, kind, params)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+    if job_runner is not None:
+        job_runner.wake()
+    return {**job, "deduplicated": deduplicated}
+
+
+@router.get("")
+async def list_jobs(
+    status: Status | None = Query(None),
+    kind: str | None = Query(None),
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+):
+    """Последние задачи, новые первыми."""
+    return await runner.list_jobs(db, status=status, kind=kind, limit=limit)
+
+
+@router.get("/{job_id}")
+async def get_job(job_id: uuid.UUID = Path(...), db: AsyncSession = Depends(get_db)):
+    """Состояние задачи: статус, прогресс (0..1), сообщение, ошибка, результат."""
+    job = await runner.get(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/{job_id}/result")
+async def get_job_result(job_id: uuid.UUID = Path(...), db: AsyncSession = Depends(get_db)):
+    """
+    Результат завершённой задачи: JSON либо файл (например, выгрузка export).
+    409 — задача ещё выполняется или завершилась без результата.
+    """
+    job = await runner.get(db, job_id, with_file=True)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] != "succeeded":
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    result = job["result"] or {}
+    path = result.get("file")
+    if path is None:
+        return result
+    if not os.path.exists(path):
+        raise HTTPException(status_code=410, detail="Result file is no longer available")
+    return FileResponse(path, media_type=result.get("media_type"), filename=result.get("filename"))
+
+
+@router.post("/{job_id}/cancel")
+async def cancel_job(
+    job_id: uuid.UUID = Path(...),
+    db: AsyncSession = Depends(get_db),
+    job_runner: JobRunner | None = Depends(get_job_runner),
+):
+    """
+    Отменить задачу. Ожидающая отменяется сразу; у выполняемой процесс/поток останавливает
+    тот экземпляр сервиса, который её выполняет (статус станет cancelled в течение нескольких секунд).
+    """
+    job = await runner.cancel(db, job_id)
+    if job is None:
+        existing = await runner.get(db, job_id)
+        if existing is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        raise HTTPException(status_code=409, detail=f"Job is already {existing['status']}")
+    if job_runner is not None:
+        job_runner.wake()
+    return job
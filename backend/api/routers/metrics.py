@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Request, Response
+
+from ..metrics import BREAKER_OPEN, JOBS_RUNNING, REGISTRY, observe_cache, observe_pool
+from ...db.session import pool_stats
+
+router = APIRouter(tags=["metrics"])
+
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """Метрики в текстовом формате Prometheus; состояние пулов и кэшей снимается в момент запроса."""
+    state = request.app.state
+    api = getattr(state, "api_client", None)
+    if api is not None:
+        observe_pool("external_api", api.pool_stats(), ("connections", "active", "idle", "queued_requests"))
+        BREAKER_OPEN.set(value=1 if api.breaker.state == "open" else 0)
+        if api.cache is not None:
+            stats = api.cache.stats()
+            observe_cache("external_api", stats["hits"], stats["misses"], stats["entries"], coalesced=stats["coalesced"])
+    engine = getattr(state, "db_engine", None)
+    if engine is not None:
+        observe_pool("db", pool_stats(engine), ("size", "checked_out", "checked_in", "overflow"))
+    tile_cache = getattr(state, "tile_cache", None)
+    if tile_cache is not None:
+        stats = tile_cache.stats()
+        observe_cache("tiles", stats["hits"], stats["misses"], stats["tiles"])
+    comparison_cache = getattr(state, "comparison_cache", None)
+    if comparison_cache is not None:
+        stats = comparison_cache.stats()
+        observe_cache("comparison", stats["hits"], stats["misses"], stats["entries"])
+    zonal_cache = getattr(state, "zonal_cache", None)
+    if zonal_cache is not None:
+        stats = zonal_cache.stats()
+        observe_cache("zonal", stats["hits"], stats["misses"], stats["entries"])
+    surface_cache = getattr(state, "surface_cache", None)
+    if surface_cache is not None:
+        stats = surface_cache.stats()
+        observe_cache("surfaces", stats["hits"], stats["misses"], stats["surfaces"], revalidated=stats["revalidated"])
+        observe_cache("surface_tiles", stats["tile_hits"], stats["tile_misses"], stats["tile_tiles"])
+    job_runner = getattr(state, "job_runner", None)
+    if job_runner is not None:
+        stats = job_runner.stats()
+        JOBS_RUNNING.set("process", value=stats["process_jobs"])
+        JOBS_RUNNING.set("thread", value=stats["thread_jobs"])
+    return Response(REGISTRY.render(), media_type=PROMETHEUS_MEDIA_TYPE)
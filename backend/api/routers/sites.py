@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..deps import get_db, get_job_runner
+from ..schemas import SitePointsRebuildRequest
+from ...jobs import runner
+from ...jobs.runner import JobRunner
+
+router = APIRouter(prefix="/sites", tags=["sites"])
+
+@router.post("/site-points/rebuild", status_code=202)
+async def rebuild_site_points(
+    body: SitePointsRebuildRequest | None = None,
+    db: AsyncSession = Depends(get_db),
+    job_runner: JobRunner | None = Depends(get_job_runner),
+):
+    """
+    Ставит в очередь задачу `site_points`: пересчёт связей участок–точка одним пространственным
+    JOIN (ST_Contains). Без параметров — по всем участкам; можно ограничить списком
+    site_ids / soil_point_ids. Ответ возвращается сразу; итог (matched / inserted / deleted) —
+    в результате задачи, GET /jobs/{job_id}.
+    """
+    body = body or SitePointsRebuildRequest()
+    job, deduplicated = await runner.submit(db, "site_points", body.model_dump(mode="json"))
+    if job_runner is not None:
+        job_runner.wake()
+    return {**job, "deduplicated": deduplicated}
@@ -0,0 +1,70 @@
+import datetime as dt
+import uuid
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..deps import get_db
+from ...services import climatology, quality, timeseries
+
+router = APIRouter(prefix="/soil-points", tags=["soil-points"])
+
+Depth = Literal["0-20", "0-50", "0-100"]
+Source = Literal["kazhydromet", "uni", "manual", "era5_land", "amsr2"]
+
+
+@router.get("/anomalies")
+async def get_soil_moisture_anomalies(
+    year: int = Query(..., ge=1900, le=2100),
+    month: int = Query(..., ge=1, le=12),
+    decade: int = Query(..., ge=1, le=3),
+    depth: Depth = Query("0-20"),
+    source: Source = Query("kazhydromet", description="`era5_land`/`amsr2` read soil_decadal_external"),
+    min_years: int = Query(5, ge=2, le=100, description="минимальная длина ряда климатологии"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Аномалии влажности почвы за декаду по всем точкам: значение, многолетнее среднее,
+    стандартное отклонение и z-оценка относительно климатологии той же декады года.
+    """
+    return await climatology.anomaly_map(
+        db, year=year, month=month, decade=decade, depth=depth, source=source, min_years=min_years,
+    )
+
+
+@router.get("/quality-flags")
+async def get_quality_flag_counts(
+    year_from: int | None = Query(None, ge=1900, le=2100),
+    year_to: int | None = Query(None, ge=1900, le=2100),
+    depth: Depth | None = Query(None),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Число ручных декадных измерений по флагам контроля качества (range, spike, step, stuck, spatial),
+    а также прошедших проверку (`ok`) и ещё не проверенных (`unchecked`).
+    """
+    return await quality.flag_counts(db, year_from=year_from, year_to=year_to, depth=depth)
+
+
+@router.get("/{soil_point_id}/decadal")
+async def get_soil_point_decadal(
+    soil_point_id: uuid.UUID,
+    depth: Depth | None = Query(None),
+    source: Source | None = Query(None, description="`era5_land`/`amsr2` read soil_decadal_external"),
+    date_from: dt.date | None = Query(None, alias="from"),
+    date_to: dt.date | None = Query(None, alias="to"),
+    cursor: str | None = Query(None, description="`next_cursor` from the previous page"),
+    limit: int = Query(1000, ge=1, le=10_000),
+    format: Literal["rows", "columns"] = Query("rows", description="`columns` returns one array per field"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Декадные значения влажности почвы в точке, постранично по ключу (year, month, decade, depth).
+    """
+    try:
+        return await timeseries.soil_point_decadal_page(
+            db, soil_point_id, source=source, depth=depth, date_from=date_from, date_to=date_to,
+            cursor=cursor, limit=limit, columnar=format == "columns",
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
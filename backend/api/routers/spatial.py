@@ -0,0 +1,52 @@
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import SpatialSettings
+from ..deps import get_db, get_spatial_index, get_spatial_settings
+from ..schemas import NearestRequest, SpatialResponse, WithinRequest
+from ...services import spatial
+from ...services.spatial import SpatialIndex
+
+router = APIRouter(prefix="/spatial", tags=["spatial"])
+
+def _coords(body, settings: SpatialSettings):
+    if len(body.points) > settings.max_points:
+        raise HTTPException(status_code=422, detail=f"At most {settings.max_points} points per request")
+    return [p.lat for p in body.points], [p.lon for p in body.points]
+
+@router.post("/nearest", response_model=SpatialResponse)
+async def nearest(
+    body: NearestRequest,
+    use_index: bool = Query(True, description="Answer from the in-memory snapshot when it is loaded"),
+    index: SpatialIndex | None = Depends(get_spatial_index),
+    settings: SpatialSettings = Depends(get_spatial_settings),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Ближайшие k станций / точек для каждой из переданных координат (пакетный запрос).
+    """
+    lats, lons = _coords(body, settings)
+    if use_index and index is not None and index.snapshot(body.layer) is not None:
+        results = index.nearest(body.layer, np.asarray(lats), np.asarray(lons), body.k, body.max_distance_km)
+        return {"source": "index", "results": results}
+    results = await spatial.nearest_db(db, body.layer, lats, lons, body.k, body.max_distance_km)
+    return {"source": "db", "results": results}
+
+@router.post("/within", response_model=SpatialResponse)
+async def within(
+    body: WithinRequest,
+    use_index: bool = Query(True, description="Answer from the in-memory snapshot when it is loaded"),
+    index: SpatialIndex | None = Depends(get_spatial_index),
+    settings: SpatialSettings = Depends(get_spatial_settings),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Все станции / точки в радиусе `radius_km` от каждой из переданных координат.
+    """
+    lats, lons = _coords(body, settings)
+    if use_index and index is not None and index.snapshot(body.layer) is not None:
+        results = index.within(body.layer, np.asarray(lats), np.asarray(lons), body.radius_km)
+        return {"source": "index", "results": results}
+    results = await spatial.within_db(db, body.layer, lats, lons, body.radius_km)
+    return {"source": "db", "results": results}
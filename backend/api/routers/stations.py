@@ -0,0 +1,53 @@
+import datetime as dt
+import uuid
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..deps import get_db
+from ...services import timeseries
+
+router = APIRouter(prefix="/stations", tags=["stations"])
+
+@router.get("/{station_id}/meteo")
+async def get_station_meteo(
+    station_id: uuid.UUID,
+    date_from: dt.date | None = Query(None, alias="from"),
+    date_to: dt.date | None = Query(None, alias="to"),
+    cursor: str | None = Query(None, description="`next_cursor` from the previous page"),
+    limit: int = Query(1000, ge=1, le=10_000),
+    format: Literal["rows", "columns"] = Query("rows", description="`columns` returns one array per field"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Суточные метеоданные станции, постранично по ключу (station_id, date) — без OFFSET.
+    """
+    try:
+        return await timeseries.station_meteo_page(
+            db, station_id, date_from=date_from, date_to=date_to,
+            cursor=cursor, limit=limit, columnar=format == "columns",
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+@router.get("/{station_id}/meteo/decadal")
+async def get_station_meteo_decadal(
+    station_id: uuid.UUID,
+    date_from: dt.date | None = Query(None, alias="from"),
+    date_to: dt.date | None = Query(None, alias="to"),
+    cursor: str | None = Query(None, description="`next_cursor` from the previous page"),
+    limit: int = Query(1000, ge=1, le=10_000),
+    format: Literal["rows", "columns"] = Query("rows", description="`columns` returns one array per field"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Декадные агрегаты метеоданных (сумма осадков, средняя/макс/мин температура, влажность),
+    в той же сетке (year, month, decade), что и декадные данные влажности почвы.
+    """
+    try:
+        return await timeseries.station_meteo_decadal_page(
+            db, station_id, date_from=date_from, date_to=date_to,
+            cursor=cursor, limit=limit, columnar=format == "columns",
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
@@ -0,0 +1,90 @@
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Response
+
+from ..config import SurfaceSettings
+from ..deps import get_surface_cache, get_surface_settings
+from ...services.surfaces import SurfaceCache, SurfaceKey
+
+router = APIRouter(prefix="/surfaces", tags=["surfaces"])
+
+Depth = Literal["0-20", "0-50", "0-100"]
+Source = Literal["kazhydromet", "uni", "manual", "era5_land", "amsr2"]
+Method = Literal["idw", "kriging"]
+
+MEDIA_TYPES = {"png": "image/png", "tif": "image/tiff"}
+
+
+def surface_key(
+    year: int = Query(..., ge=1900, le=2100),
+    month: int = Query(..., ge=1, le=12),
+    decade: int = Query(..., ge=1, le=3),
+    depth: Depth = Query("0-20"),
+    source: Source = Query("kazhydromet", description="`era5_land`/`amsr2` read soil_decadal_external"),
+    method: Method = Query("idw", description="`kriging` = ordinary kriging with a fitted variogram"),
+) -> SurfaceKey:
+    return SurfaceKey(source, depth, year, month, decade, method)
+
+
+@router.get("/soil-moisture")
+async def get_surface(
+    key: SurfaceKey = Depends(surface_key),
+    cache: SurfaceCache = Depends(get_surface_cache),
+):
+    """
+    Сведения о поверхности влажности почвы за декаду: сетка, число точек, диапазон значений
+    (для легенды), вариограмма, время расчёта. Поверхность рассчитывается при первом запросе.
+    """
+    surface = await cache.surface(key)
+    return {**surface.summary(), "tiles": "/surfaces/soil-moisture/{z}/{x}/{y}.png"}
+
+
+async def _tile(
+    fmt: str, key: SurfaceKey, z: int, x: int, y: int, vmin: float | None, vmax: float | None,
+    cache: SurfaceCache, settings: SurfaceSettings,
+) -> Response:
+    if x >= 2 ** z or y >= 2 ** z:
+        raise HTTPException(status_code=404, detail="Tile out of range")
+    if vmin is not None and vmax is not None and vmin >= vmax:
+        raise HTTPException(status_code=422, detail="vmin must be below vmax")
+    surface = await cache.surface(key)
+    try:
+        tile = await cache.tile(surface, z, x, y, fmt, vmin, vmax)
+    except ImportError:
+        raise HTTPException(status_code=501, detail="GeoTIFF tiles need rasterio installed")
+    headers = {"Cache-Control": f"public, max-age={settings.max_age}", "X-Surface-Fingerprint": surface.fingerprint}
+    if not tile:
+        return Response(status_code=204, headers=headers)
+    return Response(content=tile, media_type=MEDIA_TYPES[fmt], headers=headers)
+
+
+@router.get("/soil-moisture/{z}/{x}/{y}.png")
+async def get_surface_png(
+    z: int = Path(..., ge=0, le=18),
+    x: int = Path(..., ge=0),
+    y: int = Path(..., ge=0),
+    key: SurfaceKey = Depends(surface_key),
+    vmin: float | None = Query(None, description="Нижняя граница шкалы; по умолчанию 2-й перцентиль поверхности"),
+    vmax: float | None = Query(None, description="Верхняя граница шкалы; по умолчанию 98-й перцентиль"),
+    cache: SurfaceCache = Depends(get_surface_cache),
+    settings: SurfaceSettings = Depends(get_surface_settings),
+):
+    """
+    Растровый тайл (PNG, 256×256) интерполированной влажности почвы за декаду.
+    Тайлы кэшируются и пересчитываются только при изменении данных этой декады.
+    """
+    return await _tile("png", key, z, x, y, vmin, vmax, cache, settings)
+
+
+@router.get("/soil-moisture/{z}/{x}/{y}.tif")
+async def get_surface_geotiff(
+    z: int = Path(..., ge=0, le=18),
+    x: int = Path(..., ge=0),
+    y: int = Path(..., ge=0),
+    key: SurfaceKey = Depends(surface_key),
+    cache: SurfaceCache = Depends(get_surface_cache),
+    settings: SurfaceSettings = Depends(get_surface_settings),
+):
+    """
+    Тайл GeoTIFF (float32, EPSG:3857) со значениями интерполированной влажности почвы.
+    """
+    return await _tile("tif", key, z, x, y, None, None, cache, settings)
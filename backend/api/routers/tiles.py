@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import TileSettings
+from ..deps import get_db, get_tile_cache, get_tile_settings
+from ...services.tiles import DEPTHS, LAYERS, TileCache, render_tile, resolve_attributes
+
+router = APIRouter(prefix="/tiles", tags=["tiles"])
+
+MVT_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+
+@router.get("/{layer}/{z}/{x}/{y}.mvt")
+async def get_tile(
+    layer: str,
+    z: int = Path(..., ge=0, le=24),
+    x: int = Path(..., ge=0),
+    y: int = Path(..., ge=0),
+    attributes: str | None = Query(
+        None, description="Comma-separated feature attributes, e.g. `code,latest_moisture_mm`"
+    ),
+    depth: str = Query("0-20", description="Depth for soil moisture attributes"),
+    db: AsyncSession = Depends(get_db),
+    cache: TileCache = Depends(get_tile_cache),
+    settings: TileSettings = Depends(get_tile_settings),
+):
+    """
+    Векторный тайл (MVT) слоя `stations`, `soil_points` или `sites`.
+    Тайлы кэшируются по (слой, атрибуты, z/x/y) и сбрасываются при изменении таблиц слоя.
+    """
+    if layer not in LAYERS:
+        raise HTTPException(status_code=404, detail=f"Unknown layer {layer!r}; available: {sorted(LAYERS)}")
+    if x >= 2 ** z or y >= 2 ** z:
+        raise HTTPException(status_code=404, detail="Tile out of range")
+    if depth not in DEPTHS:
+        raise HTTPException(status_code=422, detail=f"depth must be one of {DEPTHS}")
+    try:
+        names = resolve_attributes(LAYERS[layer], attributes.split(",") if attributes else None)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    key = (layer, names, depth, z, x, y)
+    tile = await cache.get(key)
+    if tile is None:
+        generation = cache.generation(layer)
+        tile = await render_tile(
+            db, layer, names, z, x, y, depth=depth, extent=settings.extent, buffer=settings.buffer
+        )
+        await cache.put(key, tile, generation)
+
+    headers = {"Cache-Control": f"public, max-age={settings.max_age}"}
+    if not tile:
+        return Response(status_code=204, headers=headers)
+    return Response(content=tile, media_type=MVT_MEDIA_TYPE, headers=headers)
@@ -0,0 +1,34 @@
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..deps import get_comparison_cache, get_db
+from ...services.comparison import ComparisonCache, compare
+
+router = APIRouter(prefix="/validation", tags=["validation"])
+
+@router.get("/soil-moisture")
+async def soil_moisture_comparison(
+    source: Literal["era5_land", "amsr2"] = Query("era5_land"),
+    depth: Literal["0-20", "0-50", "0-100"] | None = Query(None, description="All depths when omitted"),
+    year_from: int | None = Query(None, ge=1900, le=2100),
+    year_to: int | None = Query(None, ge=1900, le=2100),
+    min_samples: int = Query(3, ge=2, description="Skip point/depth pairs with fewer aligned decades"),
+    db: AsyncSession = Depends(get_db),
+    cache: ComparisonCache = Depends(get_comparison_cache),
+):
+    """
+    Сравнение ручных измерений влажности почвы (мм) с ERA5-Land / AMSR2 по точкам и глубинам:
+    смещение, RMSE, несмещённый RMSE и корреляция. Результат кэшируется до изменения исходных таблиц.
+    """
+    if year_from is not None and year_to is not None and year_from > year_to:
+        raise HTTPException(status_code=422, detail="year_from must not be after year_to")
+    key = (source, depth, year_from, year_to, min_samples)
+    result = cache.get(key)
+    if result is None:
+        generation = cache.generation
+        result = await compare(
+            db, source=source, depth=depth, year_from=year_from, year_to=year_to, min_samples=min_samples,
+        )
+        cache.put(key, result, generation)
+    return result
@@ -1,6 +1,7 @@
 from __future__ import annotations
 from typing import Optional, List, Dict, Any, Literal
 from datetime import datetime
+from uuid import UUID
 from pydantic import BaseModel, Field
 
 # ---------- Token ----------
@@ -54,6 +55,52 @@ class FeatureCollection(BaseModel):
     type: Literal["FeatureCollection"]
     features: List[GeoJSONFeature]
 
+# ---------- Batch (/external/fields/batch) ----------
+class FieldsBatchRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1)
+    concurrency: Optional[int] = Field(default=None, ge=1, le=64)
+
+class FieldBatchError(BaseModel):
+    id: int
+    status_code: int
+    detail: Any = None
+
+class FieldsBatchResponse(FeatureCollection):
+    errors: List[FieldBatchError] = []
+
+# ---------- Spatial (/spatial/*) ----------
+class SpatialPoint(BaseModel):
+    lat: float = Field(..., ge=-90, le=90)
+    lon: float = Field(..., ge=-180, le=180)
+
+class NearestRequest(BaseModel):
+    layer: Literal["stations", "soil_points"] = "stations"
+    points: List[SpatialPoint] = Field(..., min_length=1)
+    k: int = Field(default=1, ge=1, le=100)
+    max_distance_km: Optional[float] = Field(default=None, gt=0)
+
+class WithinRequest(BaseModel):
+    layer: Literal["stations", "soil_points"] = "soil_points"
+    points: List[SpatialPoint] = Field(..., min_length=1)
+    radius_km: float = Field(..., gt=0, le=2000)
+
+class SpatialMatch(BaseModel):
+    id: str
+    code: Optional[str] = None
+    name: Optional[str] = None
+    lat: float
+    lon: float
+    distance_km: float
+
+class SpatialResponse(BaseModel):
+    source: Literal["index", "db"]
+    results: List[List[SpatialMatch]]
+
+# ---------- Sites ----------
+class SitePointsRebuildRequest(BaseModel):
+    site_ids: Optional[List[UUID]] = None
+    soil_point_ids: Optional[List[UUID]] = None
+
 # ---------- Прочее ----------
 class GeometryResponse(BaseModel):
     id: str | int
@@ -0,0 +1,6 @@
+"""Benchmark tooling: upstream stub, synthetic dataset and load scenarios.
+
+    python -m backend.bench.upstream_stub --port 9100 --latency-ms 40
+    python -m backend.bench.datagen --stations 500 --years 2000-2024
+    python -m backend.bench.loadtest --scenario field --requests 2000 --concurrency 32
+"""
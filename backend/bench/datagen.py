@@ -0,0 +1,209 @@
+# backend/bench/datagen.py
+"""Fill PostGIS with a synthetic, reproducible dataset for benchmarks.
+
+Stations, soil points (a few per station), daily meteo for every station-day
+and decadal soil moisture (manual + ERA5-Land) are generated with NumPy from a
+fixed seed and loaded through the same COPY + merge path as the real loaders.
+Ids are uuid5 of a stable name, so `loadtest` can address the same objects
+without querying the database. Re-running is idempotent.
+
+    python -m backend.bench.datagen --stations 500 --soil-points-per-station 3 --years 2000-2024
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import datetime as dt
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Iterator, List, Tuple
+
+import asyncpg
+import numpy as np
+
+from ..ingest.bulk import copy_upsert, ensure_year_partitions
+from ..ingest import meteo_daily
+from ..services import climatology
+
+log = logging.getLogger(__name__)
+
+NAMESPACE = uuid.UUID("7f1c2b9e-4a52-4d8e-9a0c-5b3e1d2f6a71")
+DEPTHS = ("0-20", "0-50", "0-100")
+DEPTH_CAPACITY_MM = {"0-20": 40.0, "0-50": 95.0, "0-100": 180.0}
+LAT_RANGE = (41.0, 55.0)
+LON_RANGE = (47.0, 87.0)
+
+
+def station_id(n: int) -> uuid.UUID:
+    return uuid.uuid5(NAMESPACE, f"station-{n}")
+
+
+def soil_point_id(station: int, n: int) -> uuid.UUID:
+    return uuid.uuid5(NAMESPACE, f"soil-point-{station}-{n}")
+
+
+@dataclass(frozen=True)
+class Volume:
+    stations: int = 200
+    soil_points_per_station: int = 3
+    first_year: int = 2015
+    last_year: int = 2024
+    seed: int = 42
+
+    @property
+    def years(self) -> range:
+        return range(self.first_year, self.last_year + 1)
+
+
+def station_records(volume: Volume) -> Tuple[List[tuple], List[tuple]]:
+    rng = np.random.default_rng(volume.seed)
+    lats = rng.uniform(*LAT_RANGE, volume.stations)
+    lons = rng.uniform(*LON_RANGE, volume.stations)
+    stations, points = [], []
+    for n in range(volume.stations):
+        stations.append((station_id(n), f"BENCH-S{n:05d}", f"Bench station {n}", "kazhydromet",
+                         float(lats[n]), float(lons[n]), float(rng.uniform(100, 1500))))
+        for k in range(volume.soil_points_per_station):
+            points.append((soil_point_id(n, k), f"BENCH-P{n:05d}-{k}", f"Bench point {n}/{k}",
+                           float(lats[n] + rng.normal(0, 0.05)), float(lons[n] + rng.normal(0, 0.05)),
+                           station_id(n)))
+    return stations, points
+
+
+def meteo_year(rng: np.random.Generator, sid: uuid.UUID, lat: float, year: int) -> Iterator[tuple]:
+    """One station-year of daily weather: seasonal temperature + noise, zero-inflated gamma rain."""
+    start = dt.date(year, 1, 1)
+    days = (dt.date(year + 1, 1, 1) - start).days
+    doy = np.arange(days)
+    amplitude = 14 + (lat - 41) * 0.6
+    t_avg = 6 - (lat - 41) * 0.5 - amplitude * np.cos(2 * np.pi * (doy - 15) / 365.25) + rng.normal(0, 3, days)
+    spread = rng.uniform(3, 8, days)
+    rain = np.where(rng.random(days) < 0.25, rng.gamma(0.8, 5.0, days), 0.0)
+    rh = np.clip(70 - 0.8 * (t_avg - 5) + rng.normal(0, 8, days), 15, 100)
+    for i in range(days):
+        yield (sid, start + dt.timedelta(days=int(i)), round(float(t_avg[i]), 1),
+               round(float(t_avg[i] + spread[i]), 1), round(float(t_avg[i] - spread[i]), 1),
+               round(float(rh[i]), 0), round(float(rain[i]), 1), "kazhydromet")
+
+
+def soil_year(rng: np.random.Generator, pid: uuid.UUID, year: int) -> Tuple[List[tuple], List[tuple]]:
+    """36 decades x depths of moisture: a seasonal curve, noisy manual readings and smoother ERA5-Land."""
+    decade_index = np.arange(36)
+    season = 0.55 + 0.25 * np.cos(2 * np.pi * (decade_index - 9) / 36) + rng.normal(0, 0.05, 36)
+    manual, external = [], []
+    for depth in DEPTHS:
+        capacity = DEPTH_CAPACITY_MM[depth]
+        observed = np.clip(season + rng.normal(0, 0.06, 36), 0.05, 1.0)
+        modelled = np.clip(season + rng.normal(0.03, 0.02, 36), 0.05, 1.0)
+        for i in range(36):
+            month, decade = divmod(i, 3)
+            if month + 1 in (4, 5, 6, 7, 8, 9, 10):  # manual readings only in the field season
+                manual.append((pid, year, month + 1, decade + 1, depth,
+                               round(float(observed[i] * capacity), 1), round(float(observed[i]), 3), "manual"))
+            external.append((pid, year, month + 1, decade + 1, depth, "soil_moisture",
+                             round(float(modelled[i] * 0.45), 4), "m3/m3", "era5_land"))
+    return manual, external
+
+
+async def generate(dsn: str, volume: Volume, *, chunk_size: int = meteo_daily.DEFAULT_CHUNK_SIZE) -> dict:
+    started = time.perf_counter()
+    conn = await asyncpg.connect(dsn)
+    counts = {"stations": 0, "soil_points": 0, "meteo_daily": 0, "soil_decadal_manual": 0, "soil_decadal_external": 0}
+    try:
+        stations, points = station_records(volume)
+        counts["stations"] = await copy_upsert(
+            conn, "stations", ("station_id", "code", "name", "source", "lat", "lon", "alt_m"), stations,
+            conflict="stations_pkey", update_columns=("lat", "lon", "alt_m"),
+            after_merge=("UPDATE stations s SET geom = ST_SetSRID(ST_MakePoint(s.lon, s.lat), 4326) "
+                         "FROM {staging} t WHERE s.station_id = t.station_id",),
+        )
+        counts["soil_points"] = await copy_upsert(
+            conn, "soil_points", ("soil_point_id", "code", "name", "lat", "lon", "station_id"), points,
+            conflict="soil_points_pkey", update_columns=("lat", "lon", "station_id"),
+            after_merge=("UPDATE soil_points p SET geom = ST_SetSRID(ST_MakePoint(p.lon, p.lat), 4326) "
+                         "FROM {staging} t WHERE p.soil_point_id = t.soil_point_id",),
+        )
+
+        known_meteo: set[int] = set()
+        known_soil: set[int] = set()
+        await ensure_year_partitions(conn, meteo_daily.TABLE, volume.years, known_meteo)
+        await ensure_year_partitions(conn, "soil_decadal_external", volume.years, known_soil)
+
+        rng = np.random.default_rng(volume.seed + 1)
+        buffer: List[tuple] = []
+        for year in volume.years:
+            for station in stations:
+                buffer.extend(meteo_year(rng, station[0], station[4], year))
+                if len(buffer) >= chunk_size:
+                    counts["meteo_daily"] += await _load_meteo(conn, buffer)
+                    buffer = []
+            log.info("meteo_daily %d done (%d rows)", year, counts["meteo_daily"] + len(buffer))
+        if buffer:
+            counts["meteo_daily"] += await _load_meteo(conn, buffer)
+
+        for year in volume.years:
+            manual_rows: List[tuple] = []
+            external_rows: List[tuple] = []
+            for point in points:
+                manual, external = soil_year(rng, point[0], year)
+                manual_rows.extend(manual)
+                external_rows.extend(external)
+            counts["soil_decadal_manual"] += await copy_upsert(
+                conn, "soil_decadal_manual",
+                ("soil_point_id", "year", "month", "decade", "depth", "value_mm", "value_frac", "source"),
+                manual_rows, conflict="uq_soil_decadal_manual", update_columns=("value_mm", "value_frac"),
+                after_merge=(climatology.QUEUE_MANUAL_SQL,),
+            )
+            counts["soil_decadal_external"] += await copy_upsert(
+                conn, "soil_decadal_external",
+                ("soil_point_id", "year", "month", "decade", "depth", "variable", "value", "units", "source"),
+                external_rows, conflict="uq_soil_decadal_external", update_columns=("value", "units"),
+                after_merge=(climatology.QUEUE_EXTERNAL_SQL,),
+            )
+    finally:
+        await conn.close()
+    counts["elapsed_s"] = round(time.perf_counter() - started, 1)
+    return counts
+
+
+async def _load_meteo(conn: asyncpg.Connection, records: List[tuple]) -> int:
+    return await copy_upsert(
+        conn, meteo_daily.TABLE, meteo_daily.COLUMNS, records, conflict=meteo_daily.CONFLICT,
+        update_columns=meteo_daily.VALUE_COLUMNS, after_merge=meteo_daily.AFTER_MERGE,
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    from ..db.config import DatabaseSettings
+    from ..db.session import asyncpg_dsn
+    from ..services import htc, meteo_decadal
+
+    parser = argparse.ArgumentParser(description="Generate a synthetic benchmark dataset")
+    parser.add_argument("--stations", type=int, default=Volume.stations)
+    parser.add_argument("--soil-points-per-station", type=int, default=Volume.soil_points_per_station)
+    parser.add_argument("--years", default=f"{Volume.first_year}-{Volume.last_year}", help="e.g. 2000-2024")
+    parser.add_argument("--seed", type=int, default=Volume.seed)
+    parser.add_argument("--no-rollups", action="store_true", help="skip meteo_decadal / HTC / climatology refresh")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    first, _, last = args.years.partition("-")
+    volume = Volume(
+        stations=args.stations, soil_points_per_station=args.soil_points_per_station,
+        first_year=int(first), last_year=int(last or first), seed=args.seed,
+    )
+    dsn = asyncpg_dsn(DatabaseSettings().url)
+
+    async def run() -> None:
+        log.info("generated: %s", await generate(dsn, volume))
+        if not args.no_rollups:
+            await meteo_decadal.refresh_dirty(dsn)
+            await htc.recompute_dirty(dsn)
+            await climatology.refresh_dirty(dsn)
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
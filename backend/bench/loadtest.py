@@ -0,0 +1,290 @@
+# backend/bench/loadtest.py
+"""Scripted load scenarios against the `backend.main:app` routes.
+
+By default the app runs in-process (lifespan included) behind httpx's ASGI
+transport and the external API is replaced by `upstream_stub`, so a run needs
+only PostgreSQL (and not even that for the `external_*` scenarios). With
+`--url` the same scenarios hit a running server instead.
+
+Each scenario reports throughput, p50/p95/p99/max latency, error count,
+response bytes and peak RSS; `--save` writes the numbers as JSON and
+`--compare` prints the relative change against such a file.
+
+    python -m backend.bench.loadtest --scenario external_field --requests 2000 --concurrency 32
+    python -m backend.bench.loadtest --scenario all --save bench.json
+    python -m backend.bench.loadtest --scenario all --compare bench.json
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import resource
+import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Tuple
+
+import httpx
+
+from . import datagen
+from .upstream_stub import StubConfig, create_app as create_stub
+
+RequestSpec = Tuple[str, str, Dict[str, Any]]  # method, url, httpx kwargs
+
+
+@dataclass(frozen=True)
+class Context:
+    stations: int
+    soil_points_per_station: int
+    fields: int
+    first_year: int
+    last_year: int
+
+
+def _hot_id(rng: random.Random, n: int) -> int:
+    """Zipf-ish skew: a few fields are requested much more often than the rest."""
+    return max(1, min(n, int(n ** rng.random())))
+
+
+def _station(rng: random.Random, ctx: Context) -> str:
+    return str(datagen.station_id(rng.randrange(ctx.stations)))
+
+
+def _soil_point(rng: random.Random, ctx: Context) -> str:
+    return str(datagen.soil_point_id(rng.randrange(ctx.stations), rng.randrange(ctx.soil_points_per_station)))
+
+
+def _tile(rng: random.Random) -> str:
+    z = rng.randint(3, 9)
+    lat, lon = rng.uniform(*datagen.LAT_RANGE), rng.uniform(*datagen.LON_RANGE)
+    n = 2 ** z
+    x = int((lon + 180) / 360 * n)
+    y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+    return f"{z}/{x}/{y}"
+
+
+def _points(rng: random.Random, count: int) -> List[Dict[str, float]]:
+    return [{"lat": rng.uniform(*datagen.LAT_RANGE), "lon": rng.uniform(*datagen.LON_RANGE)} for _ in range(count)]
+
+
+def _year_range(rng: random.Random, ctx: Context) -> Dict[str, str]:
+    year = rng.randint(ctx.first_year, ctx.last_year)
+    return {"from": f"{year}-01-01", "to": f"{year}-12-31"}
+
+
+SCENARIOS: Dict[str, Callable[[random.Random, Context], RequestSpec]] = {
+    "external_fields_list": lambda rng, ctx: ("GET", "/external/fields/list", {}),
+    "external_field": lambda rng, ctx: ("GET", f"/external/field/get/{_hot_id(rng, ctx.fields)}", {}),
+    "external_field_passthrough": lambda rng, ctx: (
+        "GET", f"/external/field/get/{_hot_id(rng, ctx.fields)}", {"params": {"passthrough": "true"}},
+    ),
+    "external_batch": lambda rng, ctx: (
+        "POST", "/external/fields/batch", {"json": {"ids": rng.sample(range(1, ctx.fields + 1), min(50, ctx.fields))}},
+    ),
+    "tiles_stations": lambda rng, ctx: ("GET", f"/tiles/stations/{_tile(rng)}.mvt", {}),
+    "tiles_soil_points": lambda rng, ctx: (
+        "GET", f"/tiles/soil_points/{_tile(rng)}.mvt", {"params": {"attributes": "code,latest_moisture_mm"}},
+    ),
+    "spatial_nearest": lambda rng, ctx: (
+        "POST", "/spatial/nearest", {"json": {"layer": "stations", "points": _points(rng, 100), "k": 3}},
+    ),
+    "spatial_within": lambda rng, ctx: (
+        "POST", "/spatial/within", {"json": {"layer": "soil_points", "points": _points(rng, 20), "radius_km": 50}},
+    ),
+    "station_meteo": lambda rng, ctx: (
+        "GET", f"/stations/{_station(rng, ctx)}/meteo", {"params": {**_year_range(rng, ctx), "limit": 1000}},
+    ),
+    "station_meteo_decadal": lambda rng, ctx: (
+        "GET", f"/stations/{_station(rng, ctx)}/meteo/decadal", {"params": _year_range(rng, ctx)},
+    ),
+    "soil_point_decadal": lambda rng, ctx: (
+        "GET", f"/soil-points/{_soil_point(rng, ctx)}/decadal", {"params": {"source": "era5_land"}},
+    ),
+    "export_meteo_parquet": lambda rng, ctx: (
+        "GET", "/export/meteo_daily", {"params": {"format": "parquet", "station_id": _station(rng, ctx)}},
+    ),
+}
+
+
+@dataclass
+class Result:
+    scenario: str
+    requests: int
+    concurrency: int
+    errors: int
+    elapsed_s: float
+    throughput_rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+    mean_bytes: float
+    peak_rss_mb: float
+    statuses: Dict[str, int]
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    if not ordered:
+        return float("nan")
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, name: str, ctx: Context, *, requests: int, concurrency: int, seed: int
+) -> Result:
+    make = SCENARIOS[name]
+    rng = random.Random(seed)
+    specs = [make(rng, ctx) for _ in range(requests)]  # generated up front: not part of the timing
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    total_bytes = 0
+    next_index = 0
+
+    async def worker() -> None:
+        nonlocal next_index, total_bytes
+        while next_index < len(specs):
+            method, url, kwargs = specs[next_index]
+            next_index += 1
+            started = time.perf_counter()
+            size = 0
+            try:
+                async with client.stream(method, url, **kwargs) as response:
+                    async for chunk in response.aiter_raw():
+                        size += len(chunk)
+                key = str(response.status_code)
+            except httpx.HTTPError as exc:
+                key = type(exc).__name__
+            latencies.append(time.perf_counter() - started)
+            statuses[key] = statuses.get(key, 0) + 1
+            total_bytes += size
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    ordered = sorted(latencies)
+    errors = sum(count for key, count in statuses.items() if not key.isdigit() or int(key) >= 400)
+    return Result(
+        scenario=name,
+        requests=len(latencies),
+        concurrency=concurrency,
+        errors=errors,
+        elapsed_s=round(elapsed, 3),
+        throughput_rps=round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        p50_ms=round(percentile(ordered, 0.50) * 1000, 2),
+        p95_ms=round(percentile(ordered, 0.95) * 1000, 2),
+        p99_ms=round(percentile(ordered, 0.99) * 1000, 2),
+        max_ms=round(ordered[-1] * 1000, 2) if ordered else float("nan"),
+        mean_bytes=round(total_bytes / len(latencies), 1) if latencies else 0.0,
+        peak_rss_mb=round(_peak_rss_mb(), 1),
+        statuses=statuses,
+    )
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+async def run(args: argparse.Namespace) -> List[Result]:
+    ctx = Context(
+        stations=args.stations, soil_points_per_station=args.soil_points_per_station,
+        fields=args.fields, first_year=args.first_year, last_year=args.last_year,
+    )
+    names = list(SCENARIOS) if args.scenario == ["all"] else args.scenario
+    results: List[Result] = []
+
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout) as client:
+            for name in names:
+                results.append(await _run_one(client, name, ctx, args))
+        return results
+
+    # In-process: app + lifespan, upstream replaced by the stub
+    os.environ.setdefault("EXTERNAL_API_BASE_URL", "http://upstream-stub")
+    from ..api.client import ExternalAPIClient
+    from ..api.deps import get_settings
+    from ..main import app
+
+    stub = create_stub(StubConfig(
+        fields=args.fields, vertices=args.vertices, latency_ms=args.upstream_latency_ms, seed=args.seed,
+    ))
+    async with app.router.lifespan_context(app):
+        await app.state.api_client.aclose()
+        app.state.api_client = await ExternalAPIClient(get_settings(), transport=httpx.ASGITransport(stub)).open()
+        try:
+            transport = httpx.ASGITransport(app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=args.timeout) as client:
+                for name in names:
+                    results.append(await _run_one(client, name, ctx, args))
+        finally:
+            await app.state.api_client.aclose()
+    return results
+
+
+async def _run_one(client: httpx.AsyncClient, name: str, ctx: Context, args: argparse.Namespace) -> Result:
+    if args.warmup:
+        await run_scenario(client, name, ctx, requests=args.warmup, concurrency=args.concurrency, seed=args.seed + 1)
+    result = await run_scenario(
+        client, name, ctx, requests=args.requests, concurrency=args.concurrency, seed=args.seed,
+    )
+    print(_format(result), flush=True)
+    return result
+
+
+def _format(r: Result) -> str:
+    return (
+        f"{r.scenario:<28} {r.throughput_rps:>9.1f} req/s  p50 {r.p50_ms:>8.2f}  p95 {r.p95_ms:>8.2f}  "
+        f"p99 {r.p99_ms:>8.2f}  max {r.max_ms:>8.2f} ms  err {r.errors:>4}  "
+        f"{r.mean_bytes / 1024:>8.1f} KiB/resp  rss {r.peak_rss_mb:>7.1f} MB"
+    )
+
+
+def compare(results: List[Result], baseline_path: str) -> None:
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {row["scenario"]: row for row in json.load(f)}
+    print(f"\nchange vs {baseline_path} (negative latency / positive throughput is better):")
+    for r in results:
+        base = baseline.get(r.scenario)
+        if base is None:
+            continue
+        deltas = []
+        for key in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms", "peak_rss_mb"):
+            old, new = base[key], getattr(r, key)
+            deltas.append(f"{key} {((new - old) / old * 100) if old else 0.0:+6.1f}%")
+        print(f"{r.scenario:<28} " + "  ".join(deltas))
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Run load scenarios against the API")
+    parser.add_argument("--scenario", nargs="+", default=["all"], choices=["all", *SCENARIOS])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=50, help="requests per scenario before measuring")
+    parser.add_argument("--url", help="target a running server instead of the in-process app")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--stations", type=int, default=datagen.Volume.stations)
+    parser.add_argument("--soil-points-per-station", type=int, default=datagen.Volume.soil_points_per_station)
+    parser.add_argument("--first-year", type=int, default=datagen.Volume.first_year)
+    parser.add_argument("--last-year", type=int, default=datagen.Volume.last_year)
+    parser.add_argument("--fields", type=int, default=StubConfig.fields)
+    parser.add_argument("--vertices", type=int, default=StubConfig.vertices)
+    parser.add_argument("--upstream-latency-ms", type=float, default=StubConfig.latency_ms)
+    parser.add_argument("--save", help="write results as JSON")
+    parser.add_argument("--compare", help="JSON from a previous --save run")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args))
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump([asdict(r) for r in results], f, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+# backend/bench/upstream_stub.py
+"""Local stand-in for the VKU upstream API (`/login`, `/fields/list`, `/field/get/{id}`).
+
+Responses are deterministic per field id (same seed -> same bytes), so runs are
+comparable. Latency, payload size and error rate are configurable; field
+geometries are MultiPolygons with `polygons x vertices` coordinates, which is
+what makes real field payloads large.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import datetime as dt
+import hashlib
+import math
+import random
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List
+
+from fastapi import FastAPI, Form, Header, Response
+
+from ..api.jsonlib import dumps
+
+# Kazakhstan, roughly
+LAT_RANGE = (41.0, 55.0)
+LON_RANGE = (47.0, 87.0)
+
+
+@dataclass(frozen=True)
+class StubConfig:
+    fields: int = 1000
+    polygons: int = 4
+    vertices: int = 256
+    plots: int = 3
+    latency_ms: float = 20.0
+    jitter_ms: float = 10.0
+    error_rate: float = 0.0
+    seed: int = 42
+
+
+def _ring(rng: random.Random, lat: float, lon: float, radius: float, vertices: int) -> List[List[float]]:
+    coords = []
+    for i in range(vertices):
+        angle = 2 * math.pi * i / vertices
+        r = radius * rng.uniform(0.8, 1.0)
+        coords.append([round(lon + r * math.cos(angle), 7), round(lat + r * math.sin(angle), 7)])
+    coords.append(coords[0])
+    return coords
+
+
+def field_center(config: StubConfig, field_id: int) -> tuple[float, float]:
+    rng = random.Random(config.seed * 1_000_003 + field_id)
+    return rng.uniform(*LAT_RANGE), rng.uniform(*LON_RANGE)
+
+
+def field_collection(config: StubConfig, field_id: int) -> Dict[str, Any]:
+    """Field outline plus its plots as a GeoJSON FeatureCollection."""
+    rng = random.Random(config.seed * 7_919 + field_id)
+    lat, lon = field_center(config, field_id)
+    outline = {
+        "type": "Feature",
+        "id": field_id,
+        "properties": {"kind": "field", "name": f"Field {field_id}", "area_ha": round(rng.uniform(20, 2000), 2)},
+        "geometry": {
+            "type": "MultiPolygon",
+            "coordinates": [
+                [_ring(rng, lat + 0.02 * p, lon + 0.02 * p, 0.01, config.vertices)]
+                for p in range(config.polygons)
+            ],
+        },
+    }
+    plots = [
+        {
+            "type": "Feature",
+            "id": f"{field_id}-{n}",
+            "properties": {"kind": "plot", "plot_id": field_id * 100 + n, "crop": rng.choice(["wheat", "barley", "flax"])},
+            "geometry": {
+                "type": "Polygon",
+                "coordinates": [_ring(rng, lat + 0.004 * n, lon, 0.002, max(8, config.vertices // 8))],
+            },
+        }
+        for n in range(config.plots)
+    ]
+    return {"type": "FeatureCollection", "features": [outline, *plots]}
+
+
+def fields_list(config: StubConfig) -> List[Dict[str, Any]]:
+    created = dt.datetime(2024, 1, 1)
+    items = []
+    for field_id in range(1, config.fields + 1):
+        lat, lon = field_center(config, field_id)
+        items.append({
+            "id": field_id,
+            "name": f"Field {field_id}",
+            "date_created": (created + dt.timedelta(hours=field_id)).isoformat(),
+            "latitude_center": lat,
+            "longitude_center": lon,
+            "altitude_center": 250.0,
+            "file_path": f"/data/fields/{field_id}.geojson",
+            "user_id": 1 + field_id % 17,
+            "plot_count": config.plots,
+        })
+    return items
+
+
+def create_app(config: StubConfig) -> FastAPI:
+    app = FastAPI(title="VKU upstream stub")
+    rng = random.Random(config.seed)
+
+    @lru_cache(maxsize=4096)
+    def body(field_id: int) -> bytes:
+        return dumps(field_collection(config, field_id))
+
+    list_body = dumps(fields_list(config))
+
+    async def respond(payload: bytes, if_none_match: str | None) -> Response:
+        await asyncio.sleep(max(0.0, config.latency_ms + rng.uniform(-1, 1) * config.jitter_ms) / 1000)
+        if config.error_rate and rng.random() < config.error_rate:
+            return Response(b'{"detail":"stub error"}', status_code=503, media_type="application/json")
+        etag = '"' + hashlib.blake2b(payload, digest_size=8).hexdigest() + '"'
+        if if_none_match == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        return Response(payload, media_type="application/json", headers={"ETag": etag})
+
+    @app.post("/login")
+    async def login(username: str = Form(...), password: str = Form(...)):
+        await asyncio.sleep(config.latency_ms / 1000)
+        return {"access_token": f"stub-{username}", "token_type": "bearer", "expires_in": 3600}
+
+    @app.get("/fields/list")
+    async def get_fields_list(if_none_match: str | None = Header(None)):
+        return await respond(list_body, if_none_match)
+
+    @app.get("/field/get/{field_id}")
+    async def get_field(field_id: int, if_none_match: str | None = Header(None)):
+        if not 1 <= field_id <= config.fields:
+            return Response(b'{"detail":"Not found"}', status_code=404, media_type="application/json")
+        return await respond(body(field_id), if_none_match)
+
+    return app
+
+
+def main(argv: list[str] | None = None) -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run the VKU upstream stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--fields", type=int, default=StubConfig.fields)
+    parser.add_argument("--polygons", type=int, default=StubConfig.polygons, help="polygons per field MultiPolygon")
+    parser.add_argument("--vertices", type=int, default=StubConfig.vertices, help="vertices per polygon ring")
+    parser.add_argument("--plots", type=int, default=StubConfig.plots)
+    parser.add_argument("--latency-ms", type=float, default=StubConfig.latency_ms)
+    parser.add_argument("--jitter-ms", type=float, default=StubConfig.jitter_ms)
+    parser.add_argument("--error-rate", type=float, default=StubConfig.error_rate)
+    parser.add_argument("--seed", type=int, default=StubConfig.seed)
+    args = parser.parse_args(argv)
+
+    config = StubConfig(
+        fields=args.fields, polygons=args.polygons, vertices=args.vertices, plots=args.plots,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate, seed=args.seed,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -30,11 +30,18 @@ def _render_uuid(type_, autogen_context):
     autogen_context.imports.add("from sqlalchemy.dialects import postgresql as psql")
     return "psql.UUID(as_uuid=True)"
 
+import re
+
 VIEWS = set()
 
+# yearly partitions (meteo_daily_y2024, ...) are managed by ensure_yearly_partitions()
+PARTITION_RE = re.compile(r"_y\d{4}$")
+
 def include_object(obj, name, type_, reflected, compare_to):
     if type_ == "table" and name in VIEWS:
         return False
+    if type_ == "table" and reflected and PARTITION_RE.search(name or ""):
+        return False
     return True
 
 def run_migrations_offline():
@@ -0,0 +1,64 @@
+"""local mirror of upstream fields and plots
+
+Revision ID: a4b5c6d7e8f9
+Revises: f3a4b5c6d7e8
+Create Date: 2026-10-17 15:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4b5c6d7e8f9'
+down_revision: Union[str, None] = 'f3a4b5c6d7e8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Maintained by backend.services.field_mirror; ids are the upstream (VKU) field ids
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS fields (
+            field_id integer PRIMARY KEY,
+            name text,
+            date_created timestamptz,
+            latitude_center double precision,
+            longitude_center double precision,
+            altitude_center double precision,
+            file_path text,
+            user_id integer,
+            plot_count integer,
+            list_hash text NOT NULL,
+            payload_hash text,
+            geom geometry(MultiPolygon, 4326),
+            listed_at timestamptz NOT NULL DEFAULT now(),
+            geometry_synced_at timestamptz
+        );
+    """)
+    # One row per feature of the upstream field collection, in upstream order
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS plots (
+            field_id integer NOT NULL REFERENCES fields(field_id) ON DELETE CASCADE,
+            position integer NOT NULL,
+            feature_id text,
+            properties jsonb NOT NULL DEFAULT '{}'::jsonb,
+            geom geometry(Geometry, 4326) NOT NULL,
+            PRIMARY KEY (field_id, position)
+        );
+    """)
+    op.execute("CREATE INDEX IF NOT EXISTS idx_fields_geom ON fields USING gist (geom);")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_plots_geom ON plots USING gist (geom);")
+
+    for table in ("fields", "plots"):
+        op.execute(f"""
+            DROP TRIGGER IF EXISTS trg_{table}_notify ON {table};
+            CREATE TRIGGER trg_{table}_notify
+                AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+                FOR EACH STATEMENT EXECUTE FUNCTION notify_table_change();
+        """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS plots;")
+    op.execute("DROP TABLE IF EXISTS fields;")
@@ -0,0 +1,31 @@
+"""table change notifications for soil_decadal_external
+
+Revision ID: b5c6d7e8f9a0
+Revises: a4b5c6d7e8f9
+Create Date: 2026-10-17 16:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5c6d7e8f9a0'
+down_revision: Union[str, None] = 'a4b5c6d7e8f9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Statement trigger on the partitioned parent: fires once per load, with the parent's name,
+    # which is what backend.services.comparison listens for.
+    op.execute("""
+        DROP TRIGGER IF EXISTS trg_soil_decadal_external_notify ON soil_decadal_external;
+        CREATE TRIGGER trg_soil_decadal_external_notify
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON soil_decadal_external
+            FOR EACH STATEMENT EXECUTE FUNCTION notify_table_change();
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_soil_decadal_external_notify ON soil_decadal_external;")
@@ -0,0 +1,60 @@
+"""table change notifications for cache invalidation
+
+Revision ID: b7c1d2e3f4a5
+Revises: 2393a05bb43b
+Create Date: 2026-10-17 10:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7c1d2e3f4a5'
+down_revision: Union[str, None] = '2393a05bb43b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Tables whose changes invalidate in-process caches (vector tiles, spatial index, ...).
+# Tables that do not exist yet get their trigger in the migration that creates them.
+NOTIFY_TABLES = ("stations", "soil_points", "sites", "soil_decadal_manual")
+
+
+def upgrade() -> None:
+    # One NOTIFY per statement (not per row), so bulk loads stay cheap
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notify_table_change() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('table_changed', TG_TABLE_NAME);
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+
+    for table in NOTIFY_TABLES:
+        op.execute(f"""
+            DO $$
+            BEGIN
+                IF to_regclass('public.{table}') IS NOT NULL THEN
+                    DROP TRIGGER IF EXISTS trg_{table}_notify ON {table};
+                    CREATE TRIGGER trg_{table}_notify
+                        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+                        FOR EACH STATEMENT EXECUTE FUNCTION notify_table_change();
+                END IF;
+            END
+            $$;
+        """)
+
+
+def downgrade() -> None:
+    for table in NOTIFY_TABLES:
+        op.execute(f"""
+            DO $$
+            BEGIN
+                IF to_regclass('public.{table}') IS NOT NULL THEN
+                    DROP TRIGGER IF EXISTS trg_{table}_notify ON {table};
+                END IF;
+            END
+            $$;
+        """)
+    op.execute("DROP FUNCTION IF EXISTS notify_table_change();")
@@ -0,0 +1,230 @@
+"""partition meteo_daily and decadal measurement tables by year
+
+Revision ID: c4d5e6f7a8b9
+Revises: b7c1d2e3f4a5
+Create Date: 2026-10-17 11:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d5e6f7a8b9'
+down_revision: Union[str, None] = 'b7c1d2e3f4a5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Years pre-created up front; other years get partitions on load (see backend.db.partitions)
+FIRST_YEAR = 2000
+LAST_YEAR = 2030
+
+# The partition key has to be part of every unique constraint, so the surrogate
+# ids become (rec_id, <key>) and the natural unique keys already contain it.
+TABLES = {
+    "meteo_daily": {
+        "key": "date",
+        "year_expr": "extract(year FROM date)::int",
+        "columns": """
+            meteo_id bigserial NOT NULL,
+            station_id uuid NOT NULL REFERENCES stations(station_id) ON DELETE CASCADE,
+            date date NOT NULL,
+            air_temp_avg_c double precision,
+            air_temp_max_c double precision,
+            air_temp_min_c double precision,
+            rel_humidity double precision,
+            precipitation_mm double precision,
+            source source_type NOT NULL DEFAULT 'kazhydromet',
+            PRIMARY KEY (meteo_id, date),
+            CONSTRAINT uq_meteo_daily UNIQUE (station_id, date)
+        """,
+        "indexes": {
+            "idx_meteo_daily_station_date": "(station_id, date)",
+            "idx_meteo_daily_source": "(source)",
+            "idx_meteo_daily_date": "(date)",
+        },
+        "heap_pk": "meteo_id",
+    },
+    "soil_decadal_external": {
+        "key": "year",
+        "year_expr": "year",
+        "columns": """
+            rec_id bigserial NOT NULL,
+            soil_point_id uuid NOT NULL REFERENCES soil_points(soil_point_id) ON DELETE CASCADE,
+            year integer NOT NULL,
+            month integer NOT NULL,
+            decade integer NOT NULL,
+            depth depth_code NOT NULL,
+            variable variable_code NOT NULL DEFAULT 'soil_moisture',
+            value double precision NOT NULL,
+            units text,
+            source source_type NOT NULL,
+            PRIMARY KEY (rec_id, year),
+            CONSTRAINT uq_soil_decadal_external
+                UNIQUE (soil_point_id, year, month, decade, depth, variable, source)
+        """,
+        "indexes": {
+            "idx_soil_decadal_external_point": "(soil_point_id)",
+            "idx_soil_decadal_external_ymd": "(year, month, decade)",
+            "idx_soil_decadal_external_src": "(source)",
+        },
+        "heap_pk": "rec_id",
+    },
+    "site_measurements_decadal": {
+        "key": "year",
+        "year_expr": "year",
+        "columns": """
+            rec_id bigserial NOT NULL,
+            site_id uuid NOT NULL REFERENCES sites(site_id) ON DELETE CASCADE,
+            soil_point_id uuid REFERENCES soil_points(soil_point_id) ON DELETE SET NULL,
+            year integer NOT NULL,
+            month integer NOT NULL,
+            decade integer NOT NULL,
+            depth depth_code NOT NULL,
+            value_mm double precision NOT NULL,
+            source source_type NOT NULL DEFAULT 'uni',
+            PRIMARY KEY (rec_id, year),
+            CONSTRAINT uq_site_measurements_decadal
+                UNIQUE (site_id, soil_point_id, year, month, decade, depth)
+        """,
+        "indexes": {
+            "idx_site_meas_dec_site": "(site_id)",
+            "idx_site_meas_dec_ymd": "(year, month, decade)",
+        },
+        "heap_pk": "rec_id",
+    },
+}
+
+
+def _ensure_enum(name: str, values: Sequence[str]) -> None:
+    labels = ", ".join(f"'{v}'" for v in values)
+    op.execute(f"""
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = '{name}') THEN
+                CREATE TYPE {name} AS ENUM ({labels});
+            END IF;
+        END
+        $$;
+    """)
+
+
+def upgrade() -> None:
+    _ensure_enum("depth_code", ("0-20", "0-50", "0-100"))
+    _ensure_enum("variable_code", (
+        "soil_moisture", "air_temp", "air_temp_max", "air_temp_min", "relative_humidity", "precipitation",
+    ))
+
+    # Creates missing yearly partitions of a RANGE-partitioned table (key: date or integer year).
+    # Safe to call concurrently and repeatedly; returns the number of partitions created.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION ensure_yearly_partitions(parent text, first_year int, last_year int)
+        RETURNS int AS $$
+        DECLARE
+            key_type regtype;
+            y int;
+            part text;
+            lo text;
+            hi text;
+            created int := 0;
+        BEGIN
+            SELECT a.atttypid::regtype INTO key_type
+            FROM pg_partitioned_table p
+            JOIN pg_attribute a ON a.attrelid = p.partrelid AND a.attnum = p.partattrs[0]
+            WHERE p.partrelid = parent::regclass;
+            IF key_type IS NULL THEN
+                RAISE EXCEPTION '% is not a partitioned table', parent;
+            END IF;
+
+            FOR y IN first_year..last_year LOOP
+                part := format('%s_y%s', parent, y);
+                CONTINUE WHEN to_regclass(part) IS NOT NULL;
+                IF key_type = 'date'::regtype THEN
+                    lo := quote_literal(make_date(y, 1, 1));
+                    hi := quote_literal(make_date(y + 1, 1, 1));
+                ELSE
+                    lo := y::text;
+                    hi := (y + 1)::text;
+                END IF;
+                BEGIN
+                    EXECUTE format('CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%s) TO (%s)',
+                                   part, parent, lo, hi);
+                    created := created + 1;
+                EXCEPTION WHEN duplicate_table THEN
+                    NULL;  -- created concurrently
+                END;
+            END LOOP;
+            RETURN created;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+
+    for table, spec in TABLES.items():
+        old = f"{table}_unpartitioned"
+        op.execute(f"""
+            DO $$
+            BEGIN
+                IF to_regclass('public.{table}') IS NOT NULL THEN
+                    ALTER TABLE {table} RENAME TO {old};
+                    ALTER INDEX IF EXISTS {table}_pkey RENAME TO {old}_pkey;
+                    ALTER TABLE {old} DROP CONSTRAINT IF EXISTS {_unique_name(table)};
+                    {"".join(f"DROP INDEX IF EXISTS {ix}; " for ix in spec["indexes"])}
+                END IF;
+            END
+            $$;
+        """)
+        op.execute(f"CREATE TABLE {table} ({spec['columns']}) PARTITION BY RANGE ({spec['key']});")
+        for name, cols in spec["indexes"].items():
+            op.execute(f"CREATE INDEX {name} ON {table} {cols};")
+
+        # Partitions: the configured span plus whatever years the existing data covers
+        op.execute(f"SELECT ensure_yearly_partitions('{table}', {FIRST_YEAR}, {LAST_YEAR});")
+        op.execute(f"""
+            DO $$
+            DECLARE lo int; hi int;
+            BEGIN
+                IF to_regclass('public.{old}') IS NOT NULL THEN
+                    EXECUTE 'SELECT min({spec["year_expr"]}), max({spec["year_expr"]}) FROM {old}' INTO lo, hi;
+                    IF lo IS NOT NULL THEN
+                        PERFORM ensure_yearly_partitions('{table}', lo, hi);
+                    END IF;
+                    INSERT INTO {table} SELECT * FROM {old};
+                    PERFORM setval(pg_get_serial_sequence('{table}', '{spec["heap_pk"]}'),
+                                   greatest((SELECT max({spec["heap_pk"]}) FROM {old}), 1));
+                    DROP TABLE {old};
+                END IF;
+            END
+            $$;
+        """)
+
+
+def downgrade() -> None:
+    for table, spec in TABLES.items():
+        part = f"{table}_partitioned"
+        op.execute(f"ALTER TABLE {table} RENAME TO {part};")
+        op.execute(f"ALTER INDEX IF EXISTS {table}_pkey RENAME TO {part}_pkey;")
+        op.execute(f"ALTER TABLE {part} DROP CONSTRAINT {_unique_name(table)};")
+        for name in spec["indexes"]:
+            op.execute(f"DROP INDEX IF EXISTS {name};")
+        heap_columns = (
+            spec["columns"]
+            .replace(f"PRIMARY KEY ({spec['heap_pk']}, {spec['key']})", f"PRIMARY KEY ({spec['heap_pk']})")
+        )
+        op.execute(f"CREATE TABLE {table} ({heap_columns});")
+        for name, cols in spec["indexes"].items():
+            op.execute(f"CREATE INDEX {name} ON {table} {cols};")
+        op.execute(f"INSERT INTO {table} SELECT * FROM {part};")
+        op.execute(
+            f"SELECT setval(pg_get_serial_sequence('{table}', '{spec['heap_pk']}'), "
+            f"greatest((SELECT max({spec['heap_pk']}) FROM {table}), 1));"
+        )
+        op.execute(f"DROP TABLE {part} CASCADE;")
+    op.execute("DROP FUNCTION IF EXISTS ensure_yearly_partitions(text, int, int);")
+
+
+def _unique_name(table: str) -> str:
+    return {
+        "meteo_daily": "uq_meteo_daily",
+        "soil_decadal_external": "uq_soil_decadal_external",
+        "site_measurements_decadal": "uq_site_measurements_decadal",
+    }[table]
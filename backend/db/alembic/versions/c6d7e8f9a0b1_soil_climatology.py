@@ -0,0 +1,95 @@
+"""per-point decadal soil moisture climatology
+
+Revision ID: c6d7e8f9a0b1
+Revises: b5c6d7e8f9a0
+Create Date: 2026-10-17 17:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6d7e8f9a0b1'
+down_revision: Union[str, None] = 'b5c6d7e8f9a0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # No earlier revision creates soil_decadal_manual (databases that have it got it from the
+    # ORM metadata); create it here so a fresh `upgrade head` works, with the notify trigger
+    # b7c1d2e3f4a5 skipped for a missing table
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS soil_decadal_manual (
+            rec_id bigserial PRIMARY KEY,
+            soil_point_id uuid NOT NULL REFERENCES soil_points(soil_point_id) ON DELETE CASCADE,
+            year integer NOT NULL,
+            month integer NOT NULL,
+            decade integer NOT NULL,
+            depth depth_code NOT NULL,
+            value_mm double precision NOT NULL,
+            value_frac double precision,
+            quality_flag text,
+            source source_type NOT NULL DEFAULT 'kazhydromet',
+            CONSTRAINT uq_soil_decadal_manual UNIQUE (soil_point_id, year, month, decade, depth)
+        );
+    """)
+    op.execute("ALTER TABLE soil_decadal_manual ADD COLUMN IF NOT EXISTS quality_flag text;")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_soil_decadal_manual_point ON soil_decadal_manual (soil_point_id);")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_soil_decadal_manual_ymd ON soil_decadal_manual (year, month, decade);")
+    op.execute("""
+        DROP TRIGGER IF EXISTS trg_soil_decadal_manual_notify ON soil_decadal_manual;
+        CREATE TRIGGER trg_soil_decadal_manual_notify
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON soil_decadal_manual
+            FOR EACH STATEMENT EXECUTE FUNCTION notify_table_change();
+    """)
+
+    # Maintained by backend.services.climatology (Welford / Chan running mean and variance);
+    # decade_of_year = (month - 1) * 3 + decade, 1..36
+    op.execute("""
+        CREATE TABLE soil_climatology (
+            soil_point_id uuid NOT NULL REFERENCES soil_points(soil_point_id) ON DELETE CASCADE,
+            depth depth_code NOT NULL,
+            source source_type NOT NULL,
+            decade_of_year integer NOT NULL CHECK (decade_of_year BETWEEN 1 AND 36),
+            n integer NOT NULL,
+            mean double precision NOT NULL,
+            m2 double precision NOT NULL,
+            first_year integer NOT NULL,
+            last_year integer NOT NULL,
+            updated_at timestamptz NOT NULL DEFAULT now(),
+            CONSTRAINT uq_soil_climatology PRIMARY KEY (soil_point_id, depth, source, decade_of_year)
+        );
+    """)
+
+    # (point, depth, source, year, decade-of-year) values written since the last refresh
+    op.execute("""
+        CREATE TABLE soil_climatology_dirty (
+            soil_point_id uuid NOT NULL REFERENCES soil_points(soil_point_id) ON DELETE CASCADE,
+            depth depth_code NOT NULL,
+            source source_type NOT NULL,
+            year integer NOT NULL,
+            decade_of_year integer NOT NULL,
+            PRIMARY KEY (soil_point_id, depth, source, decade_of_year, year)
+        );
+    """)
+    # Backfill from whatever decadal data is already loaded
+    op.execute("""
+        INSERT INTO soil_climatology_dirty (soil_point_id, depth, source, year, decade_of_year)
+        SELECT DISTINCT soil_point_id, depth, source, year, (month - 1) * 3 + decade
+        FROM soil_decadal_manual
+        ON CONFLICT DO NOTHING;
+    """)
+    op.execute("""
+        INSERT INTO soil_climatology_dirty (soil_point_id, depth, source, year, decade_of_year)
+        SELECT DISTINCT soil_point_id, depth, source, year, (month - 1) * 3 + decade
+        FROM soil_decadal_external WHERE variable = 'soil_moisture'
+        ON CONFLICT DO NOTHING;
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS soil_climatology_dirty;")
+    op.execute("DROP TABLE IF EXISTS soil_climatology;")
+    # soil_decadal_manual is kept: it may predate this revision and holds measurements
@@ -0,0 +1,43 @@
+"""htc_annual and the queue of station-years awaiting HTC recomputation
+
+Revision ID: d1e2f3a4b5c6
+Revises: c4d5e6f7a8b9
+Create Date: 2026-10-17 12:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'd1e2f3a4b5c6'
+down_revision: Union[str, None] = 'c4d5e6f7a8b9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS htc_annual (
+            rec_id bigserial PRIMARY KEY,
+            station_id uuid NOT NULL REFERENCES stations(station_id) ON DELETE CASCADE,
+            year integer NOT NULL,
+            htc_value double precision NOT NULL,
+            method text NOT NULL DEFAULT 'Selianinov',
+            period_note text,
+            CONSTRAINT uq_htc_annual_expr UNIQUE (station_id, year, method, period_note)
+        );
+    """)
+
+    # Filled by meteo_daily ingestion, drained by backend.services.htc
+    op.execute("""
+        CREATE TABLE htc_dirty (
+            station_id uuid NOT NULL REFERENCES stations(station_id) ON DELETE CASCADE,
+            year integer NOT NULL,
+            PRIMARY KEY (station_id, year)
+        );
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS htc_dirty;")
@@ -0,0 +1,52 @@
+"""background job queue
+
+Revision ID: d7e8f9a0b1c2
+Revises: c6d7e8f9a0b1
+Create Date: 2026-10-17 19:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7e8f9a0b1c2'
+down_revision: Union[str, None] = 'c6d7e8f9a0b1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Written by backend.jobs: the API inserts 'pending' rows, runners claim them
+    # (FOR UPDATE SKIP LOCKED), worker processes/threads report progress and the result
+    op.execute("""
+        CREATE TABLE jobs (
+            job_id uuid PRIMARY KEY,
+            kind text NOT NULL,
+            params jsonb NOT NULL DEFAULT '{}'::jsonb,
+            dedupe_key text NOT NULL,
+            pool text NOT NULL CHECK (pool IN ('process', 'thread')),
+            status text NOT NULL DEFAULT 'pending'
+                CHECK (status IN ('pending', 'running', 'succeeded', 'failed', 'cancelled')),
+            progress double precision NOT NULL DEFAULT 0,
+            message text,
+            result jsonb,
+            error text,
+            cancel_requested boolean NOT NULL DEFAULT false,
+            attempts integer NOT NULL DEFAULT 0,
+            worker text,
+            created_at timestamptz NOT NULL DEFAULT now(),
+            started_at timestamptz,
+            heartbeat_at timestamptz,
+            finished_at timestamptz
+        );
+    """)
+    # At most one pending job per (kind, params): identical submissions return the queued one
+    op.execute("CREATE UNIQUE INDEX uq_jobs_pending_dedupe ON jobs (dedupe_key) WHERE status = 'pending';")
+    op.execute("CREATE INDEX idx_jobs_pending ON jobs (pool, created_at) WHERE status = 'pending';")
+    op.execute("CREATE INDEX idx_jobs_running ON jobs (worker) WHERE status = 'running';")
+    op.execute("CREATE INDEX idx_jobs_created ON jobs (created_at DESC);")
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS jobs;")
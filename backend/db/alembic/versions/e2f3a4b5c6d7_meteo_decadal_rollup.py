@@ -0,0 +1,59 @@
+"""decadal rollup of meteo_daily aligned with the soil decadal tables
+
+Revision ID: e2f3a4b5c6d7
+Revises: d1e2f3a4b5c6
+Create Date: 2026-10-17 13:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2f3a4b5c6d7'
+down_revision: Union[str, None] = 'd1e2f3a4b5c6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE meteo_decadal (
+            station_id uuid NOT NULL REFERENCES stations(station_id) ON DELETE CASCADE,
+            year integer NOT NULL,
+            month integer NOT NULL,
+            decade integer NOT NULL,
+            precipitation_sum_mm double precision,
+            air_temp_avg_c double precision,
+            air_temp_max_c double precision,
+            air_temp_min_c double precision,
+            rel_humidity_avg double precision,
+            days_count integer NOT NULL,
+            CONSTRAINT uq_meteo_decadal PRIMARY KEY (station_id, year, month, decade)
+        );
+    """)
+    op.create_index('idx_meteo_decadal_ymd', 'meteo_decadal', ['year', 'month', 'decade'], unique=False)
+
+    # Decades touched by ingestion since the last refresh (see backend.services.meteo_decadal)
+    op.execute("""
+        CREATE TABLE meteo_decadal_dirty (
+            station_id uuid NOT NULL REFERENCES stations(station_id) ON DELETE CASCADE,
+            year integer NOT NULL,
+            month integer NOT NULL,
+            decade integer NOT NULL,
+            PRIMARY KEY (station_id, year, month, decade)
+        );
+    """)
+    # Backfill from whatever daily data is already loaded
+    op.execute("""
+        INSERT INTO meteo_decadal_dirty (station_id, year, month, decade)
+        SELECT DISTINCT station_id, extract(year FROM date)::int, extract(month FROM date)::int,
+               least((extract(day FROM date)::int - 1) / 10 + 1, 3)
+        FROM meteo_daily;
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS meteo_decadal_dirty;")
+    op.drop_index('idx_meteo_decadal_ymd', table_name='meteo_decadal')
+    op.execute("DROP TABLE IF EXISTS meteo_decadal;")
@@ -0,0 +1,34 @@
+"""site_points association table
+
+Revision ID: f3a4b5c6d7e8
+Revises: e2f3a4b5c6d7
+Create Date: 2026-10-17 14:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a4b5c6d7e8'
+down_revision: Union[str, None] = 'e2f3a4b5c6d7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Maintained by backend.services.site_points (ST_Contains join of sites.bounds and soil_points.geom)
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS site_points (
+            site_id uuid NOT NULL REFERENCES sites(site_id) ON DELETE CASCADE,
+            soil_point_id uuid NOT NULL REFERENCES soil_points(soil_point_id) ON DELETE CASCADE,
+            PRIMARY KEY (site_id, soil_point_id)
+        );
+    """)
+    # Point-scoped rebuilds and ON DELETE CASCADE from soil_points look rows up by point
+    op.execute("CREATE INDEX IF NOT EXISTS idx_site_points_point ON site_points (soil_point_id);")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_site_points_point;")
+    op.execute("DROP TABLE IF EXISTS site_points;")
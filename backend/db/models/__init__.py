@@ -2,13 +2,13 @@
 from .base import Base
 from .tables import (
     Station, SoilPoint, Site, SitePoint,
-    MeteoDaily, SoilDecadalManual, SoilDecadalExternal,
-    SiteMeasurementsDecadal, HTCAnnual
+    MeteoDaily, MeteoDecadal, SoilDecadalManual, SoilDecadalExternal, SoilClimatology,
+    SiteMeasurementsDecadal, HTCAnnual, Field, Plot, Job
 )
 
 __all__ = [
     "Base",
     "Station", "SoilPoint", "Site", "SitePoint",
-    "MeteoDaily", "SoilDecadalManual", "SoilDecadalExternal",
-    "SiteMeasurementsDecadal", "HTCAnnual",
+    "MeteoDaily", "MeteoDecadal", "SoilDecadalManual", "SoilDecadalExternal", "SoilClimatology",
+    "SiteMeasurementsDecadal", "HTCAnnual", "Field", "Plot", "Job",
 ]
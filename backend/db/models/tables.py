@@ -2,10 +2,10 @@
 from __future__ import annotations
 import uuid, datetime
 from sqlalchemy import (
-    Column, Text, Float, Integer, BigInteger, Date,
+    Column, Text, Float, Integer, BigInteger, Boolean, Date, DateTime,
     ForeignKey, UniqueConstraint, Index, Enum as SAEnum
 )
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from geoalchemy2 import Geometry
 
@@ -80,7 +80,8 @@ class MeteoDaily(Base):
     __tablename__ = "meteo_daily"
     meteo_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     station_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("stations.station_id", ondelete="CASCADE"), nullable=False)
-    date: Mapped[datetime.date] = mapped_column("date", Date, nullable=False)
+    # partition key (RANGE by year), hence part of the primary key
+    date: Mapped[datetime.date] = mapped_column("date", Date, primary_key=True, nullable=False)
     air_temp_avg_c: Mapped[float | None] = mapped_column(Float)
     air_temp_max_c: Mapped[float | None] = mapped_column(Float)
     air_temp_min_c: Mapped[float | None] = mapped_column(Float)
@@ -95,6 +96,26 @@ class MeteoDaily(Base):
         Index("idx_meteo_daily_station_date", "station_id", "date"),
         Index("idx_meteo_daily_source", "source"),
         Index("idx_meteo_daily_date", "date"),
+        {"postgresql_partition_by": "RANGE (date)"},
+    )
+
+
+class MeteoDecadal(Base):
+    """Decadal rollup of meteo_daily (refreshed incrementally by backend.services.meteo_decadal)."""
+    __tablename__ = "meteo_decadal"
+    station_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("stations.station_id", ondelete="CASCADE"), primary_key=True)
+    year: Mapped[int] = mapped_column(Integer, primary_key=True)
+    month: Mapped[int] = mapped_column(Integer, primary_key=True)
+    decade: Mapped[int] = mapped_column(Integer, primary_key=True)
+    precipitation_sum_mm: Mapped[float | None] = mapped_column(Float)
+    air_temp_avg_c: Mapped[float | None] = mapped_column(Float)
+    air_temp_max_c: Mapped[float | None] = mapped_column(Float)
+    air_temp_min_c: Mapped[float | None] = mapped_column(Float)
+    rel_humidity_avg: Mapped[float | None] = mapped_column(Float)
+    days_count: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("idx_meteo_decadal_ymd", "year", "month", "decade"),
     )
 
 
@@ -120,11 +141,26 @@ class SoilDecadalManual(Base):
     )
 
 
+class SoilClimatology(Base):
+    """Long-term mean/variance per point, depth, source and decade of year (backend.services.climatology)."""
+    __tablename__ = "soil_climatology"
+    soil_point_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("soil_points.soil_point_id", ondelete="CASCADE"), primary_key=True)
+    depth = mapped_column(DepthCode, primary_key=True)
+    source = mapped_column(SourceType, primary_key=True)
+    decade_of_year: Mapped[int] = mapped_column(Integer, primary_key=True)  # (month - 1) * 3 + decade
+    n: Mapped[int] = mapped_column(Integer, nullable=False)
+    mean: Mapped[float] = mapped_column(Float, nullable=False)
+    m2: Mapped[float] = mapped_column(Float, nullable=False)  # sum of squared deviations
+    first_year: Mapped[int] = mapped_column(Integer, nullable=False)
+    last_year: Mapped[int] = mapped_column(Integer, nullable=False)
+    updated_at: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+
 class SoilDecadalExternal(Base):
     __tablename__ = "soil_decadal_external"
     rec_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     soil_point_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("soil_points.soil_point_id", ondelete="CASCADE"), nullable=False)
-    year: Mapped[int] = mapped_column(Integer, nullable=False)
+    year: Mapped[int] = mapped_column(Integer, primary_key=True, nullable=False)  # partition key
     month: Mapped[int] = mapped_column(Integer, nullable=False)
     decade: Mapped[int] = mapped_column(Integer, nullable=False)
     depth = mapped_column(DepthCode, nullable=False)
@@ -138,6 +174,7 @@ class SoilDecadalExternal(Base):
         Index("idx_soil_decadal_external_point", "soil_point_id"),
         Index("idx_soil_decadal_external_ymd", "year", "month", "decade"),
         Index("idx_soil_decadal_external_src", "source"),
+        {"postgresql_partition_by": "RANGE (year)"},
     )
 
 
@@ -146,7 +183,7 @@ class SiteMeasurementsDecadal(Base):
     rec_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     site_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("sites.site_id", ondelete="CASCADE"), nullable=False)
     soil_point_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), ForeignKey("soil_points.soil_point_id", ondelete="SET NULL"))
-    year: Mapped[int] = mapped_column(Integer, nullable=False)
+    year: Mapped[int] = mapped_column(Integer, primary_key=True, nullable=False)  # partition key
     month: Mapped[int] = mapped_column(Integer, nullable=False)
     decade: Mapped[int] = mapped_column(Integer, nullable=False)
     depth = mapped_column(DepthCode, nullable=False)
@@ -157,6 +194,7 @@ class SiteMeasurementsDecadal(Base):
         UniqueConstraint("site_id", "soil_point_id", "year", "month", "decade", "depth", name="uq_site_measurements_decadal"),
         Index("idx_site_meas_dec_site", "site_id"),
         Index("idx_site_meas_dec_ymd", "year", "month", "decade"),
+        {"postgresql_partition_by": "RANGE (year)"},
     )
 
 
@@ -172,3 +210,62 @@ class HTCAnnual(Base):
     __table_args__ = (
         UniqueConstraint("station_id", "year", "method", "period_note", name="uq_htc_annual_expr"),
     )
+
+
+class Field(Base):
+    """Local mirror of an upstream (VKU) field, synced by backend.services.field_mirror."""
+    __tablename__ = "fields"
+    field_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    name: Mapped[str | None] = mapped_column(Text)
+    date_created: Mapped[datetime.datetime | None] = mapped_column(DateTime(timezone=True))
+    latitude_center: Mapped[float | None] = mapped_column(Float)
+    longitude_center: Mapped[float | None] = mapped_column(Float)
+    altitude_center: Mapped[float | None] = mapped_column(Float)
+    file_path: Mapped[str | None] = mapped_column(Text)
+    user_id: Mapped[int | None] = mapped_column(Integer)
+    plot_count: Mapped[int | None] = mapped_column(Integer)
+    list_hash: Mapped[str] = mapped_column(Text, nullable=False)
+    payload_hash: Mapped[str | None] = mapped_column(Text)
+    geom = mapped_column(Geometry(geometry_type='MULTIPOLYGON', srid=4326))
+    listed_at: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    geometry_synced_at: Mapped[datetime.datetime | None] = mapped_column(DateTime(timezone=True))
+
+    plots: Mapped[list["Plot"]] = relationship("Plot", back_populates="field", cascade="all, delete-orphan")
+
+Index("idx_fields_geom", Field.__table__.c.geom, postgresql_using="gist")
+
+
+class Plot(Base):
+    """One feature of the upstream field collection, in upstream order."""
+    __tablename__ = "plots"
+    field_id: Mapped[int] = mapped_column(Integer, ForeignKey("fields.field_id", ondelete="CASCADE"), primary_key=True)
+    position: Mapped[int] = mapped_column(Integer, primary_key=True)
+    feature_id: Mapped[str | None] = mapped_column(Text)
+    properties = mapped_column(JSONB, nullable=False, default=dict)
+    geom = mapped_column(Geometry(geometry_type='GEOMETRY', srid=4326), nullable=False)
+
+    field: Mapped["Field"] = relationship("Field", back_populates="plots")
+
+Index("idx_plots_geom", Plot.__table__.c.geom, postgresql_using="gist")
+
+
+class Job(Base):
+    """Background job (backend.jobs): queued by the API, run by a process or thread pool."""
+    __tablename__ = "jobs"
+    job_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    kind: Mapped[str] = mapped_column(Text, nullable=False)
+    params = mapped_column(JSONB, nullable=False, default=dict)
+    dedupe_key: Mapped[str] = mapped_column(Text, nullable=False)  # unique among pending jobs
+    pool: Mapped[str] = mapped_column(Text, nullable=False)  # process / thread
+    status: Mapped[str] = mapped_column(Text, nullable=False, default="pending")
+    progress: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    message: Mapped[str | None] = mapped_column(Text)
+    result = mapped_column(JSONB)
+    error: Mapped[str | None] = mapped_column(Text)
+    cancel_requested: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    worker: Mapped[str | None] = mapped_column(Text)
+    created_at: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    started_at: Mapped[datetime.datetime | None] = mapped_column(DateTime(timezone=True))
+    heartbeat_at: Mapped[datetime.datetime | None] = mapped_column(DateTime(timezone=True))
+    finished_at: Mapped[datetime.datetime | None] = mapped_column(DateTime(timezone=True))
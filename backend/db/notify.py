@@ -0,0 +1,87 @@
+# backend/db/notify.py
+"""Table-change notifications.
+
+Statement-level triggers (see migration `b7c1d2e3f4a5`) run
+`pg_notify('table_changed', <table name>)` after every write. `TableChangeHub`
+LISTENs on that channel and calls the callbacks subscribed to each table, so
+in-process caches can be dropped no matter which worker or job wrote the rows.
+"""
+from __future__ import annotations
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Callable, Dict, List
+
+import asyncpg
+
+CHANNEL = "table_changed"
+
+log = logging.getLogger(__name__)
+
+TableCallback = Callable[[str], None]
+
+
+class TableChangeHub:
+    def __init__(self, dsn: str, *, reconnect_delay: float = 5.0):
+        self.dsn = dsn
+        self.reconnect_delay = reconnect_delay
+        self._subscribers: Dict[str, List[TableCallback]] = defaultdict(list)
+        self._conn: asyncpg.Connection | None = None
+        self._reconnect: asyncio.Task | None = None
+        self._closed = False
+
+    def subscribe(self, tables: str | tuple[str, ...], callback: TableCallback) -> None:
+        for table in (tables,) if isinstance(tables, str) else tables:
+            self._subscribers[table].append(callback)
+
+    def publish(self, table: str) -> None:
+        for callback in list(self._subscribers.get(table, ())):
+            try:
+                callback(table)
+            except Exception:
+                log.exception("table-change callback failed for %s", table)
+
+    async def start(self) -> None:
+        self._closed = False
+        try:
+            await self._connect()
+        except (OSError, asyncpg.PostgresError):
+            log.warning("LISTEN %s unavailable, retrying in background", CHANNEL, exc_info=True)
+            self._schedule_reconnect()
+
+    async def stop(self) -> None:
+        self._closed = True
+        if self._reconnect is not None:
+            self._reconnect.cancel()
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            await conn.close()
+
+    async def _connect(self) -> None:
+        conn = await asyncpg.connect(self.dsn)
+        await conn.add_listener(CHANNEL, self._on_notify)
+        conn.add_termination_listener(self._on_terminate)
+        self._conn = conn
+
+    def _on_notify(self, conn, pid, channel, payload: str) -> None:
+        self.publish(payload)
+
+    def _on_terminate(self, conn) -> None:
+        self._conn = None
+        if not self._closed:
+            # Notifications may have been missed while disconnected: treat everything as changed.
+            for table in list(self._subscribers):
+                self.publish(table)
+            self._schedule_reconnect()
+
+    def _schedule_reconnect(self) -> None:
+        if self._reconnect is None or self._reconnect.done():
+            self._reconnect = asyncio.get_running_loop().create_task(self._reconnect_loop())
+
+    async def _reconnect_loop(self) -> None:
+        while not self._closed and self._conn is None:
+            await asyncio.sleep(self.reconnect_delay)
+            try:
+                await self._connect()
+            except (OSError, asyncpg.PostgresError):
+                log.debug("LISTEN reconnect failed", exc_info=True)
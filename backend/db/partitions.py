@@ -0,0 +1,116 @@
+# backend/db/partitions.py
+"""Yearly RANGE partitions of the measurement tables (see migration `c4d5e6f7a8b9`).
+
+    python -m backend.db.partitions ensure --ahead 2
+    python -m backend.db.partitions check meteo_daily 2020-01-01 2020-12-31
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import datetime as dt
+import json
+import logging
+from typing import Any, Dict, Iterable, List
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+log = logging.getLogger(__name__)
+
+# table -> partition key column (`date` is a DATE, `year` an INTEGER)
+PARTITIONED_TABLES: Dict[str, str] = {
+    "meteo_daily": "date",
+    "soil_decadal_external": "year",
+    "site_measurements_decadal": "year",
+}
+
+
+async def ensure_partitions(conn: AsyncConnection, table: str, first_year: int, last_year: int) -> int:
+    result = await conn.execute(
+        text("SELECT ensure_yearly_partitions(:table, :first, :last)"),
+        {"table": table, "first": first_year, "last": last_year},
+    )
+    return int(result.scalar() or 0)
+
+
+async def ensure_future_partitions(engine: AsyncEngine, *, years_ahead: int = 1) -> Dict[str, int]:
+    """Make sure this year's and the next `years_ahead` years' partitions exist."""
+    this_year = dt.date.today().year
+    created: Dict[str, int] = {}
+    async with engine.begin() as conn:
+        for table in PARTITIONED_TABLES:
+            created[table] = await ensure_partitions(conn, table, this_year, this_year + years_ahead)
+    return created
+
+
+def _relations(plan: Dict[str, Any]) -> Iterable[str]:
+    if "Relation Name" in plan:
+        yield plan["Relation Name"]
+    for child in plan.get("Plans", ()):
+        yield from _relations(child)
+
+
+async def check_pruning(conn: AsyncConnection, table: str, date_from: dt.date, date_to: dt.date) -> Dict[str, Any]:
+    """EXPLAIN a range scan and report which partitions the planner kept."""
+    key = PARTITIONED_TABLES[table]
+    if key == "date":
+        where = f"date BETWEEN DATE '{date_from.isoformat()}' AND DATE '{date_to.isoformat()}'"
+    else:
+        where = f"year BETWEEN {int(date_from.year)} AND {int(date_to.year)}"
+    result = await conn.execute(text(f"EXPLAIN (FORMAT JSON) SELECT count(*) FROM {table} WHERE {where}"))
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    scanned: List[str] = sorted(set(_relations(plan[0]["Plan"])))
+    total = (await conn.execute(
+        text("SELECT count(*) FROM pg_inherits WHERE inhparent = CAST(:table AS regclass)"), {"table": table}
+    )).scalar()
+    expected = date_to.year - date_from.year + 1
+    return {
+        "table": table,
+        "partitions_total": total,
+        "partitions_scanned": scanned,
+        "partitions_expected_max": expected,
+        "pruned": len(scanned) <= expected,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    from .config import DatabaseSettings
+    from .session import create_engine
+
+    parser = argparse.ArgumentParser(description="Manage yearly partitions")
+    sub = parser.add_subparsers(dest="command", required=True)
+    ensure = sub.add_parser("ensure", help="create partitions for upcoming years")
+    ensure.add_argument("--ahead", type=int, default=1)
+    ensure.add_argument("--from-year", type=int, default=None, help="also backfill from this year")
+    check = sub.add_parser("check", help="verify that a range query prunes partitions")
+    check.add_argument("table", choices=sorted(PARTITIONED_TABLES))
+    check.add_argument("date_from", type=dt.date.fromisoformat)
+    check.add_argument("date_to", type=dt.date.fromisoformat)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    async def run() -> None:
+        engine = create_engine(DatabaseSettings())
+        try:
+            if args.command == "ensure":
+                if args.from_year is not None:
+                    async with engine.begin() as conn:
+                        for table in PARTITIONED_TABLES:
+                            await ensure_partitions(conn, table, args.from_year, dt.date.today().year)
+                log.info("created: %s", await ensure_future_partitions(engine, years_ahead=args.ahead))
+            else:
+                async with engine.connect() as conn:
+                    report = await check_pruning(conn, args.table, args.date_from, args.date_to)
+                log.info(json.dumps(report, indent=2))
+                if not report["pruned"]:
+                    raise SystemExit(1)
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
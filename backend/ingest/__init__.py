@@ -0,0 +1 @@
+# Makes `backend.ingest` a package (bulk loaders for measurement data).
@@ -0,0 +1,90 @@
+# backend/ingest/bulk.py
+"""COPY-into-staging + INSERT ... ON CONFLICT merge, shared by the bulk loaders."""
+from __future__ import annotations
+from typing import Iterable, Sequence, Set
+
+import asyncpg
+
+
+async def create_staging(conn: asyncpg.Connection, target: str, columns: Sequence[str], *, suffix: str = "") -> str:
+    """Session-local staging table with the target's column types and no constraints.
+
+    The table is reused for the rest of the session, so callers staging a
+    different column set for the same target pass their own `suffix`.
+    """
+    staging = f"_stg_{target}{suffix}"
+    await conn.execute(
+        f"CREATE TEMP TABLE IF NOT EXISTS {staging} AS "
+        f"SELECT {', '.join(columns)} FROM {target} WITH NO DATA"
+    )
+    return staging
+
+
+async def copy_upsert(
+    conn: asyncpg.Connection,
+    target: str,
+    columns: Sequence[str],
+    records: Iterable[tuple],
+    *,
+    conflict: str,
+    update_columns: Sequence[str],
+    after_merge: Sequence[str] = (),
+) -> int:
+    """Load `records` with binary COPY into a staging table, then merge them into `target`.
+
+    `conflict` is the constraint name used for ON CONFLICT ON CONSTRAINT.
+    `after_merge` statements run in the same transaction before the staging
+    table is emptied; `{staging}` in them is replaced by its name (used to
+    queue follow-up work for the keys just loaded).
+    Runs in one transaction; the staging table is emptied afterwards.
+    Returns the number of inserted or updated rows.
+    Records must already be unique on the conflict key (Postgres refuses to
+    update the same row twice in one statement).
+    """
+    staging = await create_staging(conn, target, columns)
+    column_list = ", ".join(columns)
+    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in update_columns)
+    action = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+    async with conn.transaction():
+        await conn.copy_records_to_table(staging, records=records, columns=list(columns))
+        status = await conn.execute(
+            f"INSERT INTO {target} ({column_list}) SELECT {column_list} FROM {staging} "
+            f"ON CONFLICT ON CONSTRAINT {conflict} {action}"
+        )
+        for statement in after_merge:
+            await conn.execute(statement.format(staging=staging))
+        await conn.execute(f"TRUNCATE {staging}")
+    return int(status.rsplit(" ", 1)[-1])
+
+
+async def copy_update(
+    conn: asyncpg.Connection,
+    target: str,
+    key: Sequence[str],
+    columns: Sequence[str],
+    records: Iterable[tuple],
+) -> int:
+    """Binary COPY `records` (key columns, then `columns`) into staging and UPDATE the matching `target` rows.
+
+    Rows whose values already match are left alone, so no-op updates do not
+    create dead tuples. Returns the number of updated rows.
+    """
+    staging = await create_staging(conn, target, (*key, *columns), suffix="_upd")
+    assignments = ", ".join(f"{c} = s.{c}" for c in columns)
+    match = " AND ".join(f"t.{c} = s.{c}" for c in key)
+    changed = " OR ".join(f"t.{c} IS DISTINCT FROM s.{c}" for c in columns)
+    async with conn.transaction():
+        await conn.copy_records_to_table(staging, records=records, columns=[*key, *columns])
+        status = await conn.execute(
+            f"UPDATE {target} t SET {assignments} FROM {staging} s WHERE {match} AND ({changed})"
+        )
+        await conn.execute(f"TRUNCATE {staging}")
+    return int(status.rsplit(" ", 1)[-1])
+
+
+async def ensure_year_partitions(conn: asyncpg.Connection, table: str, years: Iterable[int], known: Set[int]) -> None:
+    """Create yearly partitions of `table` for `years` not seen yet in this run (`known` is updated)."""
+    missing = set(years) - known
+    if missing:
+        await conn.execute("SELECT ensure_yearly_partitions($1, $2, $3)", table, min(missing), max(missing))
+        known.update(range(min(missing), max(missing) + 1))
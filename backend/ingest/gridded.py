@@ -0,0 +1,377 @@
+# backend/ingest/gridded.py
+"""Sample gridded soil moisture products (ERA5-Land, AMSR2) at every soil point.
+
+Each file is opened lazily (NetCDF through xarray, GeoTIFF through rasterio
+windowed reads) and walked in time chunks: only the bounding box of the soil
+points is read, every point is sampled at once (nearest or bilinear, NumPy
+fancy indexing) and values are accumulated per decade. Files are processed in
+a process pool; the main process merges the per-decade partial sums, mixes
+product layers into our depth codes and bulk-upserts into
+`soil_decadal_external` on `uq_soil_decadal_external`.
+
+    python -m backend.ingest.gridded --product era5_land data/era5/*.nc
+    python -m backend.ingest.gridded --product amsr2 --method nearest data/amsr2/*.tif
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import datetime as dt
+import logging
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+import asyncpg
+import numpy as np
+
+from .bulk import copy_upsert, ensure_year_partitions
+from ..services import climatology
+
+log = logging.getLogger(__name__)
+
+TABLE = "soil_decadal_external"
+CONFLICT = "uq_soil_decadal_external"
+COLUMNS = ("soil_point_id", "year", "month", "decade", "depth", "variable", "value", "units", "source")
+
+Decade = Tuple[int, int, int]
+# (layer variable, decade) -> (sum per point, count per point)
+Partials = Dict[Tuple[str, Decade], Tuple[np.ndarray, np.ndarray]]
+
+
+@dataclass(frozen=True)
+class Product:
+    source: str
+    # product layer variable -> (top, bottom) in cm
+    layers: Dict[str, Tuple[float, float]]
+    units: str
+
+
+PRODUCTS: Dict[str, Product] = {
+    # ERA5-Land volumetric soil water layers
+    "era5_land": Product(
+        source="era5_land",
+        layers={"swvl1": (0, 7), "swvl2": (7, 28), "swvl3": (28, 100)},
+        units="m3/m3",
+    ),
+    # AMSR2 retrieves the top few centimetres only; it is reported for the 0-20 layer
+    "amsr2": Product(
+        source="amsr2",
+        layers={"sm": (0, 20)},
+        units="m3/m3",
+    ),
+}
+
+DEPTHS: Dict[str, Tuple[float, float]] = {"0-20": (0, 20), "0-50": (0, 50), "0-100": (0, 100)}
+
+
+def depth_weights(product: Product) -> Dict[str, Dict[str, float]]:
+    """Thickness-weighted share of each product layer in each depth code.
+
+    Depth codes not fully covered by the product layers are skipped.
+    """
+    weights: Dict[str, Dict[str, float]] = {}
+    deepest = max(bottom for _, bottom in product.layers.values())
+    for code, (top, bottom) in DEPTHS.items():
+        if bottom > deepest:
+            continue
+        overlap = {
+            var: max(0.0, min(bottom, l_bottom) - max(top, l_top))
+            for var, (l_top, l_bottom) in product.layers.items()
+        }
+        total = sum(overlap.values())
+        weights[code] = {var: w / total for var, w in overlap.items() if w > 0}
+    return weights
+
+
+def decade_of(day: dt.date) -> Decade:
+    return day.year, day.month, min((day.day - 1) // 10 + 1, 3)
+
+
+# ---------- sampling ----------
+
+def fractional_index(coord: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Fractional grid index of `values` along a monotonic coordinate; NaN outside the grid."""
+    positions = np.arange(len(coord), dtype=np.float64)
+    if coord[0] > coord[-1]:
+        coord, positions = coord[::-1], positions[::-1]
+    frac = np.interp(values, coord, positions)
+    step = abs(coord[1] - coord[0]) / 2 if len(coord) > 1 else 0
+    outside = (values < coord[0] - step) | (values > coord[-1] + step)
+    return np.where(outside, np.nan, frac)
+
+
+@dataclass
+class Sampler:
+    """Precomputed pixel indices / weights of all points inside a grid window."""
+    iy: np.ndarray          # (corners, P) row offsets inside the window
+    ix: np.ndarray          # (corners, P) column offsets inside the window
+    w: np.ndarray           # (corners, P) weights, 0 for points outside the grid
+    window: Tuple[slice, slice]
+
+    @classmethod
+    def build(cls, fy: np.ndarray, fx: np.ndarray, shape: Tuple[int, int], method: str) -> "Sampler":
+        valid = ~(np.isnan(fy) | np.isnan(fx))
+        fy, fx = np.where(valid, fy, 0), np.where(valid, fx, 0)
+        if method == "nearest":
+            iy = np.clip(np.rint(fy), 0, shape[0] - 1).astype(np.int64)[None]
+            ix = np.clip(np.rint(fx), 0, shape[1] - 1).astype(np.int64)[None]
+            w = valid.astype(np.float64)[None]
+        else:
+            y0 = np.clip(np.floor(fy), 0, max(shape[0] - 2, 0)).astype(np.int64)
+            x0 = np.clip(np.floor(fx), 0, max(shape[1] - 2, 0)).astype(np.int64)
+            dy, dx = np.clip(fy - y0, 0, 1), np.clip(fx - x0, 0, 1)
+            y1, x1 = np.minimum(y0 + 1, shape[0] - 1), np.minimum(x0 + 1, shape[1] - 1)
+            iy = np.stack([y0, y0, y1, y1])
+            ix = np.stack([x0, x1, x0, x1])
+            w = np.stack([(1 - dy) * (1 - dx), (1 - dy) * dx, dy * (1 - dx), dy * dx]) * valid
+        # Read only the bounding box of the valid points' corners (zero-weight ones included:
+        # a point on a grid line still indexes its y1/x1 corner)
+        used = np.broadcast_to(valid, w.shape)
+        if used.any():
+            ys, xs = iy[used], ix[used]
+            window = (slice(int(ys.min()), int(ys.max()) + 1), slice(int(xs.min()), int(xs.max()) + 1))
+            # Points outside the grid (weight 0) keep an index inside the window
+            iy = np.clip(iy - window[0].start, 0, window[0].stop - window[0].start - 1)
+            ix = np.clip(ix - window[1].start, 0, window[1].stop - window[1].start - 1)
+        else:
+            window = (slice(0, 0), slice(0, 0))
+        return cls(iy=iy, ix=ix, w=w, window=window)
+
+    def sample(self, block: np.ndarray) -> np.ndarray:
+        """(T, H, W) window block -> (T, P) values; NaN pixels are left out of the interpolation."""
+        if not block.shape[1] or not block.shape[2]:  # no point inside the grid
+            return np.full((block.shape[0], self.w.shape[1]), np.nan)
+        corners = block[:, self.iy, self.ix]             # (T, corners, P)
+        weights = np.where(np.isnan(corners), 0.0, self.w[None])
+        total = weights.sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(total > 0, (np.nan_to_num(corners) * weights).sum(axis=1) / total, np.nan)
+
+
+def accumulate(partials: Partials, variable: str, days: Sequence[dt.date], values: np.ndarray) -> None:
+    """Add (T, P) samples into per-decade sums/counts."""
+    keys = [decade_of(d) for d in days]
+    for key in dict.fromkeys(keys):
+        rows = np.fromiter((k == key for k in keys), dtype=bool, count=len(keys))
+        chunk = values[rows]
+        present = ~np.isnan(chunk)
+        s, c = np.where(present, chunk, 0.0).sum(axis=0), present.sum(axis=0)
+        prev = partials.get((variable, key))
+        partials[(variable, key)] = (s, c) if prev is None else (prev[0] + s, prev[1] + c)
+
+
+def _first(names: Iterable[str], available: Iterable[str]) -> str:
+    available = list(available)
+    for name in names:
+        if name in available:
+            return name
+    raise ValueError(f"None of {list(names)} found in {available}")
+
+
+def sample_netcdf(
+    path: str, product: Product, lat: np.ndarray, lon: np.ndarray, method: str, time_chunk: int
+) -> Partials:
+    import xarray as xr  # optional dependency, only for NetCDF
+
+    partials: Partials = {}
+    with xr.open_dataset(path) as ds:  # lazy: nothing is read until .values
+        lat_name = _first(("latitude", "lat", "y"), ds.coords)
+        lon_name = _first(("longitude", "lon", "x"), ds.coords)
+        time_name = _first(("time", "valid_time"), ds.coords)
+        grid_lat, grid_lon = ds[lat_name].values, ds[lon_name].values
+        query_lon = np.where(lon < 0, lon + 360, lon) if grid_lon.max() > 180 else lon
+        sampler = Sampler.build(
+            fractional_index(grid_lat, lat), fractional_index(grid_lon, query_lon),
+            (len(grid_lat), len(grid_lon)), method,
+        )
+        days = [dt.date.fromisoformat(str(t)[:10]) for t in ds[time_name].values]
+        for variable in product.layers:
+            if variable not in ds.data_vars:
+                continue
+            da = ds[variable].transpose(time_name, lat_name, lon_name)
+            for start in range(0, len(days), time_chunk):
+                stop = min(start + time_chunk, len(days))
+                block = da.isel({
+                    time_name: slice(start, stop), lat_name: sampler.window[0], lon_name: sampler.window[1],
+                }).values.astype(np.float64)
+                accumulate(partials, variable, days[start:stop], sampler.sample(block))
+    return partials
+
+
+_DATE_IN_NAME = re.compile(r"(\d{4})[-_]?(\d{2})[-_]?(\d{2})")
+
+
+def geotiff_bands(descriptions: Sequence[str | None], product: Product) -> Dict[str, int]:
+    """Product layer variable -> 1-based band index.
+
+    Bands are matched by description (e.g. `swvl2`); an undescribed raster is
+    accepted only for a single-layer product, whose layer is then band 1.
+    """
+    bands = {d: i for i, d in enumerate(descriptions, start=1) if d in product.layers}
+    if bands:
+        return bands
+    if len(product.layers) == 1:
+        return {next(iter(product.layers)): 1}
+    raise ValueError(
+        f"{product.source} GeoTIFF needs band descriptions naming its layers ({', '.join(product.layers)})"
+    )
+
+
+def sample_geotiff(path: str, product: Product, lat: np.ndarray, lon: np.ndarray, method: str) -> Partials:
+    """Single-date GeoTIFF (date taken from the file name), bands mapped to layers by `geotiff_bands`."""
+    import rasterio  # optional dependency, only for GeoTIFF
+    from rasterio.warp import transform as warp_transform
+    from rasterio.windows import Window
+
+    match = _DATE_IN_NAME.search(os.path.basename(path))
+    if match is None:
+        raise ValueError(f"No YYYYMMDD date in file name {path!r}")
+    day = dt.date(*map(int, match.groups()))
+    partials: Partials = {}
+    with rasterio.open(path) as src:
+        bands = geotiff_bands(src.descriptions, product)
+        if src.crs is None:
+            raise ValueError(f"{path!r} has no CRS")
+        x, y = lon, lat
+        if src.crs.to_epsg() != 4326:  # EASE-Grid, UTM, ...: bring the points into the raster's CRS
+            x, y = (np.asarray(v, dtype=np.float64) for v in warp_transform("EPSG:4326", src.crs, lon, lat))
+        inverse = ~src.transform
+        fx, fy = inverse * (x, y)
+        fx, fy = np.asarray(fx) - 0.5, np.asarray(fy) - 0.5   # pixel centres
+        outside = (
+            ~np.isfinite(fx) | ~np.isfinite(fy)
+            | (fx < -0.5) | (fy < -0.5) | (fx > src.width - 0.5) | (fy > src.height - 0.5)
+        )
+        sampler = Sampler.build(
+            np.where(outside, np.nan, fy), np.where(outside, np.nan, fx), (src.height, src.width), method,
+        )
+        rows, cols = sampler.window
+        window = Window(cols.start, rows.start, cols.stop - cols.start, rows.stop - rows.start)
+        for variable, band in bands.items():
+            block = src.read(band, window=window, masked=True).astype(np.float64).filled(np.nan)
+            accumulate(partials, variable, [day], sampler.sample(block[None]))
+    return partials
+
+
+def sample_file(
+    path: str, product_name: str, lat: np.ndarray, lon: np.ndarray, method: str, time_chunk: int
+) -> Partials:
+    """Process-pool entry point."""
+    product = PRODUCTS[product_name]
+    if path.lower().endswith((".tif", ".tiff")):
+        return sample_geotiff(path, product, lat, lon, method)
+    return sample_netcdf(path, product, lat, lon, method, time_chunk)
+
+
+# ---------- merge + write ----------
+
+def merge(into: Partials, other: Partials) -> None:
+    for key, (s, c) in other.items():
+        prev = into.get(key)
+        into[key] = (s, c) if prev is None else (prev[0] + s, prev[1] + c)
+
+
+def to_records(partials: Partials, product: Product, point_ids: Sequence[object]) -> Iterator[tuple]:
+    """Per-decade layer means mixed into depth codes (all layers of a depth must be present)."""
+    weights = depth_weights(product)
+    decades = sorted({decade for _, decade in partials})
+    for decade in decades:
+        means: Dict[str, np.ndarray] = {}
+        for variable in product.layers:
+            sc = partials.get((variable, decade))
+            if sc is not None:
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    means[variable] = np.where(sc[1] > 0, sc[0] / np.maximum(sc[1], 1), np.nan)
+        for depth, mix in weights.items():
+            if not all(v in means for v in mix):
+                continue
+            value = sum(means[v] * w for v, w in mix.items())
+            for i in np.flatnonzero(~np.isnan(value)):
+                yield (point_ids[i], *decade, depth, "soil_moisture", float(value[i]), product.units, product.source)
+
+
+async def ingest_files(
+    dsn: str,
+    paths: Sequence[str],
+    product_name: str,
+    *,
+    method: str = "bilinear",
+    workers: int | None = None,
+    time_chunk: int = 32,
+    batch_size: int = 100_000,
+) -> Dict[str, object]:
+    started = time.perf_counter()
+    product = PRODUCTS[product_name]
+    conn = await asyncpg.connect(dsn)
+    try:
+        points = await conn.fetch("SELECT soil_point_id, lat, lon FROM soil_points ORDER BY soil_point_id")
+        point_ids = [p["soil_point_id"] for p in points]
+        lat = np.fromiter((p["lat"] for p in points), dtype=np.float64, count=len(points))
+        lon = np.fromiter((p["lon"] for p in points), dtype=np.float64, count=len(points))
+
+        partials: Partials = {}
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            futures = [
+                loop.run_in_executor(pool, sample_file, path, product_name, lat, lon, method, time_chunk)
+                for path in paths
+            ]
+            for done in asyncio.as_completed(futures):
+                merge(partials, await done)
+
+        written, batch, years = 0, [], set()
+        for record in to_records(partials, product, point_ids):
+            batch.append(record)
+            if len(batch) >= batch_size:
+                written += await _write(conn, batch, years)
+                batch = []
+        if batch:
+            written += await _write(conn, batch, years)
+    finally:
+        await conn.close()
+    elapsed = time.perf_counter() - started
+    return {
+        "files": len(paths), "points": len(point_ids), "rows_written": written,
+        "elapsed_s": round(elapsed, 3), "rows_per_sec": round(written / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+async def _write(conn: asyncpg.Connection, records: List[tuple], years: set[int]) -> int:
+    await ensure_year_partitions(conn, TABLE, {r[1] for r in records}, years)
+    return await copy_upsert(
+        conn, TABLE, COLUMNS, records, conflict=CONFLICT, update_columns=("value", "units"),
+        after_merge=(climatology.QUEUE_EXTERNAL_SQL,),
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    from ..db.config import DatabaseSettings
+    from ..db.session import asyncpg_dsn
+
+    parser = argparse.ArgumentParser(description="Sample gridded soil moisture at soil points into soil_decadal_external")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--product", choices=sorted(PRODUCTS), required=True)
+    parser.add_argument("--method", choices=("bilinear", "nearest"), default="bilinear")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--time-chunk", type=int, default=32, help="time steps read per block")
+    parser.add_argument("--no-climatology", action="store_true", help="leave queued climatology keys for later")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    dsn = asyncpg_dsn(DatabaseSettings().url)
+
+    async def run() -> None:
+        report = await ingest_files(
+            dsn, args.files, args.product, method=args.method, workers=args.workers, time_chunk=args.time_chunk,
+        )
+        log.info("done: %s", report)
+        if not args.no_climatology:
+            await climatology.refresh_dirty(dsn)
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+# backend/ingest/meteo_daily.py
+"""Streaming bulk load of Kazhydromet daily station files into `meteo_daily`.
+
+Files are read in chunks, station codes are resolved through a cached lookup,
+and every chunk is COPY'd into a staging table and merged with
+ON CONFLICT ON CONSTRAINT uq_meteo_daily, so memory stays bounded by the chunk size.
+
+    python -m backend.ingest.meteo_daily data/meteo_2000_2024.csv
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import IO, Callable, Dict, Iterator, List, Optional
+
+import asyncpg
+
+from .bulk import copy_upsert, ensure_year_partitions
+from .readers import Row, iter_file_chunks, parse_date, parse_float, resolve_columns
+
+log = logging.getLogger(__name__)
+
+TABLE = "meteo_daily"
+CONFLICT = "uq_meteo_daily"
+VALUE_COLUMNS = ("air_temp_avg_c", "air_temp_max_c", "air_temp_min_c", "rel_humidity", "precipitation_mm")
+COLUMNS = ("station_id", "date", *VALUE_COLUMNS, "source")
+
+# canonical column -> accepted header spellings in source files
+ALIASES: Dict[str, tuple[str, ...]] = {
+    "station_code": ("station", "code", "station_index", "index", "станция", "код", "индекс"),
+    "date": ("day", "дата"),
+    "air_temp_avg_c": ("t_avg", "tavg", "temp_avg", "t_mean", "t_ср", "температура"),
+    "air_temp_max_c": ("t_max", "tmax", "temp_max"),
+    "air_temp_min_c": ("t_min", "tmin", "temp_min"),
+    "rel_humidity": ("rh", "humidity", "влажность"),
+    "precipitation_mm": ("precip", "precipitation", "prcp", "осадки"),
+}
+
+DEFAULT_CHUNK_SIZE = 50_000
+MAX_ERRORS = 100  # parse error messages kept per report; memory must not grow with the file
+
+# Decade of a date, as in the soil tables: 1 = days 1–10, 2 = 11–20, 3 = 21 to month end
+DECADE_SQL = "least((extract(day FROM {col})::int - 1) / 10 + 1, 3)"
+
+# Station decades for backend.services.meteo_decadal to re-aggregate
+QUEUE_DECADES_SQL = (
+    "INSERT INTO meteo_decadal_dirty (station_id, year, month, decade) "
+    "SELECT DISTINCT station_id, extract(year FROM date)::int, extract(month FROM date)::int, "
+    + DECADE_SQL.format(col="date") + " FROM {staging} ON CONFLICT DO NOTHING"
+)
+
+# Queue derived computations for the station-years / decades touched by a chunk
+AFTER_MERGE = (
+    "INSERT INTO htc_dirty (station_id, year) "
+    "SELECT DISTINCT station_id, extract(year FROM date)::int FROM {staging} "
+    "ON CONFLICT DO NOTHING",
+    QUEUE_DECADES_SQL,
+)
+
+
+class StationLookup:
+    """Station code -> station_id, loaded once per ingestion run."""
+    def __init__(self, mapping: Dict[str, uuid.UUID]):
+        self._mapping = mapping
+
+    @classmethod
+    async def load(cls, conn: asyncpg.Connection) -> "StationLookup":
+        rows = await conn.fetch("SELECT code, station_id FROM stations WHERE code IS NOT NULL")
+        return cls({str(r["code"]).strip(): r["station_id"] for r in rows})
+
+    def get(self, code: object) -> Optional[uuid.UUID]:
+        if code is None:
+            return None
+        text = str(code).strip()
+        if text.endswith(".0"):  # numeric codes read from Excel
+            text = text[:-2]
+        return self._mapping.get(text)
+
+
+@dataclass
+class IngestReport:
+    rows_read: int = 0
+    rows_written: int = 0
+    rows_skipped: int = 0
+    chunks: int = 0
+    elapsed_s: float = 0.0
+    unknown_stations: set[str] = field(default_factory=set)
+    errors: List[str] = field(default_factory=list)
+    errors_dropped: int = 0  # parse errors beyond MAX_ERRORS, counted only
+
+    def add_error(self, message: str) -> None:
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(message)
+        else:
+            self.errors_dropped += 1
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows_read / self.elapsed_s if self.elapsed_s else 0.0
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "rows_read": self.rows_read,
+            "rows_written": self.rows_written,
+            "rows_skipped": self.rows_skipped,
+            "chunks": self.chunks,
+            "elapsed_s": round(self.elapsed_s, 3),
+            "rows_per_sec": round(self.rows_per_sec, 1),
+            "unknown_stations": sorted(self.unknown_stations)[:100],
+            "errors": self.errors,
+            "errors_dropped": self.errors_dropped,
+        }
+
+
+def to_records(
+    chunk: List[Row], columns: Dict[str, str], stations: StationLookup, source: str, report: IngestReport
+) -> List[tuple]:
+    """Convert raw rows to COPY records, de-duplicated on (station_id, date) (last row wins)."""
+    records: Dict[tuple, tuple] = {}
+    code_col, date_col = columns["station_code"], columns["date"]
+    value_cols = [columns.get(c) for c in VALUE_COLUMNS]
+    for row in chunk:
+        code = row.get(code_col)
+        station_id = stations.get(code)
+        if station_id is None:
+            report.rows_skipped += 1
+            if code not in (None, ""):
+                report.unknown_stations.add(str(code))
+            continue
+        try:
+            date = parse_date(row.get(date_col))
+            values = tuple(parse_float(row.get(c)) if c else None for c in value_cols)
+        except ValueError as e:
+            report.rows_skipped += 1
+            report.add_error(str(e))
+            continue
+        if date is None:
+            report.rows_skipped += 1
+            continue
+        records[(station_id, date)] = (station_id, date, *values, source)
+    return list(records.values())
+
+
+async def ingest_chunks(
+    conn: asyncpg.Connection,
+    chunks: Iterator[List[Row]],
+    *,
+    source: str = "kazhydromet",
+    on_progress: Callable[[IngestReport], None] | None = None,
+) -> IngestReport:
+    report = IngestReport()
+    started = time.perf_counter()
+    stations = await StationLookup.load(conn)
+    columns: Dict[str, str] | None = None
+    partitions: set[int] = set()
+    _end = object()
+
+    while True:
+        # Parsing is CPU/IO bound: keep it off the event loop
+        chunk = await asyncio.to_thread(next, chunks, _end)
+        if chunk is _end:
+            break
+        if columns is None:
+            columns = resolve_columns(list(chunk[0].keys()), ALIASES)
+            missing = {"station_code", "date"} - columns.keys()
+            if missing:
+                raise ValueError(f"Missing required columns {sorted(missing)} (headers: {list(chunk[0].keys())})")
+        records = to_records(chunk, columns, stations, source, report)
+        report.rows_read += len(chunk)
+        report.chunks += 1
+        if records:
+            await ensure_year_partitions(conn, TABLE, {r[1].year for r in records}, partitions)
+            report.rows_written += await copy_upsert(
+                conn, TABLE, COLUMNS, records, conflict=CONFLICT, update_columns=(*VALUE_COLUMNS, "source"),
+                after_merge=AFTER_MERGE,
+            )
+        report.elapsed_s = time.perf_counter() - started
+        if on_progress is not None:
+            on_progress(report)
+
+    report.elapsed_s = time.perf_counter() - started
+    return report
+
+
+async def ingest_file(
+    dsn: str,
+    stream: IO[bytes],
+    filename: str,
+    *,
+    source: str = "kazhydromet",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    sheet: str | None = None,
+    on_progress: Callable[[IngestReport], None] | None = None,
+) -> IngestReport:
+    chunks = iter_file_chunks(stream, filename, chunk_size=chunk_size, sheet=sheet)
+    conn = await asyncpg.connect(dsn)
+    try:
+        return await ingest_chunks(conn, chunks, source=source, on_progress=on_progress)
+    finally:
+        await conn.close()
+
+
+def main(argv: list[str] | None = None) -> None:
+    from ..db.config import DatabaseSettings
+    from ..db.session import asyncpg_dsn
+
+    parser = argparse.ArgumentParser(description="Bulk-load daily meteo files into meteo_daily")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--source", default="kazhydromet")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--sheet", default=None, help="XLSX worksheet name (default: active sheet)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    def progress(report: IngestReport) -> None:
+        log.info("  %d rows read, %d written, %.0f rows/s", report.rows_read, report.rows_written, report.rows_per_sec)
+
+    dsn = asyncpg_dsn(DatabaseSettings().url)
+    for path in args.files:
+        log.info("%s", path)
+        with open(path, "rb") as fh:
+            report = asyncio.run(ingest_file(
+                dsn, fh, path, source=args.source, chunk_size=args.chunk_size, sheet=args.sheet, on_progress=progress
+            ))
+        log.info("done: %s", report.as_dict())
+
+
+if __name__ == "__main__":
+    main()
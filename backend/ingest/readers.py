@@ -0,0 +1,117 @@
+# backend/ingest/readers.py
+"""Chunked CSV / XLSX readers yielding lists of row dicts with normalized headers."""
+from __future__ import annotations
+import csv
+import datetime as dt
+import io
+import os
+from typing import IO, Any, Dict, Iterator, List, Mapping, Sequence
+
+Row = Dict[str, Any]
+
+
+def normalize_header(name: Any) -> str:
+    return str(name or "").strip().lower().replace(" ", "_")
+
+
+def resolve_columns(headers: Sequence[str], aliases: Mapping[str, Sequence[str]]) -> Dict[str, str]:
+    """Map canonical column names to the file's actual headers using `aliases`."""
+    present = {normalize_header(h): h for h in headers}
+    mapping: Dict[str, str] = {}
+    for canonical, names in aliases.items():
+        for name in (canonical, *names):
+            if normalize_header(name) in present:
+                mapping[canonical] = present[normalize_header(name)]
+                break
+    return mapping
+
+
+def iter_csv_chunks(
+    stream: IO[bytes] | IO[str], *, chunk_size: int, encoding: str = "utf-8-sig", delimiter: str | None = None
+) -> Iterator[List[Row]]:
+    text = io.TextIOWrapper(stream, encoding=encoding, newline="") if isinstance(stream.read(0), bytes) else stream
+    if delimiter is None:
+        sample = text.readline()
+        delimiter = ";" if sample.count(";") > sample.count(",") else ","
+        lines: Iterator[str] = _prepend(sample, text)
+    else:
+        lines = iter(text)
+    reader = csv.DictReader(lines, delimiter=delimiter)
+    chunk: List[Row] = []
+    for row in reader:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_xlsx_chunks(stream: IO[bytes], *, chunk_size: int, sheet: str | None = None) -> Iterator[List[Row]]:
+    from openpyxl import load_workbook  # optional dependency, only for .xlsx
+
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet] if sheet else workbook.active
+        rows = worksheet.iter_rows(values_only=True)
+        headers = [str(h) if h is not None else "" for h in next(rows, ())]
+        chunk: List[Row] = []
+        for values in rows:
+            if not any(v is not None for v in values):
+                continue
+            chunk.append(dict(zip(headers, values)))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+    finally:
+        workbook.close()
+
+
+def iter_file_chunks(
+    stream: IO[bytes], filename: str, *, chunk_size: int, sheet: str | None = None
+) -> Iterator[List[Row]]:
+    ext = os.path.splitext(filename)[1].lower()
+    if ext in (".xlsx", ".xlsm"):
+        return iter_xlsx_chunks(stream, chunk_size=chunk_size, sheet=sheet)
+    if ext in (".csv", ".txt", ".tsv", ""):
+        return iter_csv_chunks(stream, chunk_size=chunk_size, delimiter="\t" if ext == ".tsv" else None)
+    raise ValueError(f"Unsupported file type {ext!r}; expected .csv or .xlsx")
+
+
+def _prepend(first: str, rest: IO[str]) -> Iterator[str]:
+    yield first
+    yield from rest
+
+
+# ---------- value parsing ----------
+
+_DATE_FORMATS = ("%Y-%m-%d", "%d.%m.%Y", "%d/%m/%Y", "%Y/%m/%d")
+
+
+def parse_date(value: Any) -> dt.date | None:
+    if value is None or value == "":
+        return None
+    if isinstance(value, dt.datetime):
+        return value.date()
+    if isinstance(value, dt.date):
+        return value
+    text = str(value).strip()
+    for fmt in _DATE_FORMATS:
+        try:
+            return dt.datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognized date {value!r}")
+
+
+def parse_float(value: Any) -> float | None:
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip().replace(",", ".")
+    if text in ("", "-", "—", "NA", "NaN", "nan"):
+        return None
+    return float(text)
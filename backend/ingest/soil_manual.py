@@ -0,0 +1,259 @@
+# backend/ingest/soil_manual.py
+"""Streaming bulk load of manual decadal soil moisture files into `soil_decadal_manual`.
+
+Same pipeline as backend.ingest.meteo_daily: chunked reads, soil point codes
+resolved through a cached lookup, COPY into staging and a merge on
+uq_soil_decadal_manual. Each merged chunk queues its climatology keys; once
+the last chunk is merged, the quality-control stage (backend.services.quality)
+fills `quality_flag` for every decade the file touched and their neighbours, in
+one pass (per chunk, a point-sorted file would re-check everything loaded so far).
+
+    python -m backend.ingest.soil_manual data/soil_moisture_2024.csv
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import IO, Callable, Dict, Iterator, List, Optional
+
+import asyncpg
+
+from .bulk import copy_upsert
+from .readers import Row, iter_file_chunks, parse_date, parse_float, resolve_columns
+from ..services import climatology, quality
+from ..services.timeseries import decade_of
+
+log = logging.getLogger(__name__)
+
+TABLE = "soil_decadal_manual"
+CONFLICT = "uq_soil_decadal_manual"
+VALUE_COLUMNS = ("value_mm", "value_frac")
+COLUMNS = ("soil_point_id", "year", "month", "decade", "depth", *VALUE_COLUMNS, "source")
+
+# canonical column -> accepted header spellings in source files
+ALIASES: Dict[str, tuple[str, ...]] = {
+    "point_code": ("point", "code", "soil_point", "пункт", "код", "точка"),
+    "date": ("day", "дата"),
+    "year": ("год",),
+    "month": ("месяц",),
+    "decade": ("dekad", "декада"),
+    "depth": ("layer", "слой", "глубина"),
+    "value_mm": ("mm", "moisture_mm", "запас", "влажность_мм", "продуктивная_влага"),
+    "value_frac": ("frac", "moisture_frac", "влажность"),
+}
+
+DEPTH_ALIASES = {"0-20": "0-20", "20": "0-20", "0-50": "0-50", "50": "0-50", "0-100": "0-100", "100": "0-100"}
+
+DEFAULT_CHUNK_SIZE = 50_000
+MAX_ERRORS = 100  # parse error messages kept per report; memory must not grow with the file
+
+
+def parse_depth(value: object) -> str | None:
+    if value is None or value == "":
+        return None
+    text = str(value).strip().replace("–", "-").replace("—", "-").replace(" ", "").removesuffix("см").removesuffix("cm")
+    if text.endswith(".0"):
+        text = text[:-2]
+    if text not in DEPTH_ALIASES:
+        raise ValueError(f"Unrecognized depth {value!r}")
+    return DEPTH_ALIASES[text]
+
+
+class SoilPointLookup:
+    """Soil point code -> soil_point_id, loaded once per ingestion run."""
+    def __init__(self, mapping: Dict[str, uuid.UUID]):
+        self._mapping = mapping
+
+    @classmethod
+    async def load(cls, conn: asyncpg.Connection) -> "SoilPointLookup":
+        rows = await conn.fetch("SELECT code, soil_point_id FROM soil_points WHERE code IS NOT NULL")
+        return cls({str(r["code"]).strip(): r["soil_point_id"] for r in rows})
+
+    def get(self, code: object) -> Optional[uuid.UUID]:
+        if code is None:
+            return None
+        text = str(code).strip()
+        if text.endswith(".0"):  # numeric codes read from Excel
+            text = text[:-2]
+        return self._mapping.get(text)
+
+
+@dataclass
+class IngestReport:
+    rows_read: int = 0
+    rows_written: int = 0
+    rows_skipped: int = 0
+    chunks: int = 0
+    elapsed_s: float = 0.0
+    qc_elapsed_s: float = 0.0
+    unknown_points: set[str] = field(default_factory=set)
+    errors: List[str] = field(default_factory=list)
+    errors_dropped: int = 0  # parse errors beyond MAX_ERRORS, counted only
+    qc_counts: Dict[str, int] = field(default_factory=dict)
+    qc_rows_updated: int = 0
+
+    def add_error(self, message: str) -> None:
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(message)
+        else:
+            self.errors_dropped += 1
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows_read / self.elapsed_s if self.elapsed_s else 0.0
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "rows_read": self.rows_read,
+            "rows_written": self.rows_written,
+            "rows_skipped": self.rows_skipped,
+            "chunks": self.chunks,
+            "elapsed_s": round(self.elapsed_s, 3),
+            "rows_per_sec": round(self.rows_per_sec, 1),
+            "unknown_points": sorted(self.unknown_points)[:100],
+            "errors": self.errors,
+            "errors_dropped": self.errors_dropped,
+            "qc": {
+                "counts": self.qc_counts,
+                "rows_updated": self.qc_rows_updated,
+                "elapsed_s": round(self.qc_elapsed_s, 3),
+            },
+        }
+
+
+def to_records(
+    chunk: List[Row], columns: Dict[str, str], points: SoilPointLookup, source: str, report: IngestReport
+) -> List[tuple]:
+    """Convert raw rows to COPY records, de-duplicated on (point, year, month, decade, depth) (last row wins)."""
+    records: Dict[tuple, tuple] = {}
+    code_col = columns["point_code"]
+    for row in chunk:
+        code = row.get(code_col)
+        point_id = points.get(code)
+        if point_id is None:
+            report.rows_skipped += 1
+            if code not in (None, ""):
+                report.unknown_points.add(str(code))
+            continue
+        try:
+            if "date" in columns:
+                day = parse_date(row.get(columns["date"]))
+                key = decade_of(day) if day is not None else None
+            else:
+                parts = [parse_float(row.get(columns[c])) for c in ("year", "month", "decade")]
+                key = None if None in parts else tuple(int(v) for v in parts)
+            depth = parse_depth(row.get(columns["depth"]))
+            value_mm = parse_float(row.get(columns["value_mm"]))
+            value_frac = parse_float(row.get(columns["value_frac"])) if "value_frac" in columns else None
+        except ValueError as e:
+            report.rows_skipped += 1
+            report.add_error(str(e))
+            continue
+        if key is None or depth is None or value_mm is None or not (1 <= key[1] <= 12 and 1 <= key[2] <= 3):
+            report.rows_skipped += 1
+            continue
+        records[(point_id, *key, depth)] = (point_id, *key, depth, value_mm, value_frac, source)
+    return list(records.values())
+
+
+async def ingest_chunks(
+    conn: asyncpg.Connection,
+    chunks: Iterator[List[Row]],
+    *,
+    source: str = "kazhydromet",
+    qc: bool = True,
+    on_progress: Callable[[IngestReport], None] | None = None,
+) -> IngestReport:
+    report = IngestReport(qc_counts={name: 0 for name in (quality.OK, *quality.CHECKS)})
+    started = time.perf_counter()
+    points = await SoilPointLookup.load(conn)
+    columns: Dict[str, str] | None = None
+    touched: set[int] = set()  # absolute decades, see quality.absolute_decade
+    _end = object()
+
+    while True:
+        # Parsing is CPU/IO bound: keep it off the event loop
+        chunk = await asyncio.to_thread(next, chunks, _end)
+        if chunk is _end:
+            break
+        if columns is None:
+            columns = resolve_columns(list(chunk[0].keys()), ALIASES)
+            missing = {"point_code", "depth", "value_mm"} - columns.keys()
+            if "date" not in columns and not {"year", "month", "decade"} <= columns.keys():
+                missing.add("date or year/month/decade")
+            if missing:
+                raise ValueError(f"Missing required columns {sorted(missing)} (headers: {list(chunk[0].keys())})")
+        records = to_records(chunk, columns, points, source, report)
+        report.rows_read += len(chunk)
+        report.chunks += 1
+        if records:
+            report.rows_written += await copy_upsert(
+                conn, TABLE, COLUMNS, records, conflict=CONFLICT, update_columns=(*VALUE_COLUMNS, "source"),
+                after_merge=(climatology.QUEUE_MANUAL_SQL,),
+            )
+            touched.update(quality.absolute_decade(*r[1:4]) for r in records)
+        report.elapsed_s = time.perf_counter() - started
+        if on_progress is not None:
+            on_progress(report)
+
+    if qc and touched:
+        checked = await quality.check_decades(conn, touched)
+        report.qc_counts.update(checked.counts)
+        report.qc_rows_updated = checked.rows_updated
+        report.qc_elapsed_s = checked.elapsed_s
+    report.elapsed_s = time.perf_counter() - started
+    return report
+
+
+async def ingest_file(
+    dsn: str,
+    stream: IO[bytes],
+    filename: str,
+    *,
+    source: str = "kazhydromet",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    sheet: str | None = None,
+    qc: bool = True,
+    on_progress: Callable[[IngestReport], None] | None = None,
+) -> IngestReport:
+    chunks = iter_file_chunks(stream, filename, chunk_size=chunk_size, sheet=sheet)
+    conn = await asyncpg.connect(dsn)
+    try:
+        return await ingest_chunks(conn, chunks, source=source, qc=qc, on_progress=on_progress)
+    finally:
+        await conn.close()
+
+
+def main(argv: list[str] | None = None) -> None:
+    from ..db.config import DatabaseSettings
+    from ..db.session import asyncpg_dsn
+
+    parser = argparse.ArgumentParser(description="Bulk-load manual decadal soil moisture files into soil_decadal_manual")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--source", default="kazhydromet", choices=("kazhydromet", "uni", "manual"))
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--sheet", default=None, help="XLSX worksheet name (default: active sheet)")
+    parser.add_argument("--no-qc", action="store_true", help="skip the quality-control stage")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    def progress(report: IngestReport) -> None:
+        log.info("  %d rows read, %d written, %.0f rows/s", report.rows_read, report.rows_written, report.rows_per_sec)
+
+    dsn = asyncpg_dsn(DatabaseSettings().url)
+    for path in args.files:
+        log.info("%s", path)
+        with open(path, "rb") as fh:
+            report = asyncio.run(ingest_file(
+                dsn, fh, path, source=args.source, chunk_size=args.chunk_size, sheet=args.sheet,
+                qc=not args.no_qc, on_progress=progress,
+            ))
+        log.info("done: %s", report.as_dict())
+    asyncio.run(climatology.refresh_dirty(dsn))
+
+
+if __name__ == "__main__":
+    main()
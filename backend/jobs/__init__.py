@@ -0,0 +1 @@
+# Makes `backend.jobs` a package (background job queue, runner and job kinds).
@@ -0,0 +1,229 @@
+# backend/jobs/handlers.py
+"""Job kinds: parameter model, pool and the coroutine that does the work.
+
+A handler never runs on the API event loop: it gets its own loop in a
+spawned worker process (`pool="process"`, NumPy-heavy work that would hold
+the GIL) or in a pool thread (`pool="thread"`, work that mostly waits on
+PostgreSQL or files). It reports through a JobContext and returns a
+JSON-serialisable dict, stored as the job's result.
+"""
+from __future__ import annotations
+import datetime as dt
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Literal, Type
+
+import asyncpg
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+from ..services import climatology, export, htc, meteo_decadal, quality, site_points
+
+PROGRESS_SQL = """
+    UPDATE jobs SET progress = COALESCE($2, progress), message = COALESCE($3, message)
+    WHERE job_id = $1
+"""
+
+
+class JobContext:
+    """What a running handler sees of its job: the DSN, progress reporting, a place for result files."""
+    def __init__(
+        self, conn: asyncpg.Connection, job_id: uuid.UUID, dsn: str, result_dir: str, *, min_interval: float = 0.5,
+    ):
+        self.conn = conn  # reserved for progress writes; handlers open their own connections
+        self.job_id = job_id
+        self.dsn = dsn
+        self.result_dir = result_dir
+        self.min_interval = min_interval
+        self._last = 0.0
+
+    async def progress(self, fraction: float | None = None, message: str | None = None, *, force: bool = False) -> None:
+        """Store progress (0..1) and/or a status line; throttled to one write per `min_interval`."""
+        now = time.monotonic()
+        if not force and now - self._last < self.min_interval:
+            return
+        self._last = now
+        await self.conn.execute(PROGRESS_SQL, self.job_id, fraction, message)
+
+    def result_path(self, extension: str) -> str:
+        os.makedirs(self.result_dir, exist_ok=True)
+        return os.path.abspath(os.path.join(self.result_dir, f"{self.job_id}.{extension}"))
+
+
+def _engine(pool_size: int = 1):
+    """Engine for handlers built on SQLAlchemy; no statement timeout, long scans are the point."""
+    from ..db.config import DatabaseSettings
+    from ..db.session import create_engine
+
+    settings = DatabaseSettings().model_copy(update={"statement_timeout_ms": 0, "pool_size": pool_size, "max_overflow": 0})
+    return create_engine(settings)
+
+
+def input_dir() -> str:
+    """The only directory job parameters may name input files in (JOBS_INPUT_DIR)."""
+    from ..api.config import JobSettings
+
+    return os.path.realpath(JobSettings().input_dir)
+
+
+# ===== parameters =====
+
+class Refresh(BaseModel):
+    full: bool = Field(False, description="Recompute everything instead of only the queued keys")
+
+
+class QualityYears(BaseModel):
+    year_from: int = Field(..., ge=1900, le=2100)
+    year_to: int = Field(..., ge=1900, le=2100)
+
+    @model_validator(mode="after")
+    def _ordered(self) -> "QualityYears":
+        if self.year_to < self.year_from:
+            raise ValueError("year_to must not be before year_from")
+        return self
+
+
+class SitePoints(BaseModel):
+    site_ids: List[uuid.UUID] | None = None
+    soil_point_ids: List[uuid.UUID] | None = None
+
+
+class GriddedFiles(BaseModel):
+    files: List[str] = Field(..., min_length=1, description="NetCDF / GeoTIFF paths inside the job input directory")
+    product: Literal["era5_land", "amsr2"]
+    method: Literal["bilinear", "nearest"] = "bilinear"
+    workers: int = Field(1, ge=1, le=32, description="Sampling processes started by the job")
+    time_chunk: int = Field(32, ge=1)
+    climatology: bool = Field(True, description="Refresh the climatology for the loaded decades afterwards")
+
+    @field_validator("files")
+    @classmethod
+    def _inside_input_dir(cls, files: List[str]) -> List[str]:
+        """Normalise to paths relative to the input directory; anything resolving outside it is rejected."""
+        root = input_dir()
+        relative = []
+        for name in files:
+            path = os.path.realpath(os.path.join(root, name))
+            if os.path.commonpath((root, path)) != root:
+                raise ValueError(f"{name!r} is outside the job input directory (JOBS_INPUT_DIR)")
+            relative.append(os.path.relpath(path, root))
+        return relative
+
+
+class ExportFile(BaseModel):
+    dataset: Literal["meteo_daily", "meteo_decadal", "soil_decadal_manual", "soil_decadal_external"]
+    format: Literal["parquet", "arrow", "csv"] = "parquet"
+    station_id: List[uuid.UUID] | None = None
+    soil_point_id: List[uuid.UUID] | None = None
+    source: List[Literal["kazhydromet", "uni", "manual", "era5_land", "amsr2"]] | None = None
+    depth: List[Literal["0-20", "0-50", "0-100"]] | None = None
+    date_from: dt.date | None = None
+    date_to: dt.date | None = None
+    batch_size: int = Field(50_000, ge=1_000, le=500_000)
+
+
+# ===== handlers =====
+
+async def run_htc(ctx: JobContext, params: Refresh) -> Dict[str, Any]:
+    await ctx.progress(0.0, "recomputing HTC", force=True)
+    return (await htc.recompute_dirty(ctx.dsn, full=params.full)).as_dict()
+
+
+async def run_meteo_decadal(ctx: JobContext, params: Refresh) -> Dict[str, Any]:
+    await ctx.progress(0.0, "refreshing decadal meteo aggregates", force=True)
+    return await meteo_decadal.refresh_dirty(ctx.dsn, full=params.full)
+
+
+async def run_climatology(ctx: JobContext, params: Refresh) -> Dict[str, Any]:
+    await ctx.progress(0.0, "refreshing soil moisture climatology", force=True)
+    return await climatology.refresh_dirty(ctx.dsn, full=params.full)
+
+
+async def run_quality(ctx: JobContext, params: QualityYears) -> Dict[str, Any]:
+    years = range(params.year_from, params.year_to + 1)
+    counts: Dict[str, int] = {}
+    rows_checked = rows_updated = 0
+    for i, year in enumerate(years):
+        await ctx.progress(i / len(years), f"quality control {year}", force=True)
+        report = await quality.check_years(ctx.dsn, year, year)
+        for name, value in report["counts"].items():
+            counts[name] = counts.get(name, 0) + value
+        rows_checked += report["rows_checked"]
+        rows_updated += report["rows_updated"]
+    return {
+        "years": [params.year_from, params.year_to], "counts": counts,
+        "rows_checked": rows_checked, "rows_updated": rows_updated,
+    }
+
+
+async def run_site_points(ctx: JobContext, params: SitePoints) -> Dict[str, Any]:
+    from ..db.session import create_sessionmaker
+
+    engine = _engine()
+    try:
+        async with create_sessionmaker(engine)() as session:
+            return await site_points.rebuild(session, site_ids=params.site_ids, soil_point_ids=params.soil_point_ids)
+    finally:
+        await engine.dispose()
+
+
+async def run_gridded(ctx: JobContext, params: GriddedFiles) -> Dict[str, Any]:
+    from ..ingest import gridded
+
+    root = input_dir()
+    await ctx.progress(0.0, f"sampling {len(params.files)} file(s)", force=True)
+    report = await gridded.ingest_files(
+        ctx.dsn, [os.path.join(root, name) for name in params.files], params.product, method=params.method, workers=params.workers,
+        time_chunk=params.time_chunk,
+    )
+    if params.climatology:
+        await ctx.progress(0.9, "refreshing soil moisture climatology", force=True)
+        report["climatology"] = await climatology.refresh_dirty(ctx.dsn)
+    return report
+
+
+async def run_export(ctx: JobContext, params: ExportFile) -> Dict[str, Any]:
+    spec = export.DATASETS[params.dataset]
+    sql, query_params = export.build_query(
+        spec,
+        {"station_id": params.station_id, "soil_point_id": params.soil_point_id,
+         "source": params.source, "depth": params.depth},
+        params.date_from, params.date_to,
+    )
+    media_type, extension = export.FORMATS[params.format]
+    path = ctx.result_path(extension)
+    written = 0
+    engine = _engine()
+    try:
+        with open(path, "wb") as fh:
+            async for chunk in export.stream_export(engine, spec, params.format, sql, query_params, params.batch_size):
+                fh.write(chunk)
+                written += len(chunk)
+                await ctx.progress(None, f"{written} bytes written")
+    finally:
+        await engine.dispose()
+    return {
+        "file": path, "bytes": written, "media_type": media_type,
+        "filename": f"{params.dataset}.{extension}",
+    }
+
+
+@dataclass(frozen=True)
+class Handler:
+    kind: str
+    pool: Literal["process", "thread"]
+    params: Type[BaseModel]
+    run: Callable[[JobContext, Any], Awaitable[Dict[str, Any]]]
+    description: str
+
+
+HANDLERS: Dict[str, Handler] = {h.kind: h for h in (
+    Handler("htc", "process", Refresh, run_htc, "Recompute annual HTC for queued (or all) station-years"),
+    Handler("meteo_decadal", "thread", Refresh, run_meteo_decadal, "Refresh decadal meteo aggregates"),
+    Handler("climatology", "process", Refresh, run_climatology, "Refresh the per-point soil moisture climatology"),
+    Handler("quality", "process", QualityYears, run_quality, "Quality-control manual soil moisture over whole years"),
+    Handler("site_points", "thread", SitePoints, run_site_points, "Rebuild site_points from site bounds"),
+    Handler("gridded", "thread", GriddedFiles, run_gridded, "Sample ERA5-Land / AMSR2 files at the soil points"),
+    Handler("export", "thread", ExportFile, run_export, "Export a measurement series to a downloadable file"),
+)}
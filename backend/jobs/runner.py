@@ -0,0 +1,518 @@
+# backend/jobs/runner.py
+"""PostgreSQL-backed job queue and the runner that executes it off the API loop.
+
+Jobs live in the `jobs` table. `submit` inserts a pending row; an identical
+pending job (same kind and normalised parameters) is returned instead of
+queueing a second one. A JobRunner claims pending rows with
+FOR UPDATE SKIP LOCKED, so the runners of several API workers (or a
+standalone `python -m backend.jobs.runner`) share one queue, and runs them:
+
+  - pool "process": one spawned process per job, at most `process_workers`
+    at a time and niced below the API (the NumPy passes hold the GIL);
+  - pool "thread": a bounded ThreadPoolExecutor, each job in its own event
+    loop (work that mostly waits on PostgreSQL or files).
+
+Workers write progress and the outcome straight to their row. Cancelling a
+pending job is immediate; a running one gets `cancel_requested` and the
+runner owning it terminates the process or cancels the thread's task. Rows
+of a runner that stopped heartbeating are requeued, up to `max_attempts`.
+
+    python -m backend.jobs.runner --process-workers 2 --thread-workers 4
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from . import handlers
+from ..api.jsonlib import dumps, loads
+
+log = logging.getLogger(__name__)
+
+JOB_COLUMNS = (
+    "job_id, kind, params, pool, status, progress, message, result, error, cancel_requested, attempts, "
+    "worker, created_at, started_at, finished_at"
+)
+
+SUBMIT_SQL = text(f"""
+    INSERT INTO jobs (job_id, kind, params, dedupe_key, pool)
+    VALUES (:job_id, :kind, CAST(:params AS jsonb), :dedupe_key, :pool)
+    ON CONFLICT (dedupe_key) WHERE status = 'pending' DO NOTHING
+    RETURNING {JOB_COLUMNS}
+""")
+
+PENDING_DUPLICATE_SQL = text(f"SELECT {JOB_COLUMNS} FROM jobs WHERE dedupe_key = :dedupe_key AND status = 'pending'")
+
+GET_SQL = text(f"SELECT {JOB_COLUMNS} FROM jobs WHERE job_id = :job_id")
+
+LIST_SQL = text(f"""
+    SELECT {JOB_COLUMNS} FROM jobs
+    WHERE (CAST(:status AS text) IS NULL OR status = :status)
+      AND (CAST(:kind AS text) IS NULL OR kind = :kind)
+    ORDER BY created_at DESC
+    LIMIT :limit
+""")
+
+# In SET, `status` is the value before the update
+CANCEL_SQL = text(f"""
+    UPDATE jobs SET
+        status = CASE WHEN status = 'pending' THEN 'cancelled' ELSE status END,
+        finished_at = CASE WHEN status = 'pending' THEN now() ELSE finished_at END,
+        cancel_requested = true
+    WHERE job_id = :job_id AND status IN ('pending', 'running')
+    RETURNING {JOB_COLUMNS}
+""")
+
+CLAIM_SQL = text("""
+    UPDATE jobs j SET
+        status = 'running', worker = :worker, attempts = j.attempts + 1,
+        started_at = now(), heartbeat_at = now(), progress = 0, message = NULL
+    FROM (
+        SELECT job_id FROM jobs
+        WHERE status = 'pending' AND pool = :pool
+        ORDER BY created_at
+        LIMIT :limit
+        FOR UPDATE SKIP LOCKED
+    ) c
+    WHERE j.job_id = c.job_id
+    RETURNING j.job_id, j.kind
+""")
+
+HEARTBEAT_SQL = text("UPDATE jobs SET heartbeat_at = now() WHERE worker = :worker AND status = 'running'")
+
+CANCEL_REQUESTED_SQL = text("""
+    SELECT job_id FROM jobs WHERE worker = :worker AND status = 'running' AND cancel_requested
+""")
+
+# Running rows nobody heartbeats any more (runner killed, host lost), or this runner's own on shutdown
+ORPHANED_SQL = text("""
+    SELECT job_id, attempts, cancel_requested, worker FROM jobs
+    WHERE status = 'running'
+      AND (heartbeat_at < now() - make_interval(secs => :stale_after) OR worker = :worker)
+    FOR UPDATE SKIP LOCKED
+""")
+
+REQUEUE_SQL = text("""
+    UPDATE jobs SET status = 'pending', worker = NULL, started_at = NULL, heartbeat_at = NULL
+    WHERE job_id = :job_id
+""")
+
+# Worker process died without recording an outcome (terminated on cancel, crashed, OOM-killed)
+ABANDON_SQL = text("""
+    UPDATE jobs SET
+        status = CASE WHEN cancel_requested THEN 'cancelled' ELSE 'failed' END,
+        error = CASE WHEN cancel_requested THEN error ELSE :error END,
+        finished_at = now()
+    WHERE job_id = :job_id AND status = 'running' AND (CAST(:worker AS text) IS NULL OR worker = :worker)
+""")
+
+# asyncpg, from the worker itself
+LOAD_SQL = "SELECT kind, params FROM jobs WHERE job_id = $1"
+
+FINISH_SQL = """
+    UPDATE jobs SET
+        status = $2, result = $3::jsonb, error = $4, finished_at = now(),
+        progress = CASE WHEN $2 = 'succeeded' THEN 1 ELSE progress END
+    WHERE job_id = $1 AND status = 'running' AND worker = $5
+"""
+
+
+# ===== queue (API side) =====
+
+def _json(value: Any) -> Any:
+    return loads(value) if isinstance(value, (str, bytes)) else value
+
+
+def job_dict(row: Any) -> Dict[str, Any]:
+    job = dict(row._mapping)
+    job["params"], job["result"] = _json(job["params"]), _json(job["result"])
+    if job["result"] is not None:
+        job["result"].pop("file", None)  # server path; served by GET /jobs/{id}/result
+    return job
+
+
+def normalise(kind: str, params: Dict[str, Any] | None) -> Tuple[handlers.Handler, Dict[str, Any]]:
+    """Handler and validated parameters with defaults filled in; raises KeyError / pydantic.ValidationError."""
+    handler = handlers.HANDLERS[kind]
+    return handler, handler.params.model_validate(params or {}).model_dump(mode="json")
+
+
+def dedupe_key(kind: str, params: Dict[str, Any]) -> str:
+    canonical = json.dumps([kind, params], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+async def submit(session: AsyncSession, kind: str, params: Dict[str, Any] | None = None) -> Tuple[Dict[str, Any], bool]:
+    """Queue a job, or return the identical one still pending. Returns (job, deduplicated)."""
+    handler, params = normalise(kind, params)
+    key = dedupe_key(kind, params)
+    for _ in range(3):  # the pending duplicate may get claimed between the two statements
+        row = (await session.execute(SUBMIT_SQL, {
+            "job_id": uuid.uuid4(), "kind": kind, "params": dumps(params).decode("utf-8"),
+            "dedupe_key": key, "pool": handler.pool,
+        })).first()
+        if row is None:
+            row = (await session.execute(PENDING_DUPLICATE_SQL, {"dedupe_key": key})).first()
+            if row is None:
+                continue
+            await session.commit()
+            return job_dict(row), True
+        await session.commit()
+        return job_dict(row), False
+    raise RuntimeError(f"could not queue {kind} job")
+
+
+async def get(session: AsyncSession, job_id: uuid.UUID, *, with_file: bool = False) -> Dict[str, Any] | None:
+    row = (await session.execute(GET_SQL, {"job_id": job_id})).first()
+    if row is None:
+        return None
+    job = job_dict(row)
+    if with_file:
+        job["result"] = _json(row.result)
+    return job
+
+
+async def list_jobs(
+    session: AsyncSession, *, status: str | None = None, kind: str | None = None, limit: int = 50,
+) -> List[Dict[str, Any]]:
+    rows = (await session.execute(LIST_SQL, {"status": status, "kind": kind, "limit": limit})).all()
+    return [job_dict(r) for r in rows]
+
+
+async def cancel(session: AsyncSession, job_id: uuid.UUID) -> Dict[str, Any] | None:
+    """Cancel a pending job or ask the runner owning a running one to stop it; None if already finished."""
+    row = (await session.execute(CANCEL_SQL, {"job_id": job_id})).first()
+    await session.commit()
+    return job_dict(row) if row is not None else None
+
+
+# ===== worker =====
+
+async def _execute(job_id: uuid.UUID, dsn: str, worker: str, result_dir: str) -> None:
+    conn = await asyncpg.connect(dsn)
+    try:
+        row = await conn.fetchrow(LOAD_SQL, job_id)
+        if row is None:
+            return
+        try:
+            handler = handlers.HANDLERS[row["kind"]]
+            params = handler.params.model_validate(_json(row["params"]))
+            result = await handler.run(handlers.JobContext(conn, job_id, dsn, result_dir), params)
+        except asyncio.CancelledError:
+            outcome = ("cancelled", None, None)
+        except Exception as exc:
+            log.exception("job %s (%s) failed", job_id, row["kind"])
+            outcome = ("failed", None, f"{type(exc).__name__}: {exc}"[:4000])
+        else:
+            outcome = ("succeeded", dumps(result).decode("utf-8"), None)
+        await conn.execute(FINISH_SQL, job_id, *outcome, worker)
+    finally:
+        await conn.close()
+
+
+def execute(job_id: str, dsn: str, worker: str, result_dir: str, nice: int = 0) -> None:
+    """Entry point of a spawned job process."""
+    if nice:
+        try:
+            os.nice(nice)
+        except OSError:
+            pass
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    asyncio.run(_execute(uuid.UUID(job_id), dsn, worker, result_dir))
+
+
+# ===== runner =====
+
+class JobRunner:
+    """Claims and runs jobs from the `jobs` table; see the module docstring."""
+    def __init__(
+        self,
+        sessionmaker: async_sessionmaker[AsyncSession],
+        dsn: str,
+        *,
+        process_workers: int | None = None,
+        thread_workers: int = 4,
+        poll_interval: float = 1.0,
+        heartbeat_interval: float = 10.0,
+        stale_after: float = 60.0,
+        max_attempts: int = 2,
+        result_dir: str = "job_results",
+        process_nice: int = 10,
+    ):
+        self.sessionmaker = sessionmaker
+        self.dsn = dsn
+        # Leave a core to the API process
+        self.process_workers = process_workers or max((os.cpu_count() or 2) - 1, 1)
+        self.thread_workers = thread_workers
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self.max_attempts = max_attempts
+        self.result_dir = result_dir
+        self.process_nice = process_nice
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.finished = 0
+        self.last_error: str | None = None
+        self._mp = multiprocessing.get_context("spawn")  # no inherited event loop / sockets
+        self._threads = ThreadPoolExecutor(max_workers=thread_workers, thread_name_prefix="job")
+        self._processes: Dict[uuid.UUID, multiprocessing.process.BaseProcess] = {}
+        self._thread_jobs: Dict[uuid.UUID, asyncio.Future] = {}
+        # job_id -> (loop, task) of a thread job, registered from inside its thread
+        self._thread_tasks: Dict[uuid.UUID, Tuple[asyncio.AbstractEventLoop, asyncio.Task]] = {}
+        self._lock = threading.Lock()
+        self._terminated: set[uuid.UUID] = set()
+        self._thread_done: List[uuid.UUID] = []
+        self._task: asyncio.Task | None = None
+        self._wake = asyncio.Event()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="job-runner")
+
+    async def stop(self) -> None:
+        """Stop claiming, put this runner's running jobs back in the queue and stop their workers."""
+        if self._task is not None:
+            task, self._task = self._task, None
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        try:
+            await self._requeue_orphans()  # own rows first, so stopped workers cannot record "cancelled"
+        except Exception:
+            log.warning("could not requeue running jobs", exc_info=True)
+        for proc in self._processes.values():
+            proc.terminate()
+        with self._lock:
+            for loop, job_task in self._thread_tasks.values():
+                loop.call_soon_threadsafe(job_task.cancel)
+        await asyncio.to_thread(lambda: [p.join(5) for p in self._processes.values()])
+        self._processes.clear()
+        self._threads.shutdown(wait=False, cancel_futures=True)
+
+    def wake(self) -> None:
+        """Look for new jobs and cancellations now instead of at the next poll."""
+        self._wake.set()
+
+    async def _run(self) -> None:
+        last_heartbeat = 0.0
+        while True:
+            try:
+                await self._reap()
+                if time.monotonic() - last_heartbeat >= self.heartbeat_interval:
+                    await self._heartbeat()
+                    await self._requeue_orphans()
+                    last_heartbeat = time.monotonic()
+                if self._processes or self._thread_jobs:
+                    await self._apply_cancels()
+                await self._claim()
+                self.last_error = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self.last_error = repr(exc)
+                log.warning("job runner pass failed", exc_info=True)
+            try:
+                # Back off while the database is unreachable
+                timeout = self.poll_interval if self.last_error is None else self.heartbeat_interval
+                await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    async def _claim(self) -> None:
+        free = {
+            "process": self.process_workers - len(self._processes),
+            "thread": self.thread_workers - len(self._thread_jobs),
+        }
+        for pool, limit in free.items():
+            if limit <= 0:
+                continue
+            async with self.sessionmaker() as session:
+                rows = (await session.execute(CLAIM_SQL, {"worker": self.worker_id, "pool": pool, "limit": limit})).all()
+                await session.commit()
+            for row in rows:
+                log.info("job %s (%s) started in a %s worker", row.job_id, row.kind, pool)
+                if pool == "process":
+                    await self._start_process(row.job_id, row.kind)
+                else:
+                    self._start_thread(row.job_id)
+
+    async def _start_process(self, job_id: uuid.UUID, kind: str) -> None:
+        proc = self._mp.Process(
+            target=execute, args=(str(job_id), self.dsn, self.worker_id, self.result_dir, self.process_nice),
+            name=f"job-{kind}-{job_id}",
+        )
+        self._processes[job_id] = proc
+        try:
+            await asyncio.to_thread(proc.start)
+        except Exception as exc:
+            del self._processes[job_id]
+            async with self.sessionmaker() as session:
+                await session.execute(ABANDON_SQL, {
+                    "job_id": job_id, "worker": self.worker_id, "error": f"could not start worker process: {exc!r}",
+                })
+                await session.commit()
+
+    def _start_thread(self, job_id: uuid.UUID) -> None:
+        future = asyncio.get_running_loop().run_in_executor(self._threads, self._thread_main, job_id)
+        self._thread_jobs[job_id] = future
+
+        def done(_: asyncio.Future) -> None:
+            self._thread_jobs.pop(job_id, None)
+            self._thread_done.append(job_id)
+            self._wake.set()
+
+        future.add_done_callback(done)
+
+    def _thread_main(self, job_id: uuid.UUID) -> None:
+        async def main() -> None:
+            with self._lock:
+                self._thread_tasks[job_id] = (asyncio.get_running_loop(), asyncio.current_task())
+            try:
+                await _execute(job_id, self.dsn, self.worker_id, self.result_dir)
+            finally:
+                with self._lock:
+                    self._thread_tasks.pop(job_id, None)
+
+        try:
+            asyncio.run(main())
+        except BaseException:
+            log.exception("job %s thread failed", job_id)
+
+    async def _reap(self) -> None:
+        """Forget finished workers; record an outcome for jobs whose worker ended without one."""
+        ended: List[Tuple[uuid.UUID, str]] = []
+        for job_id, proc in list(self._processes.items()):
+            if proc.is_alive() or proc.exitcode is None:
+                continue
+            del self._processes[job_id]
+            self._terminated.discard(job_id)
+            ended.append((job_id, f"worker process exited with code {proc.exitcode}"))
+        while self._thread_done:
+            ended.append((self._thread_done.pop(), "worker thread ended without recording a result"))
+        if not ended:
+            return
+        self.finished += len(ended)
+        async with self.sessionmaker() as session:
+            for job_id, error in ended:  # no-op for jobs that recorded their outcome
+                await session.execute(ABANDON_SQL, {"job_id": job_id, "worker": self.worker_id, "error": error})
+            await session.commit()
+
+    async def _heartbeat(self) -> None:
+        if not (self._processes or self._thread_jobs):
+            return
+        async with self.sessionmaker() as session:
+            await session.execute(HEARTBEAT_SQL, {"worker": self.worker_id})
+            await session.commit()
+
+    async def _apply_cancels(self) -> None:
+        async with self.sessionmaker() as session:
+            job_ids = (await session.execute(CANCEL_REQUESTED_SQL, {"worker": self.worker_id})).scalars().all()
+        for job_id in job_ids:
+            proc = self._processes.get(job_id)
+            if proc is not None and job_id not in self._terminated:
+                log.info("job %s cancelled, terminating its process", job_id)
+                self._terminated.add(job_id)
+                proc.terminate()
+                continue
+            with self._lock:
+                entry = self._thread_tasks.get(job_id)
+            if entry is not None and not entry[1].cancelling():
+                log.info("job %s cancelled, stopping its thread task", job_id)
+                entry[0].call_soon_threadsafe(entry[1].cancel)
+
+    async def _requeue_orphans(self) -> None:
+        """Requeue running jobs of dead runners (and this one's, once stopped); fail them after max_attempts."""
+        worker = self.worker_id if self._task is None else None
+        async with self.sessionmaker() as session:
+            rows = (await session.execute(ORPHANED_SQL, {"stale_after": self.stale_after, "worker": worker})).all()
+            for row in rows:
+                # A clean shutdown is not the job's fault: only lost workers use up attempts
+                lost = row.worker != self.worker_id
+                if row.cancel_requested or (lost and row.attempts >= self.max_attempts):
+                    await session.execute(ABANDON_SQL, {
+                        "job_id": row.job_id, "worker": None,
+                        "error": f"worker lost after {row.attempts} attempt(s)",
+                    })
+                    continue
+                try:
+                    async with session.begin_nested():
+                        await session.execute(REQUEUE_SQL, {"job_id": row.job_id})
+                except IntegrityError:  # an identical job is already pending: it will do the work
+                    await session.execute(ABANDON_SQL, {
+                        "job_id": row.job_id, "worker": None, "error": "worker lost; superseded by an identical pending job",
+                    })
+            await session.commit()
+        if rows:
+            log.info("recovered %d orphaned job(s)", len(rows))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "worker": self.worker_id,
+            "running": self._task is not None and not self._task.done(),
+            "process_workers": self.process_workers,
+            "thread_workers": self.thread_workers,
+            "process_jobs": len(self._processes),
+            "thread_jobs": len(self._thread_jobs),
+            "finished": self.finished,
+            "last_error": self.last_error,
+        }
+
+
+def main(argv: list[str] | None = None) -> None:
+    from ..api.config import JobSettings
+    from ..db.config import DatabaseSettings
+    from ..db.session import asyncpg_dsn, create_engine, create_sessionmaker
+
+    settings = JobSettings()
+    parser = argparse.ArgumentParser(description="Run queued background jobs outside the API processes")
+    parser.add_argument("--process-workers", type=int, default=settings.process_workers)
+    parser.add_argument("--thread-workers", type=int, default=settings.thread_workers)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    async def run() -> None:
+        db_settings = DatabaseSettings()
+        engine = create_engine(db_settings)
+        runner = JobRunner(
+            create_sessionmaker(engine), asyncpg_dsn(db_settings.url),
+            process_workers=args.process_workers, thread_workers=args.thread_workers,
+            poll_interval=settings.poll_interval, heartbeat_interval=settings.heartbeat_interval,
+            stale_after=settings.stale_after, max_attempts=settings.max_attempts,
+            result_dir=settings.result_dir, process_nice=settings.process_nice,
+        )
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        runner.start()
+        log.info("job runner %s started", runner.worker_id)
+        try:
+            await stop.wait()
+        finally:
+            await runner.stop()
+            await engine.dispose()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
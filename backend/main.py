@@ -1,14 +1,170 @@
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from .api.client import ExternalAPIClient
+from .api.deps import get_db_settings, get_field_mirror_settings, get_job_settings, get_metrics_settings, get_settings, get_spatial_settings, get_surface_settings, get_tile_settings
+from .api.jsonlib import FastJSONResponse
+from .api.metrics import MetricsMiddleware, instrument_engine
+from .api.profiling import ProfilingMiddleware
+from .api.routers.export import router as export_router
 from .api.routers.external import router as external_router
+from .api.routers.fields import router as fields_router
+from .api.routers.ingest import router as ingest_router
+from .api.routers.jobs import router as jobs_router
+from .api.routers.metrics import router as metrics_router
+from .api.routers.sites import router as sites_router
+from .api.routers.soil_points import router as soil_points_router
+from .api.routers.spatial import router as spatial_router
+from .api.routers.stations import router as stations_router
+from .api.routers.surfaces import router as surfaces_router
+from .api.routers.tiles import router as tiles_router
+from .api.routers.validation import router as validation_router
+from .db.notify import TableChangeHub
+from .db.partitions import ensure_future_partitions
+from .db.session import asyncpg_dsn, create_engine, create_sessionmaker, pool_stats
+from .jobs.runner import JobRunner
+from .services import comparison, surfaces, zonal
+from .services.interpolation import KAZAKHSTAN_BOUNDS, Grid, Options
+from .services.field_mirror import FieldMirror
+from .services.spatial import SpatialIndex
+from .services.tiles import TileCache
+
+log = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Один пул соединений к внешнему API на всё время жизни приложения
+    api_client = await ExternalAPIClient(get_settings()).open()
+    app.state.api_client = api_client
+
+    db_settings = get_db_settings()
+    engine = create_engine(db_settings)
+    if get_metrics_settings().enabled:
+        instrument_engine(engine)
+    app.state.db_engine = engine
+    app.state.db_sessionmaker = create_sessionmaker(engine)
+    try:
+        await ensure_future_partitions(engine)
+    except Exception:
+        log.warning("could not ensure yearly partitions", exc_info=True)
+
+    tile_settings = get_tile_settings()
+    tile_cache = TileCache(max_bytes=tile_settings.cache_max_bytes, directory=tile_settings.cache_dir)
+    app.state.tile_cache = tile_cache
+
+    # Сброс кэшей по NOTIFY от триггеров на таблицах
+    table_changes = TableChangeHub(asyncpg_dsn(db_settings.url))
+    app.state.table_changes = table_changes
+    if db_settings.listen_changes:
+        await table_changes.start()
+    table_changes.subscribe(("stations", "soil_points", "sites", "soil_decadal_manual"), tile_cache.invalidate_table)
+
+    comparison_cache = comparison.ComparisonCache()
+    app.state.comparison_cache = comparison_cache
+    table_changes.subscribe(comparison.DEPENDS_ON, comparison_cache.invalidate_table)
+
+    zonal_cache = zonal.ZonalCache()
+    app.state.zonal_cache = zonal_cache
+    table_changes.subscribe(zonal.DEPENDS_ON, zonal_cache.invalidate_table)
+
+    surface_settings = get_surface_settings()
+    surface_cache = surfaces.SurfaceCache(
+        app.state.db_sessionmaker,
+        TileCache(max_bytes=surface_settings.tile_cache_max_bytes, directory=surface_settings.tile_cache_dir),
+        grid=Grid.covering(KAZAKHSTAN_BOUNDS, surface_settings.cell_size),
+        options=Options(
+            neighbours=surface_settings.neighbours, power=surface_settings.idw_power,
+            max_distance_km=surface_settings.max_distance_km, variogram_model=surface_settings.variogram_model,
+        ),
+        max_surfaces=surface_settings.max_surfaces,
+        workers=surface_settings.workers,
+        parallel_min_cells=surface_settings.parallel_min_cells,
+    )
+    app.state.surface_cache = surface_cache
+    table_changes.subscribe(surfaces.DEPENDS_ON, surface_cache.invalidate_table)
+
+    if get_spatial_settings().index_enabled:
+        spatial_index = SpatialIndex(app.state.db_sessionmaker)
+        table_changes.subscribe(("stations", "soil_points"), spatial_index.invalidate_table)
+        app.state.spatial_index = spatial_index
+        try:
+            await spatial_index.load_all()
+        except Exception:
+            log.warning("spatial index not loaded, queries will use PostGIS", exc_info=True)
+
+    mirror_settings = get_field_mirror_settings()
+    if mirror_settings.enabled:
+        field_mirror = FieldMirror(
+            api_client, app.state.db_sessionmaker,
+            interval=mirror_settings.interval, concurrency=mirror_settings.concurrency,
+        )
+        app.state.field_mirror = field_mirror
+        field_mirror.start()
+
+    # CPU- and IO-heavy recomputations run in worker processes / threads, not on this loop;
+    # one process worker by default, since every uvicorn worker starts its own runner
+    job_settings = get_job_settings()
+    if job_settings.enabled:
+        job_runner = JobRunner(
+            app.state.db_sessionmaker, asyncpg_dsn(db_settings.url),
+            process_workers=job_settings.process_workers or 1, thread_workers=job_settings.thread_workers,
+            poll_interval=job_settings.poll_interval, heartbeat_interval=job_settings.heartbeat_interval,
+            stale_after=job_settings.stale_after, max_attempts=job_settings.max_attempts,
+            result_dir=job_settings.result_dir, process_nice=job_settings.process_nice,
+        )
+        app.state.job_runner = job_runner
+        job_runner.start()
+
+    try:
+        yield
+    finally:
+        if job_settings.enabled:
+            await job_runner.stop()
+        if mirror_settings.enabled:
+            await field_mirror.stop()
+        await table_changes.stop()
+        surface_cache.close()
+        await engine.dispose()
+        await api_client.aclose()
 
 app = FastAPI(
     title="Soil Moisturizing Data Hub",
     description="Сервис для работы с данными влажности почвы",
     version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
+)
+
+metrics_settings = get_metrics_settings()
+if metrics_settings.enabled:
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(metrics_router)
+app.add_middleware(
+    ProfilingMiddleware,
+    token=metrics_settings.profile_token,
+    header=metrics_settings.profile_header,
+    directory=metrics_settings.profile_dir,
+    interval=metrics_settings.profile_interval,
+    min_duration=metrics_settings.profile_min_duration,
 )
 
 app.include_router(external_router)
+app.include_router(tiles_router)
+app.include_router(ingest_router)
+app.include_router(jobs_router)
+app.include_router(stations_router)
+app.include_router(soil_points_router)
+app.include_router(spatial_router)
+app.include_router(sites_router)
+app.include_router(export_router)
+app.include_router(validation_router)
+app.include_router(surfaces_router)
+app.include_router(fields_router)
 
 @app.get("/")
 async def root():
     return {"message": "Hello, Soil Moisturizing Data Hub!"}
+
+@app.get("/health/db", include_in_schema=False)
+async def db_health():
+    return pool_stats(app.state.db_engine)
@@ -0,0 +1,315 @@
+# backend/services/climatology.py
+"""Per-point decadal soil moisture climatology and anomaly (z-score) reads.
+
+`soil_climatology` keeps, for every (soil point, depth, source, decade of
+year), the count, mean and sum of squared deviations (M2) of all yearly
+values, so a z-score is one indexed lookup instead of a scan over every year.
+
+Loaders queue the touched (point, depth, source, year, decade of year) keys in
+`soil_climatology_dirty` (see `QUEUE_MANUAL_SQL` / `QUEUE_EXTERNAL_SQL`);
+`refresh` drains the queue in batches. A key whose queued years are all newer
+than its stored `last_year` is updated incrementally (the new values' mean/M2
+merged into the stored ones, Chan et al.); any other key (new, or a past year
+re-loaded) is rebuilt from its full history. Decade of year is
+(month - 1) * 3 + decade, 1..36.
+
+    python -m backend.services.climatology [--full]
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Tuple
+
+import asyncpg
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..ingest.bulk import copy_upsert
+from .quality import OK
+
+log = logging.getLogger(__name__)
+
+DEFAULT_BATCH = 20_000
+
+EXTERNAL_SOURCES = ("era5_land", "amsr2")
+
+TABLE = "soil_climatology"
+COLUMNS = ("soil_point_id", "depth", "source", "decade_of_year", "n", "mean", "m2", "first_year", "last_year", "updated_at")
+CONFLICT = "uq_soil_climatology"
+
+_QUEUE_SQL = (
+    "INSERT INTO soil_climatology_dirty (soil_point_id, depth, source, year, decade_of_year) "
+    "SELECT DISTINCT soil_point_id, depth, source, year, (month - 1) * 3 + decade FROM {source_table}{where} "
+    "ON CONFLICT DO NOTHING"
+)
+# Queue statements for bulk loaders (run against their staging table, see ingest.bulk.copy_upsert)
+QUEUE_MANUAL_SQL = _QUEUE_SQL.format(source_table="{staging}", where="")
+QUEUE_EXTERNAL_SQL = _QUEUE_SQL.format(source_table="{staging}", where=" WHERE variable = 'soil_moisture'")
+
+MARK_ALL_SQL = (
+    _QUEUE_SQL.format(source_table="soil_decadal_manual", where=""),
+    _QUEUE_SQL.format(source_table="soil_decadal_external", where=" WHERE variable = 'soil_moisture'"),
+)
+
+CLAIM_SQL = """
+    DELETE FROM soil_climatology_dirty WHERE (soil_point_id, depth, source, decade_of_year, year) IN (
+        SELECT soil_point_id, depth, source, decade_of_year, year FROM soil_climatology_dirty
+        ORDER BY soil_point_id, depth, source, decade_of_year, year
+        LIMIT $1 FOR UPDATE SKIP LOCKED
+    )
+    RETURNING soil_point_id, depth::text AS depth, source::text AS source, decade_of_year, year
+"""
+
+_KEYS = """
+    unnest($1::uuid[], $2::text[], $3::text[], $4::int[])
+        AS k(soil_point_id, depth, source, decade_of_year)
+"""
+
+# Row locks serialise concurrent refreshes of the same key
+STORED_SQL = f"""
+    SELECT c.soil_point_id, c.depth::text AS depth, c.source::text AS source, c.decade_of_year,
+           c.n, c.mean, c.m2, c.first_year, c.last_year
+    FROM soil_climatology c
+    JOIN {_KEYS} ON c.soil_point_id = k.soil_point_id AND c.depth = k.depth::depth_code
+                 AND c.source = k.source::source_type AND c.decade_of_year = k.decade_of_year
+    FOR UPDATE OF c
+"""
+
+# One probe per key (year NULL = the key's whole history), answered from the point indexes
+VALUES_SQL = f"""
+    SELECT k.idx, v.year, v.value
+    FROM unnest($1::int[], $2::uuid[], $3::text[], $4::text[], $5::int[], $6::int[])
+        AS k(idx, soil_point_id, depth, source, decade_of_year, year)
+    JOIN LATERAL (
+        SELECT m.year, m.value_mm AS value FROM soil_decadal_manual m
+        WHERE m.soil_point_id = k.soil_point_id AND m.depth = k.depth::depth_code
+          AND m.source = k.source::source_type
+          AND m.month = (k.decade_of_year - 1) / 3 + 1 AND m.decade = (k.decade_of_year - 1) % 3 + 1
+          AND (k.year IS NULL OR m.year = k.year)
+          AND (m.quality_flag IS NULL OR m.quality_flag = '{OK}')
+        UNION ALL
+        SELECT e.year, e.value FROM soil_decadal_external e
+        WHERE e.soil_point_id = k.soil_point_id AND e.depth = k.depth::depth_code
+          AND e.source = k.source::source_type AND e.variable = 'soil_moisture'
+          AND e.month = (k.decade_of_year - 1) / 3 + 1 AND e.decade = (k.decade_of_year - 1) % 3 + 1
+          AND (k.year IS NULL OR e.year = k.year)
+    ) v ON true
+"""
+
+DELETE_SQL = f"""
+    DELETE FROM soil_climatology c USING {_KEYS}
+    WHERE c.soil_point_id = k.soil_point_id AND c.depth = k.depth::depth_code
+      AND c.source = k.source::source_type AND c.decade_of_year = k.decade_of_year
+"""
+
+Key = Tuple[Any, str, str, int]
+
+
+def batch_moments(idx: np.ndarray, values: np.ndarray, years: np.ndarray, groups: int) -> Dict[str, np.ndarray]:
+    """Count, mean, M2 and year range per group index, two-pass for accuracy."""
+    n = np.bincount(idx, minlength=groups).astype(float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.bincount(idx, weights=values, minlength=groups) / n
+    mean = np.where(n > 0, mean, 0.0)
+    m2 = np.bincount(idx, weights=(values - mean[idx]) ** 2, minlength=groups)
+    first = np.full(groups, np.iinfo(np.int64).max, dtype=np.int64)
+    last = np.full(groups, np.iinfo(np.int64).min, dtype=np.int64)
+    np.minimum.at(first, idx, years)
+    np.maximum.at(last, idx, years)
+    return {"n": n, "mean": mean, "m2": m2, "first": first, "last": last}
+
+
+def merge_moments(a: Dict[str, np.ndarray], b: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Combine two sets of per-group moments (parallel variance formula); empty groups pass through."""
+    n = a["n"] + b["n"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        delta = b["mean"] - a["mean"]
+        mean = np.where(n > 0, a["mean"] + delta * b["n"] / n, 0.0)
+        m2 = np.where(n > 0, a["m2"] + b["m2"] + delta ** 2 * a["n"] * b["n"] / n, 0.0)
+    return {
+        "n": n, "mean": mean, "m2": m2,
+        "first": np.where(a["n"] > 0, np.where(b["n"] > 0, np.minimum(a["first"], b["first"]), a["first"]), b["first"]),
+        "last": np.where(a["n"] > 0, np.where(b["n"] > 0, np.maximum(a["last"], b["last"]), a["last"]), b["last"]),
+    }
+
+
+def _key_arrays(keys: List[Key]) -> Tuple[list, list, list, list]:
+    return [k[0] for k in keys], [k[1] for k in keys], [k[2] for k in keys], [k[3] for k in keys]
+
+
+async def _refresh_batch(conn: asyncpg.Connection, batch_size: int) -> Dict[str, int]:
+    claimed = await conn.fetch(CLAIM_SQL, batch_size)
+    if not claimed:
+        return {"claimed": 0, "keys": 0, "incremental": 0, "written": 0, "removed": 0}
+
+    queued: Dict[Key, List[int]] = {}
+    for r in claimed:
+        queued.setdefault((r["soil_point_id"], r["depth"], r["source"], r["decade_of_year"]), []).append(r["year"])
+    keys = list(queued)
+    position = {key: i for i, key in enumerate(keys)}
+
+    stored = {
+        (r["soil_point_id"], r["depth"], r["source"], r["decade_of_year"]): r
+        for r in await conn.fetch(STORED_SQL, *_key_arrays(keys))
+    }
+    incremental = [
+        key in stored and min(queued[key]) > stored[key]["last_year"] for key in keys
+    ]
+
+    probes: List[Tuple[int, Key, int | None]] = []
+    for i, key in enumerate(keys):
+        if incremental[i]:
+            probes.extend((i, key, year) for year in queued[key])
+        else:
+            probes.append((i, key, None))
+    rows = await conn.fetch(
+        VALUES_SQL,
+        [p[0] for p in probes], [p[1][0] for p in probes], [p[1][1] for p in probes],
+        [p[1][2] for p in probes], [p[1][3] for p in probes], [p[2] for p in probes],
+    )
+    idx = np.fromiter((r["idx"] for r in rows), dtype=np.int64, count=len(rows))
+    years = np.fromiter((r["year"] for r in rows), dtype=np.int64, count=len(rows))
+    values = np.fromiter((r["value"] for r in rows), dtype=float, count=len(rows))
+    finite = np.isfinite(values)
+    fresh = batch_moments(idx[finite], values[finite], years[finite], len(keys))
+
+    base = {name: np.zeros(len(keys), dtype=float if name in ("n", "mean", "m2") else np.int64)
+            for name in ("n", "mean", "m2", "first", "last")}
+    for key, r in stored.items():
+        i = position[key]
+        if incremental[i]:
+            base["n"][i], base["mean"][i], base["m2"][i] = r["n"], r["mean"], r["m2"]
+            base["first"][i], base["last"][i] = r["first_year"], r["last_year"]
+    total = merge_moments(base, fresh)
+
+    now = await conn.fetchval("SELECT now()")
+    records = [
+        (key[0], key[1], key[2], key[3], int(total["n"][i]), float(total["mean"][i]),
+         max(float(total["m2"][i]), 0.0), int(total["first"][i]), int(total["last"][i]), now)
+        for i, key in enumerate(keys) if total["n"][i] > 0
+    ]
+    written = await copy_upsert(
+        conn, TABLE, COLUMNS, records, conflict=CONFLICT,
+        update_columns=("n", "mean", "m2", "first_year", "last_year", "updated_at"),
+    ) if records else 0
+    empty = [key for i, key in enumerate(keys) if total["n"][i] == 0 and key in stored]
+    removed = 0
+    if empty:
+        status = await conn.execute(DELETE_SQL, *_key_arrays(empty))
+        removed = int(status.rsplit(" ", 1)[-1])
+    return {
+        "claimed": len(claimed), "keys": len(keys), "incremental": sum(incremental),
+        "written": written, "removed": removed,
+    }
+
+
+async def refresh(conn: asyncpg.Connection, *, full: bool = False, batch_size: int = DEFAULT_BATCH) -> Dict[str, object]:
+    started = time.perf_counter()
+    totals: Dict[str, Any] = {"claimed": 0, "keys": 0, "incremental": 0, "written": 0, "removed": 0, "batches": 0}
+    if full:
+        async with conn.transaction():
+            await conn.execute(f"TRUNCATE {TABLE}")
+            for statement in MARK_ALL_SQL:
+                await conn.execute(statement)
+    while True:
+        async with conn.transaction():
+            report = await _refresh_batch(conn, batch_size)
+        if not report["claimed"]:
+            break
+        for name, value in report.items():
+            totals[name] += value
+        totals["batches"] += 1
+    totals["elapsed_s"] = round(time.perf_counter() - started, 3)
+    return totals
+
+
+async def refresh_dirty(dsn: str, *, full: bool = False, batch_size: int = DEFAULT_BATCH) -> Dict[str, object]:
+    conn = await asyncpg.connect(dsn)
+    try:
+        report = await refresh(conn, full=full, batch_size=batch_size)
+    finally:
+        await conn.close()
+    log.info("soil_climatology refreshed: %s", report)
+    return report
+
+
+def decade_of_year(month: int, decade: int) -> int:
+    return (month - 1) * 3 + decade
+
+
+def _anomaly_sql(values_table: str, value_column: str, extra: str) -> Any:
+    return text(f"""
+        SELECT p.soil_point_id::text AS soil_point_id, p.code, p.name, p.lat, p.lon,
+               v.{value_column} AS value, c.mean, c.n,
+               CASE WHEN c.n > 1 THEN sqrt(c.m2 / (c.n - 1)) END AS std,
+               CASE WHEN c.n > 1 AND c.m2 > 0 THEN (v.{value_column} - c.mean) / sqrt(c.m2 / (c.n - 1)) END AS z
+        FROM {values_table} v
+        JOIN soil_climatology c
+          ON c.soil_point_id = v.soil_point_id AND c.depth = v.depth AND c.source = v.source
+         AND c.decade_of_year = :decade_of_year
+        JOIN soil_points p ON p.soil_point_id = v.soil_point_id
+        WHERE v.year = :year AND v.month = :month AND v.decade = :decade
+          AND v.depth = CAST(:depth AS depth_code) AND v.source = CAST(:source AS source_type){extra}
+          AND c.n >= :min_years
+        ORDER BY p.code
+    """)
+
+
+ANOMALY_MANUAL_SQL = _anomaly_sql(
+    "soil_decadal_manual", "value_mm", f" AND (v.quality_flag IS NULL OR v.quality_flag = '{OK}')"
+)
+ANOMALY_EXTERNAL_SQL = _anomaly_sql("soil_decadal_external", "value", " AND v.variable = 'soil_moisture'")
+
+
+def _round(value: Any, digits: int) -> Any:
+    return None if value is None else round(float(value), digits)
+
+
+async def anomaly_map(
+    session: AsyncSession,
+    *,
+    year: int,
+    month: int,
+    decade: int,
+    depth: str,
+    source: str,
+    min_years: int = 5,
+) -> Dict[str, Any]:
+    """Value, climatological mean/std and z-score at every point with data for that decade."""
+    statement = ANOMALY_EXTERNAL_SQL if source in EXTERNAL_SOURCES else ANOMALY_MANUAL_SQL
+    doy = decade_of_year(month, decade)
+    rows = (await session.execute(statement.execution_options(metrics_label="climatology:anomaly"), {
+        "year": year, "month": month, "decade": decade, "decade_of_year": doy,
+        "depth": depth, "source": source, "min_years": min_years,
+    })).mappings().all()
+    items = [
+        {
+            "soil_point_id": r["soil_point_id"], "code": r["code"], "name": r["name"],
+            "lat": r["lat"], "lon": r["lon"], "value": _round(r["value"], 4),
+            "mean": _round(r["mean"], 4), "std": _round(r["std"], 4), "z": _round(r["z"], 3), "n": r["n"],
+        }
+        for r in rows
+    ]
+    return {
+        "year": year, "month": month, "decade": decade, "decade_of_year": doy,
+        "depth": depth, "source": source, "count": len(items), "items": items,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    from ..db.config import DatabaseSettings
+    from ..db.session import asyncpg_dsn
+
+    parser = argparse.ArgumentParser(description="Refresh the soil_climatology table")
+    parser.add_argument("--full", action="store_true", help="rebuild every key, not only queued ones")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    asyncio.run(refresh_dirty(asyncpg_dsn(DatabaseSettings().url), full=args.full, batch_size=args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+# backend/services/comparison.py
+"""Manual vs. gridded (ERA5-Land / AMSR2) soil moisture comparison.
+
+Manual decades (`soil_decadal_manual.value_mm`) and external decades
+(`soil_decadal_external.value`) are aligned in SQL on
+(soil_point_id, year, month, decade, depth) and shipped back as a handful of
+arrays; bias, RMSE, unbiased RMSE and Pearson r are then computed for every
+(point, depth) at once from bincount sums. External volumetric values (m3/m3)
+are converted to mm of water in the layer before comparing.
+
+Results are cached per (source, depth, years, min_samples) and dropped when
+either table, or `soil_points`, changes (NOTIFY, see backend.db.notify).
+"""
+from __future__ import annotations
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .quality import OK
+
+DEPENDS_ON = ("soil_decadal_manual", "soil_decadal_external", "soil_points")
+
+# Layer thickness used to turn m3/m3 into mm of water
+LAYER_MM = {"0-20": 200.0, "0-50": 500.0, "0-100": 1000.0}
+VOLUMETRIC_UNITS = ("m3/m3", "m³/m³", "fraction")
+
+ALIGNED_SQL = text(f"""
+    SELECT array_agg(m.soil_point_id::text) AS point_ids,
+           array_agg(p.code) AS codes,
+           array_agg(m.depth::text) AS depths,
+           array_agg(m.value_mm) AS manual,
+           array_agg(
+               CASE WHEN e.units IN ({", ".join(f"'{u}'" for u in VOLUMETRIC_UNITS)})
+                    THEN e.value * CASE m.depth::text
+                        {" ".join(f"WHEN '{d}' THEN {mm}" for d, mm in LAYER_MM.items())} END
+                    ELSE e.value END
+           ) AS external
+    FROM soil_decadal_manual m
+    JOIN soil_decadal_external e
+      ON e.soil_point_id = m.soil_point_id
+     AND e.year = m.year AND e.month = m.month AND e.decade = m.decade
+     AND e.depth = m.depth
+    JOIN soil_points p ON p.soil_point_id = m.soil_point_id
+    WHERE e.source = CAST(:source AS source_type)
+      AND e.variable = 'soil_moisture'
+      AND (m.quality_flag IS NULL OR m.quality_flag = '{OK}')
+      AND (CAST(:depth AS text) IS NULL OR m.depth = CAST(:depth AS depth_code))
+      AND (CAST(:year_from AS integer) IS NULL OR (m.year >= :year_from AND e.year >= :year_from))
+      AND (CAST(:year_to AS integer) IS NULL OR (m.year <= :year_to AND e.year <= :year_to))
+""")
+
+ComparisonKey = Tuple[str, Optional[str], Optional[int], Optional[int], int]
+
+
+@dataclass(frozen=True)
+class Aligned:
+    point_ids: np.ndarray
+    codes: np.ndarray
+    depths: np.ndarray
+    manual: np.ndarray
+    external: np.ndarray
+
+
+async def load_aligned(
+    session: AsyncSession, source: str, depth: str | None, year_from: int | None, year_to: int | None
+) -> Aligned:
+    row = (await session.execute(ALIGNED_SQL, {
+        "source": source, "depth": depth, "year_from": year_from, "year_to": year_to,
+    })).one()
+    return Aligned(
+        point_ids=np.asarray(row.point_ids or [], dtype=object),
+        codes=np.asarray(row.codes or [], dtype=object),
+        depths=np.asarray(row.depths or [], dtype=object),
+        manual=np.asarray(row.manual or [], dtype=float),
+        external=np.asarray(row.external or [], dtype=float),
+    )
+
+
+def _scores(n, sum_m, sum_e, sum_mm, sum_ee, sum_me, sum_dd) -> Dict[str, np.ndarray]:
+    """Scores from per-group sums (arrays or scalars); NaN where undefined."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_m = sum_m / n
+        mean_e = sum_e / n
+        bias = mean_e - mean_m
+        rmse = np.sqrt(sum_dd / n)
+        ubrmse = np.sqrt(np.maximum(sum_dd / n - bias ** 2, 0.0))
+        cov = sum_me / n - mean_m * mean_e
+        var_m = np.maximum(sum_mm / n - mean_m ** 2, 0.0)
+        var_e = np.maximum(sum_ee / n - mean_e ** 2, 0.0)
+        r = cov / np.sqrt(var_m * var_e)
+    return {"mean_manual": mean_m, "mean_external": mean_e, "bias": bias, "rmse": rmse, "ubrmse": ubrmse, "r": r}
+
+
+def _clean(value: Any) -> Any:
+    value = float(value)
+    return None if not np.isfinite(value) else round(value, 4)
+
+
+def compute(aligned: Aligned, *, min_samples: int = 3) -> Dict[str, Any]:
+    """Per (point, depth) and overall scores in one vectorised pass."""
+    m, e = aligned.manual, aligned.external
+    valid = np.isfinite(m) & np.isfinite(e)
+    m, e = m[valid], e[valid]
+    keys = np.char.add(np.char.add(aligned.point_ids[valid].astype(str), "|"), aligned.depths[valid].astype(str))
+    groups, index = np.unique(keys, return_inverse=True)
+    codes = aligned.codes[valid]
+    d = e - m
+
+    def sums(weights: np.ndarray) -> np.ndarray:
+        return np.bincount(index, weights=weights, minlength=len(groups))
+
+    n = np.bincount(index, minlength=len(groups)).astype(float)
+    per_group = _scores(n, sums(m), sums(e), sums(m * m), sums(e * e), sums(m * e), sums(d * d))
+    first = np.zeros(len(groups), dtype=np.int64)
+    first[index[::-1]] = np.arange(len(index))[::-1]  # first row of each group, for its code
+
+    points: List[Dict[str, Any]] = []
+    for g, key in enumerate(groups):
+        if n[g] < min_samples:
+            continue
+        point_id, depth = key.split("|")
+        points.append({
+            "soil_point_id": point_id,
+            "code": codes[first[g]],
+            "depth": depth,
+            "n": int(n[g]),
+            **{name: _clean(values[g]) for name, values in per_group.items()},
+        })
+
+    total = len(d)
+    overall = _scores(
+        float(total), m.sum(), e.sum(), (m * m).sum(), (e * e).sum(), (m * e).sum(), (d * d).sum()
+    ) if total else {}
+    return {
+        "summary": {
+            "n": total,
+            "points": len(points),
+            **{name: _clean(value) for name, value in overall.items()},
+        },
+        "points": points,
+    }
+
+
+async def compare(
+    session: AsyncSession,
+    *,
+    source: str,
+    depth: str | None = None,
+    year_from: int | None = None,
+    year_to: int | None = None,
+    min_samples: int = 3,
+) -> Dict[str, Any]:
+    started = time.perf_counter()
+    aligned = await load_aligned(session, source, depth, year_from, year_to)
+    result = await asyncio.to_thread(compute, aligned, min_samples=min_samples)
+    result["elapsed_s"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+class ComparisonCache:
+    """Small LRU of comparison results, dropped wholesale when a source table changes.
+
+    Same generation scheme as the tile cache: a result computed while the data
+    changed is not stored.
+    """
+    def __init__(self, *, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._results: "OrderedDict[ComparisonKey, Dict[str, Any]]" = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, key: ComparisonKey) -> Dict[str, Any] | None:
+        with self._lock:
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+                self.hits += 1
+                return result
+        self.misses += 1
+        return None
+
+    def put(self, key: ComparisonKey, result: Dict[str, Any], generation: int) -> None:
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._results[key] = result
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+
+    def invalidate_table(self, table: str) -> None:
+        if table in DEPENDS_ON:
+            with self._lock:
+                self._generation += 1
+                self._results.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._results), "generation": self._generation, "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,275 @@
+# backend/services/export.py
+"""Streaming export of measurement series as Parquet, Arrow IPC stream or CSV.
+
+Rows come from a server-side cursor in batches; every batch becomes one Parquet
+row group / Arrow record batch / CSV chunk and is handed to the client right
+away, so memory stays bounded by the batch size whatever the result size.
+"""
+from __future__ import annotations
+import asyncio
+import csv
+import datetime as dt
+import io
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+FORMATS: Dict[str, Tuple[str, str]] = {
+    # format -> (media type, file extension)
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+}
+
+DECADE_PERIOD = "(year, month, decade)"
+
+# Labels of the enum types filtered on; values are checked here so a typo is a 422, not a cast error
+ENUM_LABELS: Dict[str, Tuple[str, ...]] = {
+    "source_type": ("kazhydromet", "uni", "manual", "era5_land", "amsr2"),
+    "depth_code": ("0-20", "0-50", "0-100"),
+}
+
+
+@dataclass(frozen=True)
+class Dataset:
+    table: str
+    # (output name, SQL expression, arrow type name)
+    columns: Tuple[Tuple[str, str, str], ...]
+    order_by: str
+    # filter name -> (column, SQL array element type the values are cast to)
+    filters: Dict[str, Tuple[str, str]]
+    # "date" (daily rows) or "decade" ((year, month, decade) rows)
+    period: str
+
+
+DATASETS: Dict[str, Dataset] = {
+    "meteo_daily": Dataset(
+        table="meteo_daily",
+        columns=(
+            ("station_id", "station_id::text", "string"),
+            ("date", "date", "date32"),
+            ("air_temp_avg_c", "air_temp_avg_c", "float64"),
+            ("air_temp_max_c", "air_temp_max_c", "float64"),
+            ("air_temp_min_c", "air_temp_min_c", "float64"),
+            ("rel_humidity", "rel_humidity", "float64"),
+            ("precipitation_mm", "precipitation_mm", "float64"),
+            ("source", "source::text", "string"),
+        ),
+        order_by="station_id, date",
+        filters={"station_id": ("station_id", "uuid"), "source": ("source", "source_type")},
+        period="date",
+    ),
+    "meteo_decadal": Dataset(
+        table="meteo_decadal",
+        columns=(
+            ("station_id", "station_id::text", "string"),
+            ("year", "year", "int16"),
+            ("month", "month", "int8"),
+            ("decade", "decade", "int8"),
+            ("precipitation_sum_mm", "precipitation_sum_mm", "float64"),
+            ("air_temp_avg_c", "air_temp_avg_c", "float64"),
+            ("air_temp_max_c", "air_temp_max_c", "float64"),
+            ("air_temp_min_c", "air_temp_min_c", "float64"),
+            ("rel_humidity_avg", "rel_humidity_avg", "float64"),
+            ("days_count", "days_count", "int16"),
+        ),
+        order_by="station_id, year, month, decade",
+        filters={"station_id": ("station_id", "uuid")},
+        period="decade",
+    ),
+    "soil_decadal_manual": Dataset(
+        table="soil_decadal_manual",
+        columns=(
+            ("soil_point_id", "soil_point_id::text", "string"),
+            ("year", "year", "int16"),
+            ("month", "month", "int8"),
+            ("decade", "decade", "int8"),
+            ("depth", "depth::text", "string"),
+            ("value_mm", "value_mm", "float64"),
+            ("value_frac", "value_frac", "float64"),
+            ("quality_flag", "quality_flag", "string"),
+            ("source", "source::text", "string"),
+        ),
+        order_by="soil_point_id, year, month, decade, depth",
+        filters={
+            "soil_point_id": ("soil_point_id", "uuid"), "source": ("source", "source_type"),
+            "depth": ("depth", "depth_code"),
+        },
+        period="decade",
+    ),
+    "soil_decadal_external": Dataset(
+        table="soil_decadal_external",
+        columns=(
+            ("soil_point_id", "soil_point_id::text", "string"),
+            ("year", "year", "int16"),
+            ("month", "month", "int8"),
+            ("decade", "decade", "int8"),
+            ("depth", "depth::text", "string"),
+            ("variable", "variable::text", "string"),
+            ("value", "value", "float64"),
+            ("units", "units", "string"),
+            ("source", "source::text", "string"),
+        ),
+        order_by="soil_point_id, year, month, decade, depth",
+        filters={
+            "soil_point_id": ("soil_point_id", "uuid"), "source": ("source", "source_type"),
+            "depth": ("depth", "depth_code"),
+        },
+        period="decade",
+    ),
+}
+
+
+def decade_of(day: dt.date) -> Tuple[int, int, int]:
+    return day.year, day.month, min((day.day - 1) // 10 + 1, 3)
+
+
+def build_query(
+    dataset: Dataset,
+    filters: Dict[str, Sequence[Any] | None],
+    date_from: dt.date | None,
+    date_to: dt.date | None,
+) -> Tuple[str, Dict[str, Any]]:
+    where: List[str] = []
+    params: Dict[str, Any] = {}
+    for name, values in filters.items():
+        if not values:
+            continue
+        if name not in dataset.filters:
+            raise ValueError(f"Filter {name!r} is not supported for {dataset.table}")
+        column, sql_type = dataset.filters[name]
+        params[name] = [str(v) for v in values]
+        unknown = sorted(set(params[name]) - set(ENUM_LABELS.get(sql_type, params[name])))
+        if unknown:
+            raise ValueError(f"Unknown {name} {unknown}; expected any of {list(ENUM_LABELS[sql_type])}")
+        # compared as the column's own type, so its index (e.g. idx_meteo_daily_source) stays usable
+        where.append(f"{column} = ANY(CAST(:{name} AS {sql_type}[]))")
+    if dataset.period == "date":
+        if date_from:
+            where.append("date >= :date_from")
+            params["date_from"] = date_from
+        if date_to:
+            where.append("date <= :date_to")
+            params["date_to"] = date_to
+    else:
+        if date_from:
+            where.append(f"{DECADE_PERIOD} >= (:y0, :m0, :d0)")
+            params.update(zip(("y0", "m0", "d0"), decade_of(date_from)))
+        if date_to:
+            where.append(f"{DECADE_PERIOD} <= (:y1, :m1, :d1)")
+            params.update(zip(("y1", "m1", "d1"), decade_of(date_to)))
+    select_list = ", ".join(f"{expr} AS {name}" for name, expr, _ in dataset.columns)
+    sql = f"SELECT {select_list} FROM {dataset.table} t"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    # Qualified, so ORDER BY uses the table columns (and their index), not the text aliases
+    order_by = ", ".join(f"t.{column.strip()}" for column in dataset.order_by.split(","))
+    return sql + f" ORDER BY {order_by}", params
+
+
+async def iter_batches(
+    engine: AsyncEngine, sql: str, params: Dict[str, Any], batch_size: int
+) -> AsyncIterator[List[Tuple[Any, ...]]]:
+    """Server-side cursor, `batch_size` rows at a time."""
+    async with engine.connect() as conn:
+        result = await conn.stream(text(sql).execution_options(yield_per=batch_size), params)
+        async for partition in result.partitions(batch_size):
+            yield [tuple(row) for row in partition]
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that keeps what was written until `drain()`."""
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._pos += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+def _arrow_schema(dataset: Dataset):
+    import pyarrow as pa
+
+    return pa.schema([(name, getattr(pa, type_name)()) for name, _, type_name in dataset.columns])
+
+
+def _record_batch(schema, rows: List[Tuple[Any, ...]]):
+    import pyarrow as pa
+
+    columns = list(zip(*rows)) if rows else [[] for _ in schema]
+    return pa.RecordBatch.from_arrays(
+        [pa.array(col, type=field.type) for col, field in zip(columns, schema)], schema=schema
+    )
+
+
+async def stream_export(
+    engine: AsyncEngine, dataset: Dataset, fmt: str, sql: str, params: Dict[str, Any], batch_size: int
+) -> AsyncIterator[bytes]:
+    batches = iter_batches(engine, sql, params, batch_size)
+    names = [name for name, _, _ in dataset.columns]
+
+    # encoding (and Parquet's zstd) is CPU work; it runs in a thread, one batch at a time
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(names)
+
+        def encode_csv(rows: List[Tuple[Any, ...]]) -> bytes:
+            writer.writerows(rows)
+            chunk = buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            return chunk
+
+        async for rows in batches:
+            yield await asyncio.to_thread(encode_csv, rows)
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+        return
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _arrow_schema(dataset)
+    sink = _ChunkSink()
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+        write = lambda batch: writer.write_batch(batch, row_group_size=batch_size)  # noqa: E731
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+        write = writer.write_batch
+
+    def encode(rows: List[Tuple[Any, ...]]) -> bytes:
+        write(_record_batch(schema, rows))
+        return sink.drain()
+
+    def finish() -> bytes:
+        writer.close()
+        return sink.drain()
+
+    try:
+        async for rows in batches:
+            chunk = await asyncio.to_thread(encode, rows)
+            if chunk:
+                yield chunk
+    except BaseException:
+        writer.close()
+        raise
+    tail = await asyncio.to_thread(finish)
+    if tail:
+        yield tail
@@ -0,0 +1,340 @@
+# backend/services/field_mirror.py
+"""Mirror upstream (VKU) fields into the local `fields` / `plots` tables.
+
+A sync pass reads `/fields/list`, compares each item's hash with the stored
+`list_hash` and fetches `/field/get/{id}` only for new or changed fields (and
+for fields whose geometry never arrived). A field's geometry is replaced only
+when the payload hash changed too. Fields gone from the list are deleted.
+The upstream calls use the service token, so the mirror holds what the
+service account sees; requests carrying a user's own token bypass it.
+
+    python -m backend.services.field_mirror
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import datetime as dt
+import hashlib
+import json
+import logging
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..api.client import ExternalAPIClient
+from ..api.jsonlib import dumps, loads
+
+log = logging.getLogger(__name__)
+
+LIST_COLUMNS = (
+    "name", "date_created", "latitude_center", "longitude_center", "altitude_center",
+    "file_path", "user_id", "plot_count",
+)
+
+UPSERT_FIELD_SQL = text(f"""
+    INSERT INTO fields (field_id, {", ".join(LIST_COLUMNS)}, list_hash, listed_at)
+    VALUES (:field_id, {", ".join(":" + c for c in LIST_COLUMNS)}, :list_hash, now())
+    ON CONFLICT (field_id) DO UPDATE SET
+        {", ".join(f"{c} = EXCLUDED.{c}" for c in LIST_COLUMNS)},
+        listed_at = EXCLUDED.listed_at
+""")  # list_hash of an existing row moves only once its payload was fetched, so failed fetches are retried
+
+INSERT_PLOT_SQL = text("""
+    INSERT INTO plots (field_id, position, feature_id, properties, geom)
+    VALUES (:field_id, :position, :feature_id, CAST(:properties AS jsonb),
+            ST_MakeValid(ST_SetSRID(ST_GeomFromGeoJSON(:geometry), 4326)))
+""")
+
+# Field footprint = union of the polygonal parts of its features
+FIELD_GEOM_SQL = text("""
+    UPDATE fields f SET
+        geom = (
+            SELECT ST_Multi(ST_CollectionExtract(ST_Union(p.geom), 3))
+            FROM plots p WHERE p.field_id = f.field_id
+        ),
+        list_hash = :list_hash,
+        payload_hash = :payload_hash,
+        geometry_synced_at = now()
+    WHERE f.field_id = :field_id
+""")
+
+CONFIRM_SQL = text("UPDATE fields SET list_hash = :list_hash WHERE field_id = :field_id")
+
+SOIL_POINTS_WITHIN_SQL = text("""
+    SELECT p.soil_point_id::text AS id, p.code, p.name, p.lat, p.lon
+    FROM soil_points p
+    WHERE EXISTS (
+        SELECT 1 FROM unnest(CAST(:geometries AS text[])) AS g(geojson)
+        WHERE ST_Intersects(ST_MakeValid(ST_SetSRID(ST_GeomFromGeoJSON(g.geojson), 4326)), p.geom)
+    )
+    ORDER BY p.code
+""")
+
+DELETE_MISSING_SQL = text("DELETE FROM fields WHERE NOT (field_id = ANY(CAST(:ids AS integer[])))")
+
+
+def content_hash(value: Any) -> str:
+    canonical = json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _list_params(item: Dict[str, Any]) -> Dict[str, Any]:
+    params = {c: item.get(c) for c in LIST_COLUMNS}
+    created = params["date_created"]
+    if isinstance(created, str):
+        created = dt.datetime.fromisoformat(created.replace("Z", "+00:00"))
+    if isinstance(created, dt.datetime) and created.tzinfo is None:
+        created = created.replace(tzinfo=dt.timezone.utc)
+    params["date_created"] = created
+    return {"field_id": int(item["id"]), **params, "list_hash": content_hash(item)}
+
+
+@dataclass
+class SyncReport:
+    listed: int = 0
+    changed: int = 0
+    geometries_updated: int = 0
+    unchanged_payloads: int = 0
+    deleted: int = 0
+    failed: Dict[int, str] = field(default_factory=dict)
+    elapsed_s: float = 0.0
+    finished_at: Optional[str] = None
+
+
+async def sync_once(
+    api: ExternalAPIClient,
+    sessionmaker: async_sessionmaker[AsyncSession],
+    *,
+    concurrency: int | None = None,
+    delete_missing: bool = True,
+) -> SyncReport:
+    report = SyncReport()
+    started = time.perf_counter()
+    items = await api.get_fields_list()
+    report.listed = len(items)
+    incoming = {int(item["id"]): _list_params(item) for item in items}
+
+    async with sessionmaker() as session:
+        rows = (await session.execute(text(
+            "SELECT field_id, list_hash, payload_hash FROM fields"
+        ))).all()
+    stored = {r.field_id: (r.list_hash, r.payload_hash) for r in rows}
+    to_fetch = [
+        fid for fid, params in incoming.items()
+        if fid not in stored or stored[fid][0] != params["list_hash"] or stored[fid][1] is None
+    ]
+    report.changed = len(to_fetch)
+
+    async with sessionmaker() as session:
+        if delete_missing and incoming:  # an empty list is more likely an upstream glitch
+            deleted = await session.execute(DELETE_MISSING_SQL, {"ids": list(incoming)})
+            report.deleted = deleted.rowcount
+        if to_fetch:
+            await session.execute(UPSERT_FIELD_SQL, [incoming[fid] for fid in to_fetch])
+        await session.commit()
+
+    async for field_id, result in api.iter_fields(to_fetch, concurrency=concurrency):
+        if isinstance(result, Exception):
+            report.failed[field_id] = str(getattr(result, "detail", None) or repr(result))
+            continue
+        list_hash = incoming[field_id]["list_hash"]
+        payload_hash = content_hash(result)
+        async with sessionmaker() as session:
+            try:
+                if stored.get(field_id, (None, None))[1] == payload_hash:
+                    await session.execute(CONFIRM_SQL, {"field_id": field_id, "list_hash": list_hash})
+                    unchanged = True
+                else:
+                    await store_geometry(session, field_id, result, list_hash=list_hash, payload_hash=payload_hash)
+                    unchanged = False
+                await session.commit()
+            except (SQLAlchemyError, KeyError, TypeError, ValueError) as exc:
+                # one bad geometry (invalid GeoJSON, a feature without coordinates) must not end the pass
+                await session.rollback()
+                report.failed[field_id] = repr(exc)
+                log.warning("field %s: storing geometry failed", field_id, exc_info=True)
+                continue
+        if unchanged:
+            report.unchanged_payloads += 1
+        else:
+            report.geometries_updated += 1
+
+    report.elapsed_s = round(time.perf_counter() - started, 3)
+    report.finished_at = dt.datetime.now(dt.timezone.utc).isoformat()
+    return report
+
+
+async def store_geometry(
+    session: AsyncSession, field_id: int, collection: Dict[str, Any], *, list_hash: str, payload_hash: str
+) -> None:
+    await session.execute(text("DELETE FROM plots WHERE field_id = :field_id"), {"field_id": field_id})
+    plots = [
+        {
+            "field_id": field_id,
+            "position": position,
+            "feature_id": None if feature.get("id") is None else str(feature["id"]),
+            "properties": dumps(feature.get("properties") or {}).decode("utf-8"),
+            "geometry": dumps(feature["geometry"]).decode("utf-8"),
+        }
+        for position, feature in enumerate(collection.get("features") or [])
+        if feature.get("geometry")
+    ]
+    if plots:
+        await session.execute(INSERT_PLOT_SQL, plots)
+    await session.execute(FIELD_GEOM_SQL, {"field_id": field_id, "list_hash": list_hash, "payload_hash": payload_hash})
+
+
+async def soil_points_within(session: AsyncSession, collection: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Our soil points inside any feature of a FeatureCollection (e.g. one fetched with a user token)."""
+    geometries = [
+        dumps(feature["geometry"]).decode("utf-8")
+        for feature in collection.get("features") or []
+        if isinstance(feature, dict) and feature.get("geometry")
+    ]
+    if not geometries:
+        return []
+    rows = (await session.execute(SOIL_POINTS_WITHIN_SQL, {"geometries": geometries})).mappings().all()
+    return [dict(r) for r in rows]
+
+
+class FieldMirror:
+    """Periodic sync task plus the read side used by the `/external/field*` routes."""
+    def __init__(
+        self,
+        api: ExternalAPIClient,
+        sessionmaker: async_sessionmaker[AsyncSession],
+        *,
+        interval: float = 300.0,
+        concurrency: int | None = None,
+    ):
+        self.api = api
+        self.sessionmaker = sessionmaker
+        self.interval = interval
+        self.concurrency = concurrency
+        self.last_report: SyncReport | None = None
+        self.last_error: str | None = None
+        self._task: asyncio.Task | None = None
+        self._wake = asyncio.Event()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="field-mirror")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            task, self._task = self._task, None
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def trigger(self) -> None:
+        """Run the next sync now instead of waiting for the interval."""
+        self._wake.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                self.last_report = await sync_once(self.api, self.sessionmaker, concurrency=self.concurrency)
+                self.last_error = None
+                log.info("field mirror synced: %s", asdict(self.last_report))
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self.last_error = repr(exc)
+                log.warning("field mirror sync failed", exc_info=True)
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "interval": self.interval,
+            "last_report": asdict(self.last_report) if self.last_report else None,
+            "last_error": self.last_error,
+        }
+
+    async def fields_list(self) -> List[Dict[str, Any]] | None:
+        """Mirrored `/fields/list`, or None before the first sync."""
+        async with self.sessionmaker() as session:
+            rows = (await session.execute(text(f"""
+                SELECT field_id AS id, {", ".join(LIST_COLUMNS)} FROM fields ORDER BY field_id
+            """))).mappings().all()
+        if not rows and self.last_report is None:
+            return None
+        return [dict(r) for r in rows]
+
+    async def field(self, field_id: int) -> Dict[str, Any] | None:
+        """Mirrored `/field/get/{id}` FeatureCollection, or None if the geometry is not mirrored."""
+        async with self.sessionmaker() as session:
+            synced = (await session.execute(text(
+                "SELECT geometry_synced_at IS NOT NULL FROM fields WHERE field_id = :field_id"
+            ), {"field_id": field_id})).scalar()
+            if not synced:
+                return None
+            rows = (await session.execute(text("""
+                SELECT feature_id, properties, ST_AsGeoJSON(geom)::text AS geometry
+                FROM plots WHERE field_id = :field_id ORDER BY position
+            """), {"field_id": field_id})).all()
+        features = []
+        for r in rows:
+            feature: Dict[str, Any] = {"type": "Feature", "properties": r.properties, "geometry": loads(r.geometry)}
+            if r.feature_id is not None:
+                feature["id"] = int(r.feature_id) if r.feature_id.isdigit() else r.feature_id
+            features.append(feature)
+        return {"type": "FeatureCollection", "features": features}
+
+    async def soil_points(self, field_id: int) -> List[Dict[str, Any]] | None:
+        """Our soil points inside the mirrored field footprint."""
+        async with self.sessionmaker() as session:
+            exists = (await session.execute(text(
+                "SELECT geom IS NOT NULL FROM fields WHERE field_id = :field_id"
+            ), {"field_id": field_id})).scalar()
+            if not exists:
+                return None
+            rows = (await session.execute(text("""
+                SELECT p.soil_point_id::text AS id, p.code, p.name, p.lat, p.lon
+                FROM fields f
+                JOIN soil_points p ON ST_Intersects(f.geom, p.geom)
+                WHERE f.field_id = :field_id
+                ORDER BY p.code
+            """), {"field_id": field_id})).mappings().all()
+        return [dict(r) for r in rows]
+
+
+def main(argv: list[str] | None = None) -> None:
+    from ..api.config import ExternalAPISettings
+    from ..db.config import DatabaseSettings
+    from ..db.session import create_engine, create_sessionmaker
+
+    parser = argparse.ArgumentParser(description="Sync upstream fields into the local mirror once")
+    parser.add_argument("--concurrency", type=int, default=None)
+    parser.add_argument("--keep-missing", action="store_true", help="do not delete fields gone from the list")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    async def run() -> None:
+        engine = create_engine(DatabaseSettings())
+        api = await ExternalAPIClient(ExternalAPISettings()).open()
+        try:
+            report = await sync_once(
+                api, create_sessionmaker(engine), concurrency=args.concurrency, delete_missing=not args.keep_missing,
+            )
+            log.info("field mirror synced: %s", asdict(report))
+        finally:
+            await api.aclose()
+            await engine.dispose()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+# backend/services/geojson.py
+"""Compact GeoJSON for field payloads: simplification, coordinate quantization, TopoJSON.
+
+- `simplify_geometry` drops vertices below one screen pixel at a zoom level
+  (Douglas-Peucker or Visvalingam-Whyatt), keeping every ring closed and at
+  least a triangle;
+- `quantize_geometry` rounds coordinates to `precision` decimals and drops the
+  repeated vertices that rounding creates;
+- `to_topojson` encodes a FeatureCollection as a TopoJSON Topology, so a border
+  shared by two plots is stored once as an arc (delta-encoded integers).
+"""
+from __future__ import annotations
+import heapq
+import math
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+Coords = List[List[float]]
+Simplifier = Callable[[np.ndarray, float], np.ndarray]
+
+TILE_SIZE = 256
+MIN_RING = 4  # closed triangle
+
+
+def zoom_tolerance(zoom: int) -> float:
+    """One screen pixel at `zoom`, in degrees (at the equator, 256 px tiles)."""
+    return 360.0 / (TILE_SIZE * 2 ** zoom)
+
+
+def douglas_peucker(points: np.ndarray, tolerance: float) -> np.ndarray:
+    """Keep-mask for an open line; iterative, distances vectorised per segment."""
+    n = len(points)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        a, b = points[start], points[end]
+        inner = points[start + 1:end]
+        ab = b - a
+        length = math.hypot(ab[0], ab[1])
+        if length == 0.0:
+            dist = np.hypot(inner[:, 0] - a[0], inner[:, 1] - a[1])
+        else:
+            dist = np.abs(ab[0] * (inner[:, 1] - a[1]) - ab[1] * (inner[:, 0] - a[0])) / length
+        i = int(np.argmax(dist))
+        if dist[i] > tolerance:
+            split = start + 1 + i
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return keep
+
+
+def visvalingam(points: np.ndarray, tolerance: float) -> np.ndarray:
+    """Keep-mask for an open line: drop vertices whose effective area is below tolerance²."""
+    n = len(points)
+    keep = np.ones(n, dtype=bool)
+    if n < 3:
+        return keep
+    min_area = tolerance * tolerance
+    prev = list(range(-1, n - 1))
+    nxt = list(range(1, n + 1))
+
+    def area(i: int) -> float:
+        (x1, y1), (x2, y2), (x3, y3) = points[prev[i]], points[i], points[nxt[i]]
+        return abs((x2 - x1) * (y3 - y1) - (x3 - x1) * (y2 - y1)) / 2.0
+
+    areas = [math.inf] * n
+    heap: List[Tuple[float, int]] = []
+    for i in range(1, n - 1):
+        areas[i] = area(i)
+        heap.append((areas[i], i))
+    heapq.heapify(heap)
+    while heap:
+        a, i = heapq.heappop(heap)
+        if not keep[i] or a != areas[i]:
+            continue  # stale heap entry
+        if a >= min_area:
+            break
+        keep[i] = False
+        p, q = prev[i], nxt[i]
+        nxt[p], prev[q] = q, p
+        for j in (p, q):
+            if 0 < j < n - 1:
+                # never let a neighbour's area drop below the one just removed
+                areas[j] = max(area(j), a)
+                heapq.heappush(heap, (areas[j], j))
+    return keep
+
+
+SIMPLIFIERS: Dict[str, Simplifier] = {"dp": douglas_peucker, "visvalingam": visvalingam}
+
+
+def _simplify_line(coords: Coords, tolerance: float, simplifier: Simplifier, *, ring: bool) -> Coords:
+    points = np.asarray(coords, dtype=float)
+    if len(points) <= (MIN_RING if ring else 2):
+        return coords
+    if ring:
+        # A closed ring has no chord to measure against: split it at the vertex farthest from the start
+        far = int(np.argmax(np.hypot(points[:, 0] - points[0, 0], points[:, 1] - points[0, 1])))
+        far = min(max(far, 1), len(points) - 2)
+        keep = np.concatenate([
+            simplifier(points[:far + 1], tolerance)[:-1],
+            simplifier(points[far:], tolerance),
+        ])
+        if keep.sum() < MIN_RING:
+            keep[np.linspace(0, len(points) - 1, MIN_RING).round().astype(int)] = True
+    else:
+        keep = simplifier(points, tolerance)
+    return points[keep].tolist()
+
+
+def _map_lines(geometry: Dict[str, Any], fn: Callable[[Coords, bool], Coords]) -> Dict[str, Any]:
+    kind = geometry["type"]
+    coords = geometry.get("coordinates")
+    if kind == "Polygon":
+        coords = [fn(ring, True) for ring in coords]
+    elif kind == "MultiPolygon":
+        coords = [[fn(ring, True) for ring in polygon] for polygon in coords]
+    elif kind == "LineString":
+        coords = fn(coords, False)
+    elif kind == "MultiLineString":
+        coords = [fn(line, False) for line in coords]
+    elif kind == "GeometryCollection":
+        return {**geometry, "geometries": [_map_lines(g, fn) for g in geometry["geometries"]]}
+    return {**geometry, "coordinates": coords}
+
+
+def simplify_geometry(geometry: Dict[str, Any], tolerance: float, method: str = "dp") -> Dict[str, Any]:
+    simplifier = SIMPLIFIERS[method]
+    return _map_lines(geometry, lambda line, ring: _simplify_line(line, tolerance, simplifier, ring=ring))
+
+
+def _quantize_line(coords: Coords, precision: int, ring: bool) -> Coords:
+    rounded = np.round(np.asarray(coords, dtype=float), precision)
+    if len(rounded) > 1:
+        changed = np.any(rounded[1:] != rounded[:-1], axis=1)
+        deduped = rounded[np.concatenate([[True], changed])]
+        if len(deduped) >= (MIN_RING if ring else 2):
+            rounded = deduped
+    return rounded.tolist()
+
+
+def quantize_geometry(geometry: Dict[str, Any], precision: int) -> Dict[str, Any]:
+    kind = geometry["type"]
+    if kind == "Point":
+        return {**geometry, "coordinates": [round(c, precision) for c in geometry["coordinates"]]}
+    if kind == "MultiPoint":
+        return {**geometry, "coordinates": np.round(np.asarray(geometry["coordinates"]), precision).tolist()}
+    return _map_lines(geometry, lambda line, ring: _quantize_line(line, precision, ring))
+
+
+def compact_collection(
+    collection: Dict[str, Any],
+    *,
+    precision: int | None = None,
+    zoom: int | None = None,
+    method: str = "dp",
+) -> Dict[str, Any]:
+    """Simplified and/or quantized copy of a FeatureCollection (the input may live in a shared cache)."""
+    tolerance = zoom_tolerance(zoom) if zoom is not None else None
+    features = []
+    for feature in collection.get("features") or []:
+        geometry = feature.get("geometry")
+        if geometry:
+            if tolerance is not None:
+                geometry = simplify_geometry(geometry, tolerance, method)
+            if precision is not None:
+                geometry = quantize_geometry(geometry, precision)
+        features.append({**feature, "geometry": geometry})
+    return {**collection, "features": features}
+
+
+# ---------------- TopoJSON ----------------
+
+Point = Tuple[int, int]
+
+
+class _Topology:
+    """Arc extraction over integer (quantized) coordinates."""
+    def __init__(self, scale: float, translate: Tuple[float, float]):
+        self.scale = scale
+        self.translate = translate
+        self.lines: List[Tuple[List[Point], bool]] = []  # (points, is_ring)
+        self.arcs: List[List[Point]] = []
+        self._arc_index: Dict[Tuple[Point, ...], int] = {}
+
+    def point(self, xy: Sequence[float]) -> Point:
+        return (round((xy[0] - self.translate[0]) / self.scale), round((xy[1] - self.translate[1]) / self.scale))
+
+    def add_line(self, coords: Coords, ring: bool) -> int:
+        points: List[Point] = []
+        for xy in coords:
+            p = self.point(xy)
+            if not points or points[-1] != p:
+                points.append(p)
+        if ring and len(points) > 1 and points[0] == points[-1]:
+            points.pop()
+        self.lines.append((points, ring))
+        return len(self.lines) - 1
+
+    def junctions(self) -> set[Point]:
+        """Points where lines meet or part: shared with different neighbours, or line ends."""
+        neighbours: Dict[Point, set] = {}
+        found: set[Point] = set()
+        for points, ring in self.lines:
+            n = len(points)
+            for i, p in enumerate(points):
+                if ring:
+                    a, b = points[i - 1], points[(i + 1) % n]
+                elif i == 0 or i == n - 1:
+                    found.add(p)
+                    continue
+                else:
+                    a, b = points[i - 1], points[i + 1]
+                pair = (a, b) if a <= b else (b, a)
+                seen = neighbours.setdefault(p, set())
+                seen.add(pair)
+                if len(seen) > 1:
+                    found.add(p)
+        return found
+
+    def _arc(self, points: List[Point]) -> int:
+        key = tuple(points)
+        index = self._arc_index.get(key)
+        if index is not None:
+            return index
+        reverse = self._arc_index.get(key[::-1])
+        if reverse is not None:
+            return ~reverse
+        self.arcs.append(points)
+        self._arc_index[key] = len(self.arcs) - 1
+        return len(self.arcs) - 1
+
+    def cut(self) -> List[List[int]]:
+        """Arc indexes per added line, in order; shared stretches map to the same arc."""
+        junctions = self.junctions()
+        result = []
+        for points, ring in self.lines:
+            cuts = [i for i, p in enumerate(points) if p in junctions]
+            if ring:
+                if not cuts:
+                    # standalone ring: canonical rotation so an identical ring elsewhere dedupes
+                    start = min(range(len(points)), key=points.__getitem__)
+                    rotated = points[start:] + points[:start]
+                    result.append([self._arc(rotated + rotated[:1])])
+                    continue
+                rotated = points[cuts[0]:] + points[:cuts[0]]
+                offset = cuts[0]
+                cuts = [(i - offset) % len(points) for i in cuts] + [len(points)]
+                closed = rotated + rotated[:1]
+                result.append([self._arc(closed[a:b + 1]) for a, b in zip(cuts, cuts[1:])])
+            else:
+                cuts = sorted(set(cuts) | {0, len(points) - 1})
+                result.append([self._arc(points[a:b + 1]) for a, b in zip(cuts, cuts[1:])])
+        return result
+
+    def encoded_arcs(self) -> List[List[List[int]]]:
+        encoded = []
+        for arc in self.arcs:
+            out = [list(arc[0])]
+            for (x0, y0), (x1, y1) in zip(arc, arc[1:]):
+                out.append([x1 - x0, y1 - y0])
+            encoded.append(out)
+        return encoded
+
+
+def to_topojson(collection: Dict[str, Any], *, precision: int = 6, name: str = "features") -> Dict[str, Any]:
+    """Encode a FeatureCollection as a TopoJSON Topology with quantized, delta-encoded arcs."""
+    features = collection.get("features") or []
+    xs: List[float] = []
+    ys: List[float] = []
+
+    def collect(coords: Any) -> None:
+        if coords and isinstance(coords[0], (int, float)):
+            xs.append(coords[0])
+            ys.append(coords[1])
+        else:
+            for c in coords or ():
+                collect(c)
+
+    for feature in features:
+        if feature.get("geometry"):
+            collect(feature["geometry"].get("coordinates"))
+    translate = (min(xs, default=0.0), min(ys, default=0.0))
+    topology = _Topology(10.0 ** -precision, translate)
+
+    # first pass registers lines, second pass (after cutting) fills in arc indexes
+    pending: List[Tuple[Dict[str, Any], Any]] = []
+    for feature in features:
+        geometry = feature.get("geometry")
+        obj: Dict[str, Any] = {"type": None}
+        if feature.get("id") is not None:
+            obj["id"] = feature["id"]
+        obj["properties"] = feature.get("properties") or {}
+        if not geometry:
+            pending.append((obj, None))
+            continue
+        kind, coords = geometry["type"], geometry.get("coordinates")
+        obj["type"] = kind
+        if kind == "Polygon":
+            refs = [topology.add_line(ring, True) for ring in coords]
+        elif kind == "MultiPolygon":
+            refs = [[topology.add_line(ring, True) for ring in polygon] for polygon in coords]
+        elif kind == "LineString":
+            refs = topology.add_line(coords, False)
+        elif kind == "MultiLineString":
+            refs = [topology.add_line(line, False) for line in coords]
+        elif kind == "Point":
+            obj["coordinates"] = list(topology.point(coords))
+            refs = None
+        elif kind == "MultiPoint":
+            obj["coordinates"] = [list(topology.point(c)) for c in coords]
+            refs = None
+        else:
+            raise ValueError(f"TopoJSON encoding does not support {kind}")
+        pending.append((obj, refs))
+
+    line_arcs = topology.cut()
+    geometries = []
+    for obj, refs in pending:
+        if refs is not None:
+            kind = obj["type"]
+            if kind == "Polygon":
+                obj["arcs"] = [line_arcs[r] for r in refs]
+            elif kind == "MultiPolygon":
+                obj["arcs"] = [[line_arcs[r] for r in polygon] for polygon in refs]
+            elif kind == "LineString":
+                obj["arcs"] = line_arcs[refs]
+            else:
+                obj["arcs"] = [line_arcs[r] for r in refs]
+        geometries.append(obj)
+
+    return {
+        "type": "Topology",
+        "transform": {"scale": [topology.scale, topology.scale], "translate": list(translate)},
+        "objects": {name: {"type": "GeometryCollection", "geometries": geometries}},
+        "arcs": topology.encoded_arcs(),
+    }
@@ -0,0 +1,180 @@
+# backend/services/htc.py
+"""Selianinov hydrothermal coefficient (HTC) per station-year.
+
+    HTC = ΣP / (0.1 · ΣT), both sums over the days with mean air temperature above 10 °C.
+
+Ingestion queues touched station-years in `htc_dirty`; `recompute_dirty` claims
+them in batches (FOR UPDATE SKIP LOCKED, so several workers can drain the queue),
+loads only those years, computes all of them at once with NumPy and upserts into
+`htc_annual` on `uq_htc_annual_expr`.
+
+    python -m backend.services.htc           # process the queue
+    python -m backend.services.htc --full    # recompute every station-year
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+import uuid
+
+import asyncpg
+import numpy as np
+
+from ..ingest.bulk import copy_upsert
+
+log = logging.getLogger(__name__)
+
+METHOD = "Selianinov"
+# Part of uq_htc_annual_expr: must be non-NULL, NULLs never conflict in a unique constraint
+PERIOD_NOTE = "T>10C"
+ACTIVE_TEMP_C = 10.0
+DEFAULT_BATCH = 2_000
+
+StationYear = Tuple[uuid.UUID, int]
+
+
+def compute_htc(group: np.ndarray, temp: np.ndarray, precip: np.ndarray, n_groups: int) -> np.ndarray:
+    """HTC for each group index in `[0, n_groups)`; NaN where there are no active days.
+
+    `group[i]` is the station-year index of daily row `i`; NaN temperatures are
+    ignored and missing precipitation counts as 0.
+    """
+    active = temp > ACTIVE_TEMP_C
+    temp_sum = np.bincount(group, weights=np.where(active, temp, 0.0), minlength=n_groups)
+    precip_sum = np.bincount(group, weights=np.where(active, np.nan_to_num(precip), 0.0), minlength=n_groups)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(temp_sum > 0, precip_sum / (0.1 * temp_sum), np.nan)
+
+
+@dataclass
+class HTCReport:
+    station_years: int = 0
+    written: int = 0
+    removed: int = 0
+    batches: int = 0
+    elapsed_s: float = 0.0
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "station_years": self.station_years,
+            "written": self.written,
+            "removed": self.removed,
+            "batches": self.batches,
+            "elapsed_s": round(self.elapsed_s, 3),
+        }
+
+
+async def mark_all_dirty(conn: asyncpg.Connection, station_ids: Sequence[uuid.UUID] | None = None) -> int:
+    """Queue every station-year present in meteo_daily (optionally for some stations only)."""
+    status = await conn.execute(
+        """
+        INSERT INTO htc_dirty (station_id, year)
+        SELECT DISTINCT station_id, extract(year FROM date)::int FROM meteo_daily
+        WHERE $1::uuid[] IS NULL OR station_id = ANY($1::uuid[])
+        ON CONFLICT DO NOTHING
+        """,
+        list(station_ids) if station_ids is not None else None,
+    )
+    return int(status.rsplit(" ", 1)[-1])
+
+
+async def _process_batch(conn: asyncpg.Connection, batch_size: int, report: HTCReport) -> int:
+    async with conn.transaction():
+        claimed = await conn.fetch(
+            """
+            DELETE FROM htc_dirty WHERE (station_id, year) IN (
+                SELECT station_id, year FROM htc_dirty
+                ORDER BY station_id, year
+                LIMIT $1 FOR UPDATE SKIP LOCKED
+            )
+            RETURNING station_id, year
+            """,
+            batch_size,
+        )
+        if not claimed:
+            return 0
+        keys: List[StationYear] = [(r["station_id"], r["year"]) for r in claimed]
+
+        # Only active days are shipped; the year range keeps each lookup on one partition.
+        rows = await conn.fetch(
+            """
+            SELECT k.idx::int - 1 AS idx, m.air_temp_avg_c, m.precipitation_mm
+            FROM unnest($1::uuid[], $2::int[]) WITH ORDINALITY AS k(station_id, year, idx)
+            JOIN meteo_daily m
+              ON m.station_id = k.station_id
+             AND m.date >= make_date(k.year, 1, 1) AND m.date < make_date(k.year + 1, 1, 1)
+            WHERE m.air_temp_avg_c > $3
+            """,
+            [k[0] for k in keys], [k[1] for k in keys], ACTIVE_TEMP_C,
+        )
+        n = len(rows)
+        group = np.fromiter((r[0] for r in rows), dtype=np.int64, count=n)
+        temp = np.fromiter((r[1] for r in rows), dtype=np.float64, count=n)
+        precip = np.fromiter((np.nan if r[2] is None else r[2] for r in rows), dtype=np.float64, count=n)
+        htc = compute_htc(group, temp, precip, len(keys))
+
+        defined = ~np.isnan(htc)
+        records = [
+            (station_id, year, float(value), METHOD, PERIOD_NOTE)
+            for (station_id, year), value, ok in zip(keys, htc, defined) if ok
+        ]
+        if records:
+            report.written += await copy_upsert(
+                conn, "htc_annual", ("station_id", "year", "htc_value", "method", "period_note"), records,
+                conflict="uq_htc_annual_expr", update_columns=("htc_value",),
+            )
+        undefined = [k for k, ok in zip(keys, defined) if not ok]
+        if undefined:
+            status = await conn.execute(
+                """
+                DELETE FROM htc_annual h
+                USING unnest($1::uuid[], $2::int[]) AS k(station_id, year)
+                WHERE h.station_id = k.station_id AND h.year = k.year
+                  AND h.method = $3 AND h.period_note = $4
+                """,
+                [k[0] for k in undefined], [k[1] for k in undefined], METHOD, PERIOD_NOTE,
+            )
+            report.removed += int(status.rsplit(" ", 1)[-1])
+    report.station_years += len(keys)
+    report.batches += 1
+    return len(keys)
+
+
+async def recompute(conn: asyncpg.Connection, *, full: bool = False, batch_size: int = DEFAULT_BATCH) -> HTCReport:
+    report = HTCReport()
+    started = time.perf_counter()
+    if full:
+        await mark_all_dirty(conn)
+    while await _process_batch(conn, batch_size, report):
+        pass
+    report.elapsed_s = time.perf_counter() - started
+    return report
+
+
+async def recompute_dirty(dsn: str, *, full: bool = False, batch_size: int = DEFAULT_BATCH) -> HTCReport:
+    conn = await asyncpg.connect(dsn)
+    try:
+        report = await recompute(conn, full=full, batch_size=batch_size)
+    finally:
+        await conn.close()
+    log.info("HTC recomputed: %s", report.as_dict())
+    return report
+
+
+def main(argv: list[str] | None = None) -> None:
+    from ..db.config import DatabaseSettings
+    from ..db.session import asyncpg_dsn
+
+    parser = argparse.ArgumentParser(description="Recompute Selianinov HTC into htc_annual")
+    parser.add_argument("--full", action="store_true", help="recompute all station-years, not only queued ones")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    asyncio.run(recompute_dirty(asyncpg_dsn(DatabaseSettings().url), full=args.full, batch_size=args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
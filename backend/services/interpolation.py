@@ -0,0 +1,235 @@
+# backend/services/interpolation.py
+"""Point values to a regular lon/lat grid: inverse distance weighting or ordinary kriging.
+
+Both methods are local: every grid cell uses its `neighbours` nearest points
+(KD-tree over unit vectors, as in backend.services.spatial; brute force when
+scipy is missing). Cells are evaluated in row blocks, fully vectorised
+(one batched `np.linalg.solve` per block for kriging); large grids spread the
+blocks over a process pool.
+"""
+from __future__ import annotations
+import math
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+from .spatial import _chord_to_km, _unit_vectors
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:  # optional: brute-force neighbour search instead
+    cKDTree = None
+
+# lon_min, lat_min, lon_max, lat_max
+KAZAKHSTAN_BOUNDS = (46.4, 40.5, 87.4, 55.5)
+
+METHODS = ("idw", "kriging")
+VARIOGRAM_MODELS = ("exponential", "spherical", "gaussian")
+
+BLOCK_CELLS = 32_768
+KRIGING_BLOCK_CELLS = 4_096  # the batched (k+1)x(k+1) systems are the memory bound
+
+
+@dataclass(frozen=True)
+class Grid:
+    """Cell-centred grid; row 0 is the northern edge."""
+    west: float
+    south: float
+    east: float
+    north: float
+    cell: float
+
+    @classmethod
+    def covering(cls, bounds: Tuple[float, float, float, float], cell: float) -> "Grid":
+        west, south, east, north = bounds
+        return cls(west, south, west + math.ceil((east - west) / cell) * cell,
+                   south + math.ceil((north - south) / cell) * cell, cell)
+
+    @property
+    def width(self) -> int:
+        return int(round((self.east - self.west) / self.cell))
+
+    @property
+    def height(self) -> int:
+        return int(round((self.north - self.south) / self.cell))
+
+    def cell_centres(self, row_from: int, row_to: int) -> Tuple[np.ndarray, np.ndarray]:
+        lat = self.north - (np.arange(row_from, row_to) + 0.5) * self.cell
+        lon = self.west + (np.arange(self.width) + 0.5) * self.cell
+        lat2, lon2 = np.meshgrid(lat, lon, indexing="ij")
+        return lat2.ravel(), lon2.ravel()
+
+
+@dataclass(frozen=True)
+class Variogram:
+    model: str
+    nugget: float
+    sill: float  # partial sill
+    range_km: float
+
+    def __call__(self, h: np.ndarray) -> np.ndarray:
+        r = h / self.range_km
+        if self.model == "spherical":
+            shape = np.where(r < 1, 1.5 * r - 0.5 * r ** 3, 1.0)
+        elif self.model == "gaussian":
+            shape = 1 - np.exp(-3 * r ** 2)
+        else:
+            shape = 1 - np.exp(-3 * r)
+        return np.where(h > 0, self.nugget + self.sill * shape, 0.0)
+
+
+@dataclass(frozen=True)
+class Options:
+    method: str = "idw"
+    neighbours: int = 12
+    power: float = 2.0
+    max_distance_km: float | None = 250.0
+    variogram_model: str = "exponential"
+
+
+def nearest(points: np.ndarray, targets: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(distance km, index) of the `k` nearest points to each target, both (m, k), ascending."""
+    k = min(k, len(points))
+    if cKDTree is not None:
+        chord, idx = cKDTree(points).query(targets, k=k)
+        chord, idx = chord.reshape(len(targets), k), idx.reshape(len(targets), k)
+        return _chord_to_km(chord), idx
+    # |a - b|^2 = 2 - 2 a.b for unit vectors
+    chord2 = np.maximum(2.0 - 2.0 * targets @ points.T, 0.0)
+    idx = np.argpartition(chord2, k - 1, axis=1)[:, :k] if k < len(points) else np.tile(np.arange(k), (len(targets), 1))
+    part = np.take_along_axis(chord2, idx, axis=1)
+    order = np.argsort(part, axis=1)
+    return _chord_to_km(np.sqrt(np.take_along_axis(part, order, axis=1))), np.take_along_axis(idx, order, axis=1)
+
+
+def fit_variogram(
+    points: np.ndarray, values: np.ndarray, *, model: str = "exponential", bins: int = 15, max_pairs_points: int = 2000,
+) -> Variogram:
+    """Least-squares fit of nugget / partial sill over a grid of ranges to the empirical semivariogram."""
+    if len(points) > max_pairs_points:
+        pick = np.random.default_rng(0).choice(len(points), max_pairs_points, replace=False)
+        points, values = points[pick], values[pick]
+    i, j = np.triu_indices(len(points), k=1)
+    variance = float(np.var(values)) if len(values) else 0.0
+    if len(i) == 0 or variance == 0.0:
+        return Variogram(model, 0.0, max(variance, 1e-12), 100.0)
+    h = _chord_to_km(np.linalg.norm(points[i] - points[j], axis=1))
+    semi = 0.5 * (values[i] - values[j]) ** 2
+    max_lag = float(np.quantile(h, 0.5))  # only the better populated half of the lags
+    edges = np.linspace(0.0, max_lag, bins + 1)
+    which = np.digitize(h, edges) - 1
+    keep = (which >= 0) & (which < bins)
+    count = np.bincount(which[keep], minlength=bins)
+    gamma = np.bincount(which[keep], weights=semi[keep], minlength=bins)
+    filled = count > 0
+    lags = ((edges[:-1] + edges[1:]) / 2)[filled]
+    gamma, weight = gamma[filled] / count[filled], count[filled].astype(float)
+
+    best: Tuple[float, Variogram] | None = None
+    for range_km in np.geomspace(max(max_lag / 50, 1.0), max_lag * 3, 40):
+        shape = Variogram(model, 0.0, 1.0, float(range_km))(lags)
+        design = np.column_stack((np.ones_like(shape), shape)) * np.sqrt(weight)[:, None]
+        coef, *_ = np.linalg.lstsq(design, gamma * np.sqrt(weight), rcond=None)
+        nugget, sill = max(float(coef[0]), 0.0), max(float(coef[1]), 1e-12)
+        candidate = Variogram(model, nugget, sill, float(range_km))
+        error = float(np.sum(weight * (candidate(lags) - gamma) ** 2))
+        if best is None or error < best[0]:
+            best = (error, candidate)
+    return best[1]
+
+
+def idw(distance: np.ndarray, neighbour_values: np.ndarray, power: float) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weights = 1.0 / distance ** power
+        exact = distance < 1e-6
+        weights = np.where(exact.any(axis=1, keepdims=True), exact.astype(float), weights)
+        weights = np.where(np.isfinite(neighbour_values), weights, 0.0)
+        total = weights.sum(axis=1)
+        return np.where(total > 0, (weights * np.nan_to_num(neighbour_values)).sum(axis=1) / total, np.nan)
+
+
+def ordinary_kriging(
+    points: np.ndarray, values: np.ndarray, distance: np.ndarray, idx: np.ndarray, variogram: Variogram,
+) -> np.ndarray:
+    """Local ordinary kriging estimate per target from its neighbours (batched solve)."""
+    m, k = idx.shape
+    if k == 1:
+        return values[idx[:, 0]]
+    # Semivariances among the (few hundred) points this block touches, gathered per target
+    used, local = np.unique(idx, return_inverse=True)
+    local = local.reshape(m, k)
+    block = points[used]
+    gamma = variogram(_chord_to_km(np.linalg.norm(block[:, None, :] - block[None, :, :], axis=-1)))
+    gamma[np.diag_indices_from(gamma)] = -1e-10 * (variogram.nugget + variogram.sill)  # keeps duplicates solvable
+    system = np.ones((m, k + 1, k + 1))
+    system[:, :k, :k] = gamma[local[:, :, None], local[:, None, :]]
+    system[:, k, k] = 0.0
+    rhs = np.ones((m, k + 1))
+    rhs[:, :k] = variogram(distance)
+    try:
+        weights = np.linalg.solve(system, rhs[..., None])[..., 0]
+    except np.linalg.LinAlgError:  # duplicate locations make some systems singular
+        weights = (np.linalg.pinv(system) @ rhs[..., None])[..., 0]
+    return np.einsum("mk,mk->m", weights[:, :k], values[idx])
+
+
+def evaluate_rows(
+    grid: Grid, row_from: int, row_to: int, points: np.ndarray, values: np.ndarray,
+    options: Options, variogram: Variogram | None,
+) -> np.ndarray:
+    """Interpolated values for grid rows [row_from, row_to), shape (rows, width)."""
+    lat, lon = grid.cell_centres(row_from, row_to)
+    distance, idx = nearest(points, _unit_vectors(lat, lon), options.neighbours)
+    if options.method == "kriging" and variogram is not None:
+        out = ordinary_kriging(points, values, distance, idx, variogram)
+    else:
+        out = idw(distance, values[idx], options.power)
+    if options.max_distance_km is not None:
+        out = np.where(distance[:, 0] <= options.max_distance_km, out, np.nan)
+    return out.reshape(row_to - row_from, grid.width).astype(np.float32)
+
+
+def _row_blocks(grid: Grid, block_cells: int) -> Iterator[Tuple[int, int]]:
+    rows = max(1, block_cells // max(grid.width, 1))
+    for start in range(0, grid.height, rows):
+        yield start, min(start + rows, grid.height)
+
+
+def interpolate(
+    grid: Grid,
+    lat: np.ndarray,
+    lon: np.ndarray,
+    values: np.ndarray,
+    options: Options,
+    *,
+    executor: Executor | None = None,
+    block_cells: int = BLOCK_CELLS,
+) -> Tuple[np.ndarray, Variogram | None]:
+    """The whole grid as float32 (height, width), NaN where no point is close enough.
+
+    With an `executor` the row blocks are evaluated in parallel (process pools
+    get the point arrays pickled once per block, which is small next to the work).
+    """
+    if options.method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}")
+    finite = np.isfinite(values) & np.isfinite(lat) & np.isfinite(lon)
+    lat, lon, values = lat[finite], lon[finite], values[finite].astype(float)
+    if not len(values):
+        return np.full((grid.height, grid.width), np.nan, dtype=np.float32), None
+    points = _unit_vectors(lat, lon)
+    variogram = (
+        fit_variogram(points, values, model=options.variogram_model)
+        if options.method == "kriging" and len(values) > 2 else None
+    )
+    if options.method == "kriging":
+        block_cells = min(block_cells, KRIGING_BLOCK_CELLS)
+    blocks = list(_row_blocks(grid, block_cells))
+    if executor is None or len(blocks) == 1:
+        parts: List[np.ndarray] = [evaluate_rows(grid, a, b, points, values, options, variogram) for a, b in blocks]
+    else:
+        parts = list(executor.map(
+            evaluate_rows, *zip(*((grid, a, b, points, values, options, variogram) for a, b in blocks))
+        ))
+    return np.vstack(parts), variogram
@@ -0,0 +1,133 @@
+# backend/services/meteo_decadal.py
+"""Incremental decadal rollup of `meteo_daily` into `meteo_decadal`.
+
+Decades follow the soil tables: 1 = days 1–10, 2 = days 11–20, 3 = day 21 to
+month end. Ingestion queues the touched (station, year, month, decade) keys in
+`meteo_decadal_dirty` (backend.ingest.meteo_daily.QUEUE_DECADES_SQL); `refresh`
+re-aggregates only those, one set-based statement per batch.
+
+    python -m backend.services.meteo_decadal [--full]
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import logging
+import time
+from typing import Dict
+
+import asyncpg
+
+from ..ingest.meteo_daily import DECADE_SQL
+
+log = logging.getLogger(__name__)
+
+DEFAULT_BATCH = 20_000
+
+MARK_ALL_SQL = f"""
+    INSERT INTO meteo_decadal_dirty (station_id, year, month, decade)
+    SELECT DISTINCT station_id, extract(year FROM date)::int, extract(month FROM date)::int,
+           {DECADE_SQL.format(col="date")}
+    FROM meteo_daily
+    ON CONFLICT DO NOTHING
+"""
+
+REFRESH_SQL = """
+    WITH claimed AS (
+        DELETE FROM meteo_decadal_dirty WHERE (station_id, year, month, decade) IN (
+            SELECT station_id, year, month, decade FROM meteo_decadal_dirty
+            ORDER BY station_id, year, month, decade
+            LIMIT $1 FOR UPDATE SKIP LOCKED
+        )
+        RETURNING station_id, year, month, decade
+    ),
+    bounds AS (
+        SELECT c.*,
+               make_date(c.year, c.month, (c.decade - 1) * 10 + 1) AS day_from,
+               CASE WHEN c.decade < 3 THEN make_date(c.year, c.month, c.decade * 10 + 1)
+                    ELSE (make_date(c.year, c.month, 1) + interval '1 month')::date END AS day_to
+        FROM claimed c
+    ),
+    agg AS (
+        SELECT b.station_id, b.year, b.month, b.decade,
+               sum(m.precipitation_mm) AS precipitation_sum_mm,
+               avg(m.air_temp_avg_c) AS air_temp_avg_c,
+               max(m.air_temp_max_c) AS air_temp_max_c,
+               min(m.air_temp_min_c) AS air_temp_min_c,
+               avg(m.rel_humidity) AS rel_humidity_avg,
+               count(m.date)::int AS days_count
+        FROM bounds b
+        LEFT JOIN meteo_daily m
+          ON m.station_id = b.station_id AND m.date >= b.day_from AND m.date < b.day_to
+        GROUP BY b.station_id, b.year, b.month, b.decade
+    ),
+    upserted AS (
+        INSERT INTO meteo_decadal AS r (
+            station_id, year, month, decade, precipitation_sum_mm, air_temp_avg_c,
+            air_temp_max_c, air_temp_min_c, rel_humidity_avg, days_count
+        )
+        SELECT station_id, year, month, decade, precipitation_sum_mm, air_temp_avg_c,
+               air_temp_max_c, air_temp_min_c, rel_humidity_avg, days_count
+        FROM agg WHERE days_count > 0
+        ON CONFLICT ON CONSTRAINT uq_meteo_decadal DO UPDATE SET
+            precipitation_sum_mm = EXCLUDED.precipitation_sum_mm,
+            air_temp_avg_c = EXCLUDED.air_temp_avg_c,
+            air_temp_max_c = EXCLUDED.air_temp_max_c,
+            air_temp_min_c = EXCLUDED.air_temp_min_c,
+            rel_humidity_avg = EXCLUDED.rel_humidity_avg,
+            days_count = EXCLUDED.days_count
+        RETURNING 1
+    ),
+    removed AS (
+        DELETE FROM meteo_decadal r USING agg
+        WHERE agg.days_count = 0
+          AND r.station_id = agg.station_id AND r.year = agg.year
+          AND r.month = agg.month AND r.decade = agg.decade
+        RETURNING 1
+    )
+    SELECT (SELECT count(*) FROM claimed) AS claimed,
+           (SELECT count(*) FROM upserted) AS written,
+           (SELECT count(*) FROM removed) AS removed
+"""
+
+
+async def refresh(conn: asyncpg.Connection, *, full: bool = False, batch_size: int = DEFAULT_BATCH) -> Dict[str, object]:
+    started = time.perf_counter()
+    totals = {"decades": 0, "written": 0, "removed": 0, "batches": 0}
+    if full:
+        await conn.execute(MARK_ALL_SQL)
+    while True:
+        row = await conn.fetchrow(REFRESH_SQL, batch_size)
+        if not row["claimed"]:
+            break
+        totals["decades"] += row["claimed"]
+        totals["written"] += row["written"]
+        totals["removed"] += row["removed"]
+        totals["batches"] += 1
+    totals["elapsed_s"] = round(time.perf_counter() - started, 3)
+    return totals
+
+
+async def refresh_dirty(dsn: str, *, full: bool = False, batch_size: int = DEFAULT_BATCH) -> Dict[str, object]:
+    conn = await asyncpg.connect(dsn)
+    try:
+        report = await refresh(conn, full=full, batch_size=batch_size)
+    finally:
+        await conn.close()
+    log.info("meteo_decadal refreshed: %s", report)
+    return report
+
+
+def main(argv: list[str] | None = None) -> None:
+    from ..db.config import DatabaseSettings
+    from ..db.session import asyncpg_dsn
+
+    parser = argparse.ArgumentParser(description="Refresh the meteo_decadal rollup")
+    parser.add_argument("--full", action="store_true", help="rebuild every decade, not only queued ones")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    asyncio.run(refresh_dirty(asyncpg_dsn(DatabaseSettings().url), full=args.full, batch_size=args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
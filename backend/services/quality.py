@@ -0,0 +1,329 @@
+# backend/services/quality.py
+"""Quality control of manual soil moisture readings (`soil_decadal_manual.quality_flag`).
+
+Checks, all evaluated as array operations over a dense
+(depth, decade, point) cube of the readings around the ingested decades:
+
+- `range`   value outside physical limits for the layer (or `value_frac` outside 0..1);
+- `spike`   value far above or below both neighbouring decades;
+- `step`    jump from the previous decade that persists into the next one;
+- `stuck`   the same value repeated for `stuck_run` or more consecutive decades;
+- `spatial` value far from the median of the nearest points at the same decade.
+
+Failed checks are stored comma-separated (`spike,spatial`), clean rows get `ok`.
+Flags depend on neighbouring rows, so `check_decades` re-flags every reading
+within `context` decades of the ingested ones and loads twice that margin.
+Nothing is deleted: validation, climatology, surfaces and zonal statistics read
+only unchecked or `ok` rows, and a reading whose flag moves it in or out of that
+set queues its climatology key.
+
+    python -m backend.services.quality --from 2000 --to 2024
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import logging
+import time
+import warnings
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Tuple
+
+import asyncpg
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..ingest.bulk import copy_update
+from .interpolation import nearest
+from .spatial import _unit_vectors
+
+log = logging.getLogger(__name__)
+
+DEPTHS = ("0-20", "0-50", "0-100")
+CHECKS = ("range", "spike", "step", "stuck", "spatial")
+OK = "ok"
+
+# Productive moisture above 0 mm and below a saturated layer (porosity ~0.55)
+MAX_MM = {"0-20": 110.0, "0-50": 275.0, "0-100": 550.0}
+
+
+@dataclass(frozen=True)
+class Thresholds:
+    spike_fraction: float = 0.2  # of MAX_MM for the layer
+    step_fraction: float = 0.3
+    stuck_run: int = 4  # identical consecutive decades
+    spatial_fraction: float = 0.25
+    spatial_mad: float = 4.0  # robust z (MAD * 1.4826) beyond which a value is inconsistent
+    neighbours: int = 6
+    radius_km: float = 150.0
+    min_neighbours: int = 3
+
+    @property
+    def context(self) -> int:
+        """Decades around a changed reading whose flags can change with it."""
+        return max(self.stuck_run - 1, 2)  # a step looks two decades back (spike before it)
+
+
+LOAD_SQL = """
+    SELECT m.rec_id, m.soil_point_id, p.lat, p.lon, m.year, m.month, m.decade, m.depth::text AS depth,
+           m.value_mm, m.value_frac, m.quality_flag
+    FROM soil_decadal_manual m
+    JOIN soil_points p ON p.soil_point_id = m.soil_point_id
+    WHERE m.year BETWEEN $1 AND $2
+      AND m.year * 36 + (m.month - 1) * 3 + m.decade - 1 BETWEEN $3 AND $4
+"""
+
+COUNTS_SQL = text("""
+    SELECT coalesce(quality_flag, 'unchecked') AS flag, count(*) AS n
+    FROM soil_decadal_manual
+    WHERE (CAST(:year_from AS integer) IS NULL OR year >= :year_from)
+      AND (CAST(:year_to AS integer) IS NULL OR year <= :year_to)
+      AND (CAST(:depth AS text) IS NULL OR depth = CAST(:depth AS depth_code))
+    GROUP BY 1
+""")
+
+# Same keys as climatology.QUEUE_MANUAL_SQL, for readings whose usability changed
+QUEUE_CLIMATOLOGY_SQL = """
+    INSERT INTO soil_climatology_dirty (soil_point_id, depth, source, year, decade_of_year)
+    SELECT DISTINCT soil_point_id, depth, source, year, (month - 1) * 3 + decade
+    FROM soil_decadal_manual WHERE rec_id = ANY($1::bigint[])
+    ON CONFLICT DO NOTHING
+"""
+
+
+def usable(flag: str | None) -> bool:
+    """Whether downstream aggregates use a reading: unchecked or passed every check."""
+    return flag is None or flag == OK
+
+
+def absolute_decade(year, month, decade):
+    """Decade counter across years (works on scalars and arrays)."""
+    return year * 36 + (month - 1) * 3 + decade - 1
+
+
+def _shift(cube: np.ndarray, by: int) -> np.ndarray:
+    """Shift along the decade axis, padding with NaN."""
+    out = np.full_like(cube, np.nan)
+    if by > 0:
+        out[:, by:] = cube[:, :-by]
+    else:
+        out[:, :by] = cube[:, -by:]
+    return out
+
+
+def run_lengths(cube: np.ndarray) -> np.ndarray:
+    """Length of the run of equal consecutive finite values each cell belongs to (0 for NaN)."""
+    series = np.moveaxis(cube, 1, -1)  # (depth, point, decade): runs along the last axis
+    flat = series.reshape(-1, series.shape[-1])
+    finite = np.isfinite(flat)
+    same = np.zeros_like(finite)
+    same[:, 1:] = finite[:, 1:] & finite[:, :-1] & np.isclose(flat[:, 1:], flat[:, :-1], rtol=0, atol=1e-9)
+    run_id = np.cumsum(~same.ravel())
+    lengths = np.bincount(run_id)[run_id].reshape(flat.shape)
+    lengths = np.where(finite, lengths, 0)
+    return np.moveaxis(lengths.reshape(series.shape), -1, 1)
+
+
+def flag_cube(
+    cube: np.ndarray, frac: np.ndarray, neighbours: np.ndarray, thresholds: Thresholds = Thresholds(),
+) -> Dict[str, np.ndarray]:
+    """Boolean masks per check over a (depth, decade, point) cube of value_mm (NaN = no reading).
+
+    `neighbours` is (point, k) indexes of nearby points, -1 where there is none.
+    """
+    limit = np.array([MAX_MM[d] for d in DEPTHS])[:, None, None]
+    present = np.isfinite(cube)
+    with np.errstate(invalid="ignore"):
+        masks: Dict[str, np.ndarray] = {
+            "range": present & ((cube < 0) | (cube > limit) | (frac < 0) | (frac > 1)),
+        }
+        prev, nxt = _shift(cube, 1), _shift(cube, -1)
+        up, down = cube - prev, cube - nxt
+        masks["spike"] = (
+            np.isfinite(up) & np.isfinite(down) & (np.sign(up) == np.sign(down))
+            & (np.minimum(np.abs(up), np.abs(down)) > thresholds.spike_fraction * limit)
+        )
+        step = thresholds.step_fraction * limit
+        # a jump is a step only away from an outlier and only if the new level persists;
+        # otherwise the reading after a spike / out-of-range value would be flagged too
+        after_outlier = _shift((masks["spike"] | masks["range"]).astype(float), 1) == 1
+        masks["step"] = (
+            np.isfinite(up) & (np.abs(up) > step) & ~masks["spike"] & ~after_outlier
+            & (~np.isfinite(nxt) | ((np.abs(nxt - prev) > step) & (np.abs(down) <= step)))
+        )
+        masks["stuck"] = run_lengths(cube) >= thresholds.stuck_run
+
+        # (depth, decade, point, k) values of the neighbouring points at the same decade
+        padded = np.concatenate((cube, np.full(cube.shape[:2] + (1,), np.nan)), axis=2)
+        around = padded[:, :, neighbours]
+        count = np.isfinite(around).sum(axis=-1)
+        enough = present & (count >= thresholds.min_neighbours)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN neighbourhoods
+            median = np.nanmedian(around, axis=-1)
+            spread = 1.4826 * np.nanmedian(np.abs(around - median[..., None]), axis=-1)
+        deviation = np.abs(cube - median)
+        masks["spatial"] = enough & (deviation > thresholds.spatial_fraction * limit) & (
+            deviation > thresholds.spatial_mad * spread
+        )
+    return masks
+
+
+def encode_flags(masks: Dict[str, np.ndarray]) -> Tuple[np.ndarray, List[str]]:
+    """Bitmask per cell plus the flag text for every bitmask value."""
+    bits = np.zeros(next(iter(masks.values())).shape, dtype=np.int64)
+    for i, name in enumerate(CHECKS):
+        bits |= masks[name].astype(np.int64) << i
+    labels = [",".join(n for i, n in enumerate(CHECKS) if code >> i & 1) or OK for code in range(1 << len(CHECKS))]
+    return bits, labels
+
+
+@dataclass
+class QCReport:
+    rows_checked: int = 0
+    rows_updated: int = 0
+    counts: Dict[str, int] | None = None
+    elapsed_s: float = 0.0
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "rows_checked": self.rows_checked, "rows_updated": self.rows_updated,
+            "counts": self.counts or {}, "elapsed_s": round(self.elapsed_s, 3),
+        }
+
+
+async def check_decades(
+    conn: asyncpg.Connection, decades: Iterable[int], thresholds: Thresholds = Thresholds(), *, max_span: int = 72,
+) -> QCReport:
+    """Re-flag the readings around the given absolute decades (see `absolute_decade`).
+
+    Decades are processed in spans of at most `max_span`, so a batch touching
+    distant years does not build one cube over everything in between.
+    """
+    started = time.perf_counter()
+    report = QCReport(counts={name: 0 for name in (OK, *CHECKS)})
+    written_to: int | None = None
+    for first, last in _spans(sorted(set(decades)), gap=2 * thresholds.context, max_span=max_span):
+        written_to = await _check_span(conn, first, last, thresholds, report, after=written_to)
+    report.elapsed_s = time.perf_counter() - started
+    return report
+
+
+def _spans(decades: List[int], *, gap: int, max_span: int) -> List[Tuple[int, int]]:
+    spans: List[Tuple[int, int]] = []
+    for d in decades:
+        if spans and d - spans[-1][1] <= gap and d - spans[-1][0] < max_span:
+            spans[-1] = (spans[-1][0], d)
+        else:
+            spans.append((d, d))
+    return spans
+
+
+async def _check_span(
+    conn: asyncpg.Connection, first: int, last: int, thresholds: Thresholds, report: QCReport, *, after: int | None,
+) -> int:
+    """Flag one span; decades up to `after` were already written by the previous span. Returns the last written."""
+    margin = thresholds.context
+    write_from, write_to = first - margin, last + margin
+    if after is not None:
+        write_from = max(write_from, after + 1)
+    load_from, load_to = write_from - margin, write_to + margin
+    rows = await conn.fetch(LOAD_SQL, load_from // 36, load_to // 36, load_from, load_to)
+    if not rows:
+        return write_to
+
+    n = len(rows)
+    points: Dict[object, int] = {}
+    point_index = np.fromiter((points.setdefault(r["soil_point_id"], len(points)) for r in rows), dtype=np.intp, count=n)
+    depth_index = np.fromiter((DEPTHS.index(r["depth"]) for r in rows), dtype=np.intp, count=n)
+    t = np.fromiter((absolute_decade(r["year"], r["month"], r["decade"]) for r in rows), dtype=np.intp, count=n) - load_from
+    value = np.fromiter((r["value_mm"] for r in rows), dtype=float, count=n)
+    frac = np.fromiter((np.nan if r["value_frac"] is None else r["value_frac"] for r in rows), dtype=float, count=n)
+
+    shape = (len(DEPTHS), load_to - load_from + 1, len(points))
+    cube = np.full(shape, np.nan)
+    frac_cube = np.full(shape, np.nan)
+    cube[depth_index, t, point_index] = value
+    frac_cube[depth_index, t, point_index] = frac
+
+    lat = np.zeros(len(points))
+    lon = np.zeros(len(points))
+    lat[point_index] = [r["lat"] for r in rows]
+    lon[point_index] = [r["lon"] for r in rows]
+    neighbours = _neighbours(lat, lon, thresholds)
+
+    masks = await asyncio.to_thread(flag_cube, cube, frac_cube, neighbours, thresholds)
+    bits, labels = encode_flags(masks)
+    row_bits = bits[depth_index, t, point_index]
+
+    write = (t + load_from >= write_from) & (t + load_from <= write_to)
+    flags = np.array(labels, dtype=object)[row_bits]
+    changed = [i for i in np.flatnonzero(write) if rows[i]["quality_flag"] != flags[i]]
+    if changed:
+        report.rows_updated += await copy_update(
+            conn, "soil_decadal_manual", ("rec_id",), ("quality_flag",), [(rows[i]["rec_id"], flags[i]) for i in changed],
+        )
+        # a reading entering or leaving the aggregates changes its climatology key
+        requeue = [
+            rows[i]["rec_id"] for i in changed if usable(rows[i]["quality_flag"]) != usable(flags[i])
+        ]
+        if requeue:
+            await conn.execute(QUEUE_CLIMATOLOGY_SQL, requeue)
+    report.rows_checked += int(write.sum())
+    checked_bits = row_bits[write]
+    report.counts[OK] += int((checked_bits == 0).sum())
+    for i, name in enumerate(CHECKS):
+        report.counts[name] += int((checked_bits >> i & 1).sum())
+    return write_to
+
+
+def _neighbours(lat: np.ndarray, lon: np.ndarray, thresholds: Thresholds) -> np.ndarray:
+    """(point, k) nearest other points within the radius; -1 pads (indexes the NaN column)."""
+    k = min(thresholds.neighbours + 1, len(lat))
+    if k < 2:
+        return np.full((len(lat), 1), -1, dtype=np.intp)
+    points = _unit_vectors(lat, lon)
+    distance, idx = nearest(points, points, k)
+    idx = np.where((distance <= thresholds.radius_km) & (idx != np.arange(len(lat))[:, None]), idx, -1)
+    return idx.astype(np.intp)
+
+
+async def flag_counts(
+    session: AsyncSession, *, year_from: int | None = None, year_to: int | None = None, depth: str | None = None,
+) -> Dict[str, int]:
+    """Rows per check (a row with two failed checks counts for both), plus `ok` and `unchecked`."""
+    counts = {name: 0 for name in (OK, *CHECKS, "unchecked")}
+    rows = await session.execute(COUNTS_SQL, {"year_from": year_from, "year_to": year_to, "depth": depth})
+    for flag, n in rows:
+        for name in flag.split(","):
+            counts[name] = counts.get(name, 0) + n
+    return counts
+
+
+async def check_years(dsn: str, year_from: int, year_to: int, thresholds: Thresholds = Thresholds()) -> Dict[str, object]:
+    """Backfill: QC every reading of the given years."""
+    conn = await asyncpg.connect(dsn)
+    try:
+        report = await check_decades(
+            conn, range(absolute_decade(year_from, 1, 1), absolute_decade(year_to, 12, 3) + 1), thresholds,
+        )
+    finally:
+        await conn.close()
+    return report.as_dict()
+
+
+def main(argv: list[str] | None = None) -> None:
+    from ..db.config import DatabaseSettings
+    from ..db.session import asyncpg_dsn
+
+    parser = argparse.ArgumentParser(description="Run the manual soil moisture QC over whole years")
+    parser.add_argument("--from", dest="year_from", type=int, required=True)
+    parser.add_argument("--to", dest="year_to", type=int, required=True)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    report = asyncio.run(check_years(asyncpg_dsn(DatabaseSettings().url), args.year_from, args.year_to))
+    log.info("done: %s", report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# backend/services/site_points.py
+"""Rebuild `site_points` from `sites.bounds` ⊇ `soil_points.geom`.
+
+One set-based statement: the ST_Contains join (both sides GiST-indexed) gives
+the desired pairs, then only the missing pairs are inserted and only the
+obsolete ones deleted. Optionally scoped to some sites and/or points.
+
+    python -m backend.services.site_points [--site ID ...] [--point ID ...]
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import logging
+import time
+import uuid
+from typing import Dict, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+log = logging.getLogger(__name__)
+
+REBUILD_SQL = text("""
+    WITH desired AS (
+        SELECT s.site_id, p.soil_point_id
+        FROM sites s
+        JOIN soil_points p ON ST_Contains(s.bounds, p.geom)
+        WHERE (CAST(:site_ids AS uuid[]) IS NULL OR s.site_id = ANY(CAST(:site_ids AS uuid[])))
+          AND (CAST(:point_ids AS uuid[]) IS NULL OR p.soil_point_id = ANY(CAST(:point_ids AS uuid[])))
+    ),
+    deleted AS (
+        DELETE FROM site_points sp
+        WHERE (CAST(:site_ids AS uuid[]) IS NULL OR sp.site_id = ANY(CAST(:site_ids AS uuid[])))
+          AND (CAST(:point_ids AS uuid[]) IS NULL OR sp.soil_point_id = ANY(CAST(:point_ids AS uuid[])))
+          AND NOT EXISTS (
+              SELECT 1 FROM desired d
+              WHERE d.site_id = sp.site_id AND d.soil_point_id = sp.soil_point_id
+          )
+        RETURNING 1
+    ),
+    inserted AS (
+        INSERT INTO site_points (site_id, soil_point_id)
+        SELECT site_id, soil_point_id FROM desired
+        ON CONFLICT DO NOTHING
+        RETURNING 1
+    )
+    SELECT (SELECT count(*) FROM desired) AS matched,
+           (SELECT count(*) FROM inserted) AS inserted,
+           (SELECT count(*) FROM deleted) AS deleted
+""")
+
+
+async def rebuild(
+    session: AsyncSession,
+    *,
+    site_ids: Sequence[uuid.UUID] | None = None,
+    soil_point_ids: Sequence[uuid.UUID] | None = None,
+) -> Dict[str, object]:
+    started = time.perf_counter()
+    row = (await session.execute(REBUILD_SQL, {
+        # None = all; an empty list scopes the rebuild to nothing rather than everything
+        "site_ids": None if site_ids is None else list(site_ids),
+        "point_ids": None if soil_point_ids is None else list(soil_point_ids),
+    })).one()
+    await session.commit()
+    return {
+        "matched": row.matched,
+        "inserted": row.inserted,
+        "deleted": row.deleted,
+        "elapsed_s": round(time.perf_counter() - started, 3),
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    from ..db.config import DatabaseSettings
+    from ..db.session import create_engine, create_sessionmaker
+
+    parser = argparse.ArgumentParser(description="Rebuild site_points from site bounds")
+    parser.add_argument("--site", dest="sites", action="append", type=uuid.UUID, default=None)
+    parser.add_argument("--point", dest="points", action="append", type=uuid.UUID, default=None)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    async def run() -> None:
+        engine = create_engine(DatabaseSettings())
+        try:
+            async with create_sessionmaker(engine)() as session:
+                log.info("site_points: %s", await rebuild(session, site_ids=args.sites, soil_point_ids=args.points))
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+# backend/services/spatial.py
+"""Nearest-neighbour and radius queries over stations and soil points.
+
+Two backends answer the same batch queries:
+
+- PostGIS: one statement per batch, KNN (`<->`) / bounding-box filtering on the
+  GiST indexes, exact distances with ST_DistanceSphere;
+- `SpatialIndex`: an in-process KD-tree snapshot (scipy) of both tables, loaded
+  at startup and reloaded when a table-change notification arrives. While a
+  snapshot is missing or stale, queries fall back to PostGIS.
+"""
+from __future__ import annotations
+import asyncio
+import logging
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:  # optional: without scipy every query goes to PostGIS
+    cKDTree = None
+
+log = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+
+LAYERS: Dict[str, Dict[str, str]] = {
+    "stations": {"table": "stations", "id": "station_id"},
+    "soil_points": {"table": "soil_points", "id": "soil_point_id"},
+}
+
+Match = Dict[str, Any]
+
+
+def _unit_vectors(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    phi, lam = np.radians(lat), np.radians(lon)
+    return np.column_stack((np.cos(phi) * np.cos(lam), np.cos(phi) * np.sin(lam), np.sin(phi)))
+
+
+def _chord_to_km(chord: np.ndarray) -> np.ndarray:
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2, 0, 1))
+
+
+def _km_to_chord(km: float) -> float:
+    return 2 * math.sin(min(km / EARTH_RADIUS_KM, math.pi) / 2)
+
+
+@dataclass
+class Snapshot:
+    ids: List[str]
+    codes: List[str | None]
+    names: List[str | None]
+    lat: np.ndarray
+    lon: np.ndarray
+    tree: Any
+
+    def match(self, i: int, distance_km: float) -> Match:
+        return {
+            "id": self.ids[i], "code": self.codes[i], "name": self.names[i],
+            "lat": float(self.lat[i]), "lon": float(self.lon[i]),
+            "distance_km": round(float(distance_km), 4),
+        }
+
+
+class SpatialIndex:
+    def __init__(self, sessionmaker: async_sessionmaker[AsyncSession]):
+        self._sessionmaker = sessionmaker
+        self._snapshots: Dict[str, Snapshot] = {}
+        self._reloads: Dict[str, asyncio.Task] = {}
+
+    @property
+    def available(self) -> bool:
+        return cKDTree is not None
+
+    def snapshot(self, layer: str) -> Snapshot | None:
+        return self._snapshots.get(layer)
+
+    async def load(self, layer: str) -> None:
+        spec = LAYERS[layer]
+        async with self._sessionmaker() as session:
+            rows = (await session.execute(text(
+                f"SELECT {spec['id']}::text AS id, code, name, lat, lon FROM {spec['table']}"
+            ))).all()
+        lat = np.fromiter((r.lat for r in rows), dtype=np.float64, count=len(rows))
+        lon = np.fromiter((r.lon for r in rows), dtype=np.float64, count=len(rows))
+        tree = cKDTree(_unit_vectors(lat, lon)) if rows else None
+        self._snapshots[layer] = Snapshot(
+            ids=[r.id for r in rows], codes=[r.code for r in rows], names=[r.name for r in rows],
+            lat=lat, lon=lon, tree=tree,
+        )
+        log.info("spatial index: %d %s loaded", len(rows), layer)
+
+    async def load_all(self) -> None:
+        if not self.available:
+            return
+        for layer in LAYERS:
+            await self.load(layer)
+
+    def invalidate_table(self, table: str) -> None:
+        """Table-change callback: drop the snapshot and reload it in the background."""
+        for layer, spec in LAYERS.items():
+            if spec["table"] != table or not self.available:
+                continue
+            self._snapshots.pop(layer, None)
+            running = self._reloads.get(layer)
+            if running is not None and not running.done():
+                running.cancel()
+            self._reloads[layer] = asyncio.get_running_loop().create_task(self._reload(layer))
+
+    async def _reload(self, layer: str) -> None:
+        try:
+            await self.load(layer)
+        except Exception:
+            log.exception("spatial index reload failed for %s", layer)
+
+    # ---- queries (in-memory) ----
+
+    def nearest(self, layer: str, lat: np.ndarray, lon: np.ndarray, k: int, max_km: float | None) -> List[List[Match]]:
+        snap = self._snapshots[layer]
+        if snap.tree is None:
+            return [[] for _ in lat]
+        k = min(k, len(snap.ids))
+        bound = _km_to_chord(max_km) if max_km is not None else np.inf
+        chord, idx = snap.tree.query(_unit_vectors(lat, lon), k=k, distance_upper_bound=bound)
+        chord, idx = chord.reshape(len(lat), k), idx.reshape(len(lat), k)
+        km = _chord_to_km(np.where(np.isfinite(chord), chord, 0))
+        return [
+            [snap.match(i, d) for i, d, c in zip(idx_row, km_row, chord_row) if np.isfinite(c)]
+            for idx_row, km_row, chord_row in zip(idx, km, chord)
+        ]
+
+    def within(self, layer: str, lat: np.ndarray, lon: np.ndarray, radius_km: float) -> List[List[Match]]:
+        snap = self._snapshots[layer]
+        if snap.tree is None:
+            return [[] for _ in lat]
+        queries = _unit_vectors(lat, lon)
+        hits = snap.tree.query_ball_point(queries, r=_km_to_chord(radius_km))
+        results: List[List[Match]] = []
+        for q, found in zip(queries, hits):
+            found = np.asarray(found, dtype=np.int64)
+            km = _chord_to_km(np.linalg.norm(_unit_vectors(snap.lat[found], snap.lon[found]) - q, axis=1))
+            order = np.argsort(km)
+            results.append([snap.match(int(found[o]), km[o]) for o in order])
+        return results
+
+
+# ---- queries (PostGIS) ----
+
+_QUERY_POINTS = """
+    q AS (
+        SELECT idx::int - 1 AS idx, lat, lon, ST_SetSRID(ST_MakePoint(lon, lat), 4326) AS g
+        FROM unnest(CAST(:lats AS float8[]), CAST(:lons AS float8[])) WITH ORDINALITY AS u(lat, lon, idx)
+    )
+"""
+
+
+def _group(rows: Sequence[Any], n: int, k: int | None = None) -> List[List[Match]]:
+    out: List[List[Match]] = [[] for _ in range(n)]
+    for r in rows:
+        out[r.idx].append({
+            "id": r.id, "code": r.code, "name": r.name, "lat": r.lat, "lon": r.lon,
+            "distance_km": round(float(r.distance_km), 4),
+        })
+    for matches in out:
+        matches.sort(key=lambda m: m["distance_km"])
+        if k is not None:
+            del matches[k:]
+    return out
+
+
+async def nearest_db(
+    session: AsyncSession, layer: str, lats: Sequence[float], lons: Sequence[float], k: int, max_km: float | None
+) -> List[List[Match]]:
+    spec = LAYERS[layer]
+    # `<->` ranks by planar degrees, which stretches east-west distances by 1/cos(lat), so its
+    # first k rows are not the k nearest. They do bound them: every true neighbour lies within
+    # the largest spherical distance among those k, so search that radius exactly (box prefilter
+    # on the GiST index, 1% slack for the degree length) and rank by spherical distance.
+    rows = (await session.execute(text(f"""
+        WITH {_QUERY_POINTS}
+        SELECT q.idx, n.* FROM q
+        CROSS JOIN LATERAL (
+            SELECT least(max(ST_DistanceSphere(c.geom, q.g)) / 1000.0, CAST(:max_km AS float8)) AS radius_km
+            FROM (
+                SELECT t.geom FROM {spec['table']} t
+                WHERE t.geom IS NOT NULL
+                ORDER BY t.geom <-> q.g
+                LIMIT :k
+            ) c
+        ) r
+        CROSS JOIN LATERAL (
+            SELECT t.{spec['id']}::text AS id, t.code, t.name, t.lat, t.lon,
+                   ST_DistanceSphere(t.geom, q.g) / 1000.0 AS distance_km
+            FROM {spec['table']} t
+            WHERE t.geom && ST_Expand(
+                      q.g,
+                      least(1.01 * r.radius_km / (:km_deg * greatest(cos(radians(q.lat)), 0.01)), 180.0),
+                      1.01 * r.radius_km / :km_deg)
+              AND ST_DistanceSphere(t.geom, q.g) / 1000.0 <= r.radius_km
+            ORDER BY distance_km
+            LIMIT :k
+        ) n
+    """), {"lats": list(lats), "lons": list(lons), "k": k, "max_km": max_km, "km_deg": KM_PER_DEGREE})).all()
+    return _group(rows, len(lats), k)
+
+
+async def within_db(
+    session: AsyncSession, layer: str, lats: Sequence[float], lons: Sequence[float], radius_km: float
+) -> List[List[Match]]:
+    spec = LAYERS[layer]
+    # Box prefilter on the GiST index, exact spherical distance afterwards.
+    rows = (await session.execute(text(f"""
+        WITH {_QUERY_POINTS}
+        SELECT q.idx, t.{spec['id']}::text AS id, t.code, t.name, t.lat, t.lon,
+               ST_DistanceSphere(t.geom, q.g) / 1000.0 AS distance_km
+        FROM q JOIN {spec['table']} t
+          ON t.geom && ST_Expand(
+                 q.g,
+                 least(:radius_km / (:km_deg * greatest(cos(radians(q.lat)), 0.01)), 180.0),
+                 :radius_km / :km_deg)
+         AND ST_DistanceSphere(t.geom, q.g) <= :radius_km * 1000.0
+    """), {"lats": list(lats), "lons": list(lons), "radius_km": radius_km, "km_deg": KM_PER_DEGREE})).all()
+    return _group(rows, len(lats))
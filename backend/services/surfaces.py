@@ -0,0 +1,359 @@
+# backend/services/surfaces.py
+"""Interpolated soil moisture surfaces for one decade, served as PNG / GeoTIFF tiles.
+
+A surface is keyed by (source, depth, year, month, decade, method) and holds
+the national grid (backend.services.interpolation). Tiles are resampled from
+it in web mercator and kept in a `TileCache`.
+
+Invalidation is per decade: a change notification on the soil tables only
+marks surfaces as unverified. The next request re-reads that decade's input
+points (one indexed query) and compares their fingerprint; the grid and its
+tiles are rebuilt only when the inputs actually changed. The fingerprint is
+part of the tile key, so a tile of an older surface is never served.
+"""
+from __future__ import annotations
+import asyncio
+import datetime as dt
+import hashlib
+import math
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Any, Dict, NamedTuple, Tuple
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from .interpolation import Grid, Options, Variogram, interpolate
+from .quality import OK
+from .tiles import TileCache
+from .timeseries import EXTERNAL_SOURCES
+
+DEPENDS_ON = ("soil_decadal_manual", "soil_decadal_external", "soil_points")
+
+TILE_SIZE = 256
+WEB_MERCATOR_HALF = math.pi * 6378137.0
+
+# dry -> wet
+RAMP = (
+    (0.00, (166, 97, 26)),
+    (0.25, (223, 194, 125)),
+    (0.50, (199, 233, 180)),
+    (0.75, (65, 182, 196)),
+    (1.00, (37, 52, 148)),
+)
+ALPHA = 210
+
+
+class SurfaceKey(NamedTuple):
+    source: str
+    depth: str
+    year: int
+    month: int
+    decade: int
+    method: str
+
+    @property
+    def layer(self) -> str:
+        return f"surface-{self.source}-{self.depth}-{self.year}-{self.month:02d}-{self.decade}-{self.method}"
+
+
+def _inputs_sql(values_table: str, value_column: str, extra: str) -> Any:
+    return text(f"""
+        SELECT p.soil_point_id::text AS id, p.lat, p.lon, v.{value_column} AS value
+        FROM {values_table} v
+        JOIN soil_points p ON p.soil_point_id = v.soil_point_id
+        WHERE v.year = :year AND v.month = :month AND v.decade = :decade
+          AND v.depth = CAST(:depth AS depth_code) AND v.source = CAST(:source AS source_type){extra}
+          AND p.lat IS NOT NULL AND p.lon IS NOT NULL
+        ORDER BY p.soil_point_id
+    """).execution_options(metrics_label="surfaces:inputs")
+
+
+INPUTS_MANUAL_SQL = _inputs_sql(
+    "soil_decadal_manual", "value_mm", f" AND (v.quality_flag IS NULL OR v.quality_flag = '{OK}')"
+)
+INPUTS_EXTERNAL_SQL = _inputs_sql("soil_decadal_external", "value", " AND v.variable = 'soil_moisture'")
+
+
+@dataclass(frozen=True)
+class Inputs:
+    lat: np.ndarray
+    lon: np.ndarray
+    values: np.ndarray
+    fingerprint: str
+
+
+async def load_inputs(session: AsyncSession, key: SurfaceKey) -> Inputs:
+    statement = INPUTS_EXTERNAL_SQL if key.source in EXTERNAL_SOURCES else INPUTS_MANUAL_SQL
+    rows = (await session.execute(statement, {
+        "year": key.year, "month": key.month, "decade": key.decade, "depth": key.depth, "source": key.source,
+    })).all()
+    lat = np.fromiter((r.lat for r in rows), dtype=float, count=len(rows))
+    lon = np.fromiter((r.lon for r in rows), dtype=float, count=len(rows))
+    values = np.fromiter((r.value for r in rows), dtype=float, count=len(rows))
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update("\n".join(r.id for r in rows).encode())
+    for array in (lat, lon, values):
+        digest.update(array.tobytes())
+    return Inputs(lat, lon, values, digest.hexdigest())
+
+
+@dataclass(frozen=True)
+class Surface:
+    key: SurfaceKey
+    grid: Grid
+    values: np.ndarray  # float32 (height, width), NaN = no data
+    fingerprint: str
+    points: int
+    vmin: float | None
+    vmax: float | None
+    variogram: Variogram | None
+    elapsed_s: float
+    computed_at: str
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "source": self.key.source, "depth": self.key.depth, "year": self.key.year,
+            "month": self.key.month, "decade": self.key.decade, "method": self.key.method,
+            "points": self.points, "fingerprint": self.fingerprint,
+            "grid": {"west": self.grid.west, "south": self.grid.south, "east": self.grid.east,
+                     "north": self.grid.north, "cell": self.grid.cell,
+                     "width": self.grid.width, "height": self.grid.height},
+            "vmin": self.vmin, "vmax": self.vmax,
+            "variogram": None if self.variogram is None else {
+                "model": self.variogram.model, "nugget": round(self.variogram.nugget, 6),
+                "sill": round(self.variogram.sill, 6), "range_km": round(self.variogram.range_km, 1),
+            },
+            "elapsed_s": self.elapsed_s, "computed_at": self.computed_at,
+        }
+
+
+def build_surface(key: SurfaceKey, inputs: Inputs, grid: Grid, options: Options, executor=None) -> Surface:
+    started = time.perf_counter()
+    values, variogram = interpolate(
+        grid, inputs.lat, inputs.lon, inputs.values, replace(options, method=key.method), executor=executor,
+    )
+    finite = values[np.isfinite(values)]
+    vmin, vmax = (float(v) for v in np.percentile(finite, (2, 98))) if finite.size else (None, None)
+    return Surface(
+        key=key, grid=grid, values=values, fingerprint=inputs.fingerprint, points=len(inputs.values),
+        vmin=vmin, vmax=vmax, variogram=variogram, elapsed_s=round(time.perf_counter() - started, 3),
+        computed_at=dt.datetime.now(dt.timezone.utc).isoformat(),
+    )
+
+
+# ---- tiles ----
+
+def tile_pixels(z: int, x: int, y: int, size: int = TILE_SIZE) -> Tuple[np.ndarray, np.ndarray]:
+    """Latitudes (rows) and longitudes (columns) of the pixel centres of a web mercator tile."""
+    n = 2 ** z
+    fraction = (np.arange(size) + 0.5) / size
+    lon = (x + fraction) / n * 360.0 - 180.0
+    lat = np.degrees(np.arctan(np.sinh(math.pi * (1 - 2 * (y + fraction) / n))))
+    return lat, lon
+
+
+def tile_bounds_3857(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    span = 2 * WEB_MERCATOR_HALF / 2 ** z
+    west = -WEB_MERCATOR_HALF + x * span
+    north = WEB_MERCATOR_HALF - y * span
+    return west, north - span, west + span, north
+
+
+def sample(grid: Grid, values: np.ndarray, lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Bilinear sample on the (lat rows x lon columns) mesh; nearest cell next to no-data, NaN outside."""
+    col = (lon - grid.west) / grid.cell - 0.5
+    row = (grid.north - lat) / grid.cell - 0.5
+    height, width = values.shape
+    c0 = np.clip(np.floor(col), 0, max(width - 2, 0)).astype(np.intp)
+    r0 = np.clip(np.floor(row), 0, max(height - 2, 0)).astype(np.intp)
+    c1, r1 = np.minimum(c0 + 1, width - 1), np.minimum(r0 + 1, height - 1)
+    fx = np.clip(col - c0, 0.0, 1.0)[None, :]
+    fy = np.clip(row - r0, 0.0, 1.0)[:, None]
+    r0, r1 = r0[:, None], r1[:, None]
+    out = ((1 - fy) * ((1 - fx) * values[r0, c0] + fx * values[r0, c1])
+           + fy * ((1 - fx) * values[r1, c0] + fx * values[r1, c1]))
+    near = values[np.clip(np.rint(row), 0, height - 1).astype(np.intp)[:, None],
+                  np.clip(np.rint(col), 0, width - 1).astype(np.intp)[None, :]]
+    out = np.where(np.isnan(out), near, out)
+    inside = ((row >= -0.5) & (row <= height - 0.5))[:, None] & ((col >= -0.5) & (col <= width - 0.5))[None, :]
+    return np.where(inside, out, np.nan).astype(np.float32)
+
+
+def _lut() -> np.ndarray:
+    positions = np.array([p for p, _ in RAMP])
+    colours = np.array([c for _, c in RAMP], dtype=float)
+    steps = np.linspace(0, 1, 256)
+    lut = np.empty((256, 4), dtype=np.uint8)
+    for channel in range(3):
+        lut[:, channel] = np.rint(np.interp(steps, positions, colours[:, channel]))
+    lut[:, 3] = ALPHA
+    return lut
+
+
+LUT = _lut()
+
+
+def colourize(values: np.ndarray, vmin: float, vmax: float) -> np.ndarray:
+    scale = (values - vmin) / (vmax - vmin) if vmax > vmin else np.zeros_like(values)
+    index = np.clip(np.rint(np.nan_to_num(scale) * 255), 0, 255).astype(np.uint8)
+    rgba = LUT[index]
+    rgba[np.isnan(values)] = 0
+    return rgba
+
+
+def encode_png(rgba: np.ndarray) -> bytes:
+    height, width, _ = rgba.shape
+    raw = np.hstack((np.zeros((height, 1), dtype=np.uint8), rgba.reshape(height, width * 4))).tobytes()
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw, 6))
+            + chunk(b"IEND", b""))
+
+
+def encode_geotiff(values: np.ndarray, bounds: Tuple[float, float, float, float]) -> bytes:
+    from rasterio.io import MemoryFile  # optional dependency, only for GeoTIFF
+    from rasterio.transform import from_bounds
+
+    height, width = values.shape
+    with MemoryFile() as memfile:
+        with memfile.open(
+            driver="GTiff", width=width, height=height, count=1, dtype="float32", crs="EPSG:3857",
+            transform=from_bounds(*bounds, width, height), nodata=float("nan"), compress="deflate",
+        ) as dataset:
+            dataset.write(values, 1)
+        return memfile.read()
+
+
+def render_tile(surface: Surface, z: int, x: int, y: int, fmt: str, vmin: float, vmax: float) -> bytes:
+    """PNG (colour ramp over [vmin, vmax]) or float32 GeoTIFF; empty bytes when the tile has no data."""
+    lat, lon = tile_pixels(z, x, y)
+    values = sample(surface.grid, surface.values, lat, lon)
+    if not np.isfinite(values).any():
+        return b""
+    if fmt == "tif":
+        return encode_geotiff(values, tile_bounds_3857(z, x, y))
+    return encode_png(colourize(values, vmin, vmax))
+
+
+# ---- cache ----
+
+class SurfaceCache:
+    """LRU of computed surfaces plus their tiles; see the module docstring for invalidation.
+
+    Concurrent requests for a surface that is not ready share one computation.
+    Large grids are evaluated on a process pool created on first use.
+    """
+    def __init__(
+        self,
+        sessionmaker: async_sessionmaker[AsyncSession],
+        tiles: TileCache,
+        *,
+        grid: Grid,
+        options: Options,
+        max_surfaces: int = 16,
+        workers: int | None = None,
+        parallel_min_cells: int = 200_000,
+    ):
+        self.sessionmaker = sessionmaker
+        self.tiles = tiles
+        self.grid = grid
+        self.options = options
+        self.max_surfaces = max_surfaces
+        self.workers = workers or os.cpu_count() or 1
+        self.parallel_min_cells = parallel_min_cells
+        self._surfaces: "OrderedDict[SurfaceKey, Surface]" = OrderedDict()
+        self._verified: Dict[SurfaceKey, int] = {}
+        self._pending: Dict[SurfaceKey, asyncio.Task] = {}
+        self._generation = 0
+        self._executor: ProcessPoolExecutor | None = None
+        self._executor_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+
+    async def surface(self, key: SurfaceKey) -> Surface:
+        surface = self._surfaces.get(key)
+        if surface is not None and self._verified.get(key) == self._generation:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        task = self._pending.get(key)
+        if task is None:
+            task = asyncio.create_task(self._resolve(key, surface), name=f"surface:{key.layer}")
+            self._pending[key] = task
+            task.add_done_callback(lambda t: self._finished(key, t))
+        return await asyncio.shield(task)
+
+    def _finished(self, key: SurfaceKey, task: asyncio.Task) -> None:
+        self._pending.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # retrieved here in case every waiter was cancelled
+
+    async def _resolve(self, key: SurfaceKey, previous: Surface | None) -> Surface:
+        generation = self._generation
+        async with self.sessionmaker() as session:
+            inputs = await load_inputs(session, key)
+        if previous is not None and previous.fingerprint == inputs.fingerprint:
+            self._verified[key] = generation
+            self.revalidated += 1
+            return previous
+        self.misses += 1
+        surface = await asyncio.to_thread(build_surface, key, inputs, self.grid, self.options, self._pool())
+        if previous is not None:
+            self.tiles.invalidate_layer(key.layer)
+        self._surfaces[key] = surface
+        self._surfaces.move_to_end(key)
+        self._verified[key] = generation
+        while len(self._surfaces) > self.max_surfaces:
+            evicted, _ = self._surfaces.popitem(last=False)
+            self._verified.pop(evicted, None)
+        return surface
+
+    def _pool(self) -> ProcessPoolExecutor | None:
+        if self.workers <= 1 or self.grid.width * self.grid.height < self.parallel_min_cells:
+            return None
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    async def tile(
+        self, surface: Surface, z: int, x: int, y: int, fmt: str, vmin: float | None = None, vmax: float | None = None,
+    ) -> bytes:
+        low = vmin if vmin is not None else surface.vmin if surface.vmin is not None else 0.0
+        high = vmax if vmax is not None else surface.vmax if surface.vmax is not None else 1.0
+        style = (fmt, surface.fingerprint) if fmt == "tif" else (fmt, surface.fingerprint, f"{low:g}", f"{high:g}")
+        key = (surface.key.layer, style, surface.key.depth, z, x, y)
+        tile = await self.tiles.get(key)
+        if tile is None:
+            generation = self.tiles.generation(surface.key.layer)
+            tile = await asyncio.to_thread(render_tile, surface, z, x, y, fmt, low, high)
+            await self.tiles.put(key, tile, generation)
+        return tile
+
+    def invalidate_table(self, table: str) -> None:
+        if table in DEPENDS_ON:
+            self._generation += 1
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "surfaces": len(self._surfaces), "generation": self._generation, "hits": self.hits,
+            "misses": self.misses, "revalidated": self.revalidated, **{f"tile_{k}": v for k, v in self.tiles.stats().items()},
+        }
@@ -0,0 +1,244 @@
+# backend/services/tiles.py
+"""Mapbox Vector Tiles for stations, soil points and site bounds (ST_AsMVT)."""
+from __future__ import annotations
+import asyncio
+import hashlib
+import os
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+DEPTHS = ("0-20", "0-50", "0-100")
+
+
+@dataclass(frozen=True)
+class TileLayer:
+    table: str
+    geom: str
+    id_column: str
+    # attribute name -> SQL expression over the row alias `t`
+    attributes: Dict[str, str]
+    default_attributes: Tuple[str, ...]
+    # tables whose changes make cached tiles of this layer stale
+    depends_on: Tuple[str, ...]
+
+
+_LATEST_MANUAL = """(
+    SELECT m.{column} FROM soil_decadal_manual m
+    WHERE m.soil_point_id = t.soil_point_id AND m.depth = CAST(:depth AS depth_code)
+    ORDER BY m.year DESC, m.month DESC, m.decade DESC
+    LIMIT 1
+)"""
+
+LAYERS: Dict[str, TileLayer] = {
+    "stations": TileLayer(
+        table="stations",
+        geom="geom",
+        id_column="station_id",
+        attributes={
+            "code": "t.code",
+            "name": "t.name",
+            "source": "t.source::text",
+            "alt_m": "t.alt_m",
+        },
+        default_attributes=("code", "name"),
+        depends_on=("stations",),
+    ),
+    "soil_points": TileLayer(
+        table="soil_points",
+        geom="geom",
+        id_column="soil_point_id",
+        attributes={
+            "code": "t.code",
+            "name": "t.name",
+            "station_id": "t.station_id::text",
+            "latest_moisture_mm": _LATEST_MANUAL.format(column="value_mm"),
+            "latest_moisture_frac": _LATEST_MANUAL.format(column="value_frac"),
+            "latest_period": _LATEST_MANUAL.format(
+                column="format('%s-%s-%s', m.year, lpad(m.month::text, 2, '0'), m.decade)"
+            ),
+        },
+        default_attributes=("code", "name"),
+        depends_on=("soil_points", "soil_decadal_manual"),
+    ),
+    "sites": TileLayer(
+        table="sites",
+        geom="bounds",
+        id_column="site_id",
+        attributes={
+            "code": "t.code",
+            "name": "t.name",
+            "source": "t.source::text",
+        },
+        default_attributes=("code", "name"),
+        depends_on=("sites",),
+    ),
+}
+
+
+def resolve_attributes(layer: TileLayer, requested: Iterable[str] | None) -> Tuple[str, ...]:
+    if requested is None:
+        return layer.default_attributes
+    names = tuple(dict.fromkeys(a.strip() for a in requested if a.strip()))
+    unknown = [a for a in names if a not in layer.attributes]
+    if unknown:
+        raise ValueError(f"Unknown attributes {unknown}; available: {sorted(layer.attributes)}")
+    return names
+
+
+def tile_sql(name: str, layer: TileLayer, attributes: Tuple[str, ...]) -> str:
+    columns = "".join(f", {layer.attributes[a]} AS \"{a}\"" for a in attributes)
+    # The envelope is transformed to 4326 so the GiST index on the geometry column is used.
+    return f"""
+        WITH bounds AS (
+            SELECT ST_TileEnvelope(:z, :x, :y) AS merc,
+                   ST_Transform(ST_TileEnvelope(:z, :x, :y, margin => :margin), 4326) AS geo
+        ),
+        mvtgeom AS (
+            SELECT ST_AsMVTGeom(ST_Transform(t.{layer.geom}, 3857), bounds.merc, :extent, :buffer, true) AS geom,
+                   t.{layer.id_column}::text AS id{columns}
+            FROM {layer.table} t, bounds
+            WHERE t.{layer.geom} && bounds.geo
+        )
+        SELECT ST_AsMVT(mvtgeom.*, '{name}', :extent, 'geom') FROM mvtgeom
+    """
+
+
+async def render_tile(
+    session: AsyncSession,
+    name: str,
+    attributes: Tuple[str, ...],
+    z: int, x: int, y: int,
+    *,
+    depth: str = "0-20",
+    extent: int = 4096,
+    buffer: int = 64,
+) -> bytes:
+    layer = LAYERS[name]
+    result = await session.execute(
+        text(tile_sql(name, layer, attributes)).execution_options(metrics_label=f"tile:{name}"),
+        {"z": z, "x": x, "y": y, "extent": extent, "buffer": buffer,
+         "margin": buffer / extent, "depth": depth},
+    )
+    return bytes(result.scalar() or b"")
+
+
+TileKey = Tuple[str, Tuple[str, ...], str, int, int, int]
+
+
+class TileCache:
+    """LRU tile cache bounded by total bytes, optionally backed by a directory.
+
+    Invalidation is per layer: a change to any table a layer depends on drops
+    all of its tiles. `generation(layer)` lets a renderer detect that the layer
+    was invalidated while it was rendering, so it does not store a stale tile.
+    """
+    def __init__(self, *, max_bytes: int, directory: str | None = None):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self._tiles: "OrderedDict[TileKey, bytes]" = OrderedDict()
+        self._size = 0
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def generation(self, layer: str) -> int:
+        return self._generations.get(layer, 0)
+
+    def _path(self, key: TileKey) -> str:
+        layer, attributes, depth, z, x, y = key
+        variant = hashlib.sha1(f"{','.join(attributes)}|{depth}".encode()).hexdigest()[:12]
+        return os.path.join(self.directory, layer, variant, str(z), str(x), f"{y}.mvt")
+
+    async def get(self, key: TileKey) -> bytes | None:
+        with self._lock:
+            tile = self._tiles.get(key)
+            if tile is not None:
+                self._tiles.move_to_end(key)
+                self.hits += 1
+                return tile
+        if self.directory:
+            tile = await asyncio.to_thread(self._read, self._path(key))
+            if tile is not None:
+                self._remember(key, tile)
+                self.hits += 1
+                return tile
+        self.misses += 1
+        return None
+
+    async def put(self, key: TileKey, tile: bytes, generation: int) -> None:
+        if generation != self.generation(key[0]):
+            return  # layer changed while rendering
+        self._remember(key, tile)
+        if self.directory:
+            path = self._path(key)
+            await asyncio.to_thread(self._write, path, tile)
+            if generation != self.generation(key[0]):
+                # invalidated during the write, which may have recreated the renamed layer directory
+                await asyncio.to_thread(self._remove, path)
+
+    @staticmethod
+    def _read(path: str) -> bytes | None:
+        try:
+            with open(path, "rb") as fh:
+                return fh.read()
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _write(path: str, tile: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as fh:
+            fh.write(tile)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _remember(self, key: TileKey, tile: bytes) -> None:
+        if len(tile) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._tiles.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._tiles[key] = tile
+            self._size += len(tile)
+            while self._size > self.max_bytes:
+                _, evicted = self._tiles.popitem(last=False)
+                self._size -= len(evicted)
+
+    def invalidate_layer(self, layer: str) -> None:
+        with self._lock:
+            self._generations[layer] = self.generation(layer) + 1
+            for key in [k for k in self._tiles if k[0] == layer]:
+                self._size -= len(self._tiles.pop(key))
+        if self.directory:
+            # Rename is atomic and cheap; the actual delete happens off the event loop.
+            layer_dir = os.path.join(self.directory, layer)
+            stale_dir = f"{layer_dir}.stale-{uuid.uuid4().hex}"
+            try:
+                os.rename(layer_dir, stale_dir)
+            except FileNotFoundError:
+                return
+            threading.Thread(target=shutil.rmtree, args=(stale_dir, True), daemon=True).start()
+
+    def invalidate_table(self, table: str) -> None:
+        for name, layer in LAYERS.items():
+            if table in layer.depends_on:
+                self.invalidate_layer(name)
+
+    def stats(self) -> Dict[str, int]:
+        return {"tiles": len(self._tiles), "bytes": self._size, "hits": self.hits, "misses": self.misses}
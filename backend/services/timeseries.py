@@ -0,0 +1,170 @@
+# backend/services/timeseries.py
+"""Keyset-paginated reads of the measurement tables.
+
+Pages continue from the last key seen (`WHERE (key...) > (:cursor...)`) instead
+of OFFSET, so page N costs the same as page 1 and walks the composite indexes
+(`idx_meteo_daily_station_date`, `uq_soil_decadal_*`).
+"""
+from __future__ import annotations
+import base64
+import datetime as dt
+import json
+import uuid
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from sqlalchemy import Select, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db.models import MeteoDaily, MeteoDecadal, SoilDecadalExternal, SoilDecadalManual
+
+EXTERNAL_SOURCES = ("era5_land", "amsr2")
+DEPTHS = ("0-20", "0-50", "0-100")
+
+METEO_FIELDS = ("date", "air_temp_avg_c", "air_temp_max_c", "air_temp_min_c",
+                "rel_humidity", "precipitation_mm", "source")
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([v.isoformat() if isinstance(v, dt.date) else v for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _cursor_int(value: Any) -> int:
+    if type(value) is not int or not -2**31 <= value < 2**31:  # bool is an int too
+        raise ValueError("Invalid cursor")
+    return value
+
+
+def _cursor_date(value: Any) -> dt.date:
+    if not isinstance(value, str):
+        raise ValueError("Invalid cursor")
+    return dt.date.fromisoformat(value)
+
+
+def _cursor_depth(value: Any) -> str:
+    if value not in DEPTHS:
+        raise ValueError("Invalid cursor")
+    return value
+
+
+def decode_cursor(cursor: str, *parsers: Callable[[Any], Any]) -> List[Any]:
+    """Key values from `encode_cursor`, one parser per element; ValueError for anything malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(parsers):
+        raise ValueError("Invalid cursor")
+    try:
+        return [parse(v) for parse, v in zip(parsers, values)]
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def decade_of(day: dt.date) -> Tuple[int, int, int]:
+    """(year, month, decade) with decades 1–10, 11–20 and 21–end of month."""
+    return day.year, day.month, min((day.day - 1) // 10 + 1, 3)
+
+
+def to_page(rows: Sequence[Dict[str, Any]], limit: int, key: Sequence[str], columnar: bool) -> Dict[str, Any]:
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor([rows[-1][k] for k in key]) if has_more and rows else None
+    if columnar:
+        names = list(rows[0].keys()) if rows else []
+        return {"columns": {n: [r[n] for r in rows] for n in names}, "count": len(rows), "next_cursor": next_cursor}
+    return {"items": list(rows), "count": len(rows), "next_cursor": next_cursor}
+
+
+async def _fetch(session: AsyncSession, stmt: Select) -> List[Dict[str, Any]]:
+    result = await session.execute(stmt)
+    return [dict(r) for r in result.mappings()]
+
+
+async def station_meteo_page(
+    session: AsyncSession,
+    station_id: uuid.UUID,
+    *,
+    date_from: dt.date | None = None,
+    date_to: dt.date | None = None,
+    cursor: str | None = None,
+    limit: int = 1000,
+    columnar: bool = False,
+) -> Dict[str, Any]:
+    t = MeteoDaily.__table__.c
+    stmt = select(*(t[f] for f in METEO_FIELDS)).where(t.station_id == station_id)
+    if date_from is not None:
+        stmt = stmt.where(t.date >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(t.date <= date_to)
+    if cursor:
+        (after,) = decode_cursor(cursor, _cursor_date)
+        stmt = stmt.where(tuple_(t.station_id, t.date) > tuple_(station_id, after))
+    stmt = stmt.order_by(t.station_id, t.date).limit(limit + 1)
+    return to_page(await _fetch(session, stmt), limit, ("date",), columnar)
+
+
+async def station_meteo_decadal_page(
+    session: AsyncSession,
+    station_id: uuid.UUID,
+    *,
+    date_from: dt.date | None = None,
+    date_to: dt.date | None = None,
+    cursor: str | None = None,
+    limit: int = 1000,
+    columnar: bool = False,
+) -> Dict[str, Any]:
+    t = MeteoDecadal.__table__.c
+    stmt = select(*(c for c in t if c.name != "station_id")).where(t.station_id == station_id)
+    period = tuple_(t.year, t.month, t.decade)
+    if date_from is not None:
+        stmt = stmt.where(period >= tuple_(*decade_of(date_from)))
+    if date_to is not None:
+        stmt = stmt.where(period <= tuple_(*decade_of(date_to)))
+    if cursor:
+        year, month, decade = decode_cursor(cursor, _cursor_int, _cursor_int, _cursor_int)
+        stmt = stmt.where(period > tuple_(year, month, decade))
+    stmt = stmt.order_by(t.year, t.month, t.decade).limit(limit + 1)
+    return to_page(await _fetch(session, stmt), limit, ("year", "month", "decade"), columnar)
+
+
+async def soil_point_decadal_page(
+    session: AsyncSession,
+    soil_point_id: uuid.UUID,
+    *,
+    source: str | None = None,
+    depth: str | None = None,
+    date_from: dt.date | None = None,
+    date_to: dt.date | None = None,
+    cursor: str | None = None,
+    limit: int = 1000,
+    columnar: bool = False,
+) -> Dict[str, Any]:
+    if source in EXTERNAL_SOURCES:
+        t = SoilDecadalExternal.__table__.c
+        fields = (t.year, t.month, t.decade, t.depth, t.value, t.units, t.source)
+        stmt = select(*fields).where(t.variable == "soil_moisture")
+    else:
+        t = SoilDecadalManual.__table__.c
+        fields = (t.year, t.month, t.decade, t.depth, t.value_mm, t.value_frac, t.quality_flag, t.source)
+        stmt = select(*fields)
+    stmt = stmt.where(t.soil_point_id == soil_point_id)
+    if source is not None:
+        stmt = stmt.where(t.source == source)
+    if depth is not None:
+        stmt = stmt.where(t.depth == depth)
+
+    period = tuple_(t.year, t.month, t.decade)
+    if date_from is not None:
+        stmt = stmt.where(period >= tuple_(*decade_of(date_from)))
+    if date_to is not None:
+        stmt = stmt.where(period <= tuple_(*decade_of(date_to)))
+    if cursor:
+        year, month, decade, last_depth = decode_cursor(cursor, _cursor_int, _cursor_int, _cursor_int, _cursor_depth)
+        stmt = stmt.where(
+            tuple_(t.year, t.month, t.decade, t.depth) > tuple_(year, month, decade, last_depth)
+        )
+    stmt = stmt.order_by(t.year, t.month, t.decade, t.depth).limit(limit + 1)
+    rows = await _fetch(session, stmt)
+    return to_page(rows, limit, ("year", "month", "decade", "depth"), columnar)
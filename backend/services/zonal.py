@@ -0,0 +1,346 @@
+# backend/services/zonal.py
+"""Zonal soil moisture statistics for the plots of an upstream field.
+
+The plots of a field (the `/field/get/{id}` FeatureCollection) are matched
+against a snapshot of the soil points held in a shapely STRtree: one
+vectorised `query(plots, predicate="intersects")` over prepared plot
+geometries finds the points inside every plot, and `query_nearest` gives
+the closest point (within `max_distance_km`) to plots with none inside.
+Coordinates are scaled by cos(latitude) first, so nearest-neighbour
+distances are close to isotropic; reported distances are great-circle km.
+
+For one decade, the matched points' manual readings (those QC left as
+`ok` or unchecked) and the ERA5-Land / AMSR2 values sampled at the same
+points are reduced per plot with bincount: mean, min, max and coverage
+(share of matched points with a value). External m3/m3 are converted to
+mm of water in the layer as in backend.services.comparison.
+
+Results are cached per (field geometry hash, decade, depth, source, radius)
+and dropped when the source tables change (NOTIFY, see backend.db.notify).
+"""
+from __future__ import annotations
+import asyncio
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..api.jsonlib import dumps
+from .comparison import LAYER_MM, VOLUMETRIC_UNITS
+from .quality import OK
+from .spatial import KM_PER_DEGREE, _chord_to_km, _unit_vectors
+
+DEPENDS_ON = ("soil_decadal_manual", "soil_decadal_external", "soil_points")
+
+EXTERNAL_SOURCES = ("era5_land", "amsr2")
+
+POINTS_SQL = text("""
+    SELECT soil_point_id::text AS id, code, lat, lon FROM soil_points ORDER BY soil_point_id
+""")
+
+LATEST_MANUAL_SQL = text("""
+    SELECT year, month, decade FROM soil_decadal_manual
+    WHERE soil_point_id = ANY(CAST(:ids AS uuid[]))
+      AND depth = CAST(:depth AS depth_code) AND source = CAST(:source AS source_type)
+    ORDER BY year DESC, month DESC, decade DESC
+    LIMIT 1
+""")
+
+LATEST_EXTERNAL_SQL = text("""
+    SELECT year, month, decade FROM soil_decadal_external
+    WHERE soil_point_id = ANY(CAST(:ids AS uuid[]))
+      AND depth = CAST(:depth AS depth_code) AND variable = 'soil_moisture'
+    ORDER BY year DESC, month DESC, decade DESC
+    LIMIT 1
+""")
+
+VALUES_SQL = text(f"""
+    SELECT soil_point_id::text AS id, source::text AS source, value_mm AS value, 'mm' AS units
+    FROM soil_decadal_manual
+    WHERE soil_point_id = ANY(CAST(:ids AS uuid[]))
+      AND year = :year AND month = :month AND decade = :decade
+      AND depth = CAST(:depth AS depth_code) AND source = CAST(:source AS source_type)
+      AND (quality_flag IS NULL OR quality_flag = '{OK}')
+    UNION ALL
+    SELECT soil_point_id::text, source::text, value, units
+    FROM soil_decadal_external
+    WHERE soil_point_id = ANY(CAST(:ids AS uuid[]))
+      AND year = :year AND month = :month AND decade = :decade
+      AND depth = CAST(:depth AS depth_code) AND variable = 'soil_moisture'
+""")
+
+# (geometry hash, (year, month, decade) or None = latest, depth, source, max_distance_km)
+ZonalKey = Tuple[str, Optional[Tuple[int, int, int]], str, str, float]
+
+
+def geometry_hash(collection: Dict[str, Any]) -> str:
+    """Stable hash of the plot geometries, in feature order (properties do not matter)."""
+    geometries = [feature.get("geometry") for feature in collection.get("features") or []]
+    return hashlib.blake2b(dumps(geometries), digest_size=16).hexdigest()
+
+
+@dataclass(frozen=True)
+class PointSnapshot:
+    ids: np.ndarray
+    codes: np.ndarray
+    lat: np.ndarray
+    lon: np.ndarray
+    scale: float  # x = lon * scale, y = lat
+    tree: Any  # shapely.STRtree over the scaled points
+
+    @classmethod
+    def build(cls, rows: List[Any]) -> "PointSnapshot":
+        import shapely  # optional dependency, only for zonal statistics
+
+        lat = np.fromiter((r.lat for r in rows), dtype=np.float64, count=len(rows))
+        lon = np.fromiter((r.lon for r in rows), dtype=np.float64, count=len(rows))
+        scale = math.cos(math.radians(float(lat.mean()))) if len(rows) else 1.0
+        return cls(
+            ids=np.asarray([r.id for r in rows], dtype=object),
+            codes=np.asarray([r.code for r in rows], dtype=object),
+            lat=lat, lon=lon, scale=scale,
+            tree=shapely.STRtree(shapely.points(lon * scale, lat)),
+        )
+
+
+@dataclass(frozen=True)
+class Matches:
+    """(plot, point) pairs: the points inside each plot, or its nearest point."""
+    plots: int
+    plot_idx: np.ndarray
+    point_idx: np.ndarray
+    distance_km: np.ndarray
+
+
+def plot_geometries(collection: Dict[str, Any], scale: float) -> np.ndarray:
+    """Plot geometries in the snapshot's scaled coordinates, prepared; None for features without one."""
+    import shapely
+
+    features = collection.get("features") or []
+    geoms = shapely.from_geojson(
+        [dumps(feature.get("geometry")) for feature in features], on_invalid="ignore",
+    ) if features else np.empty(0, dtype=object)
+    geoms = shapely.transform(shapely.make_valid(geoms), lambda xy: xy * (scale, 1.0))
+    shapely.prepare(geoms)
+    return geoms
+
+
+def match_points(snapshot: PointSnapshot, plots: np.ndarray, max_distance_km: float) -> Matches:
+    import shapely
+
+    empty = np.empty(0, dtype=np.int64)
+    if not len(plots) or not len(snapshot.ids):
+        return Matches(len(plots), empty, empty, np.empty(0))
+    plot_idx, point_idx = snapshot.tree.query(plots, predicate="intersects")
+    distance = np.zeros(len(plot_idx))
+
+    usable = np.flatnonzero(~shapely.is_missing(plots) & ~shapely.is_empty(plots))
+    missing = np.setdiff1d(usable, plot_idx)
+    if len(missing) and max_distance_km > 0:
+        # Scaled degrees are only roughly km / KM_PER_DEGREE: search wide, filter on the exact distance
+        (near, near_point), _ = snapshot.tree.query_nearest(
+            plots[missing], max_distance=1.5 * max_distance_km / KM_PER_DEGREE,
+            return_distance=True, all_matches=False,
+        )
+        near_plot = missing[near]
+        lines = shapely.shortest_line(plots[near_plot], snapshot.tree.geometries[near_point])
+        ends = shapely.get_coordinates(lines).reshape(-1, 2, 2)
+        a = _unit_vectors(ends[:, 0, 1], ends[:, 0, 0] / snapshot.scale)
+        b = _unit_vectors(ends[:, 1, 1], ends[:, 1, 0] / snapshot.scale)
+        km = _chord_to_km(np.linalg.norm(a - b, axis=1))
+        keep = km <= max_distance_km
+        plot_idx = np.concatenate((plot_idx, near_plot[keep]))
+        point_idx = np.concatenate((point_idx, near_point[keep]))
+        distance = np.concatenate((distance, km[keep]))
+    return Matches(len(plots), plot_idx.astype(np.int64), point_idx.astype(np.int64), distance)
+
+
+def reduce_plots(plot_idx: np.ndarray, values: np.ndarray, plots: int) -> Dict[str, np.ndarray]:
+    """Per-plot n / mean / min / max / coverage of the matched points' values (NaN = no value)."""
+    valid = np.isfinite(values)
+    idx, vals = plot_idx[valid], values[valid]
+    matched = np.bincount(plot_idx, minlength=plots)
+    n = np.bincount(idx, minlength=plots)
+    total = np.bincount(idx, weights=vals, minlength=plots)
+    low = np.full(plots, np.inf)
+    high = np.full(plots, -np.inf)
+    np.minimum.at(low, idx, vals)
+    np.maximum.at(high, idx, vals)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {
+            "n": n, "mean": total / n, "min": np.where(n > 0, low, np.nan),
+            "max": np.where(n > 0, high, np.nan), "coverage": n / matched,
+        }
+
+
+def _clean(value: Any, digits: int = 3) -> Any:
+    value = float(value)
+    return None if not np.isfinite(value) else round(value, digits)
+
+
+async def _latest_decade(session: AsyncSession, ids: List[str], depth: str, source: str) -> Tuple[int, int, int] | None:
+    params = {"ids": ids, "depth": depth, "source": source}
+    row = (await session.execute(LATEST_MANUAL_SQL, params)).first()
+    if row is None:  # no manual readings: the latest gridded decade
+        row = (await session.execute(LATEST_EXTERNAL_SQL, params)).first()
+    return (row.year, row.month, row.decade) if row is not None else None
+
+
+async def _point_values(
+    session: AsyncSession, ids: List[str], depth: str, source: str, decade: Tuple[int, int, int],
+) -> Dict[str, Dict[str, float]]:
+    """source -> {soil_point_id: value in mm}."""
+    year, month, dec = decade
+    rows = (await session.execute(VALUES_SQL, {
+        "ids": ids, "depth": depth, "source": source, "year": year, "month": month, "decade": dec,
+    })).all()
+    values: Dict[str, Dict[str, float]] = {}
+    for r in rows:
+        if r.value is None:
+            continue
+        value = float(r.value) * LAYER_MM[depth] if r.units in VOLUMETRIC_UNITS else float(r.value)
+        values.setdefault(r.source, {})[r.id] = value
+    return values
+
+
+async def field_stats(
+    session: AsyncSession,
+    snapshot: PointSnapshot,
+    collection: Dict[str, Any],
+    *,
+    depth: str,
+    source: str,
+    decade: Tuple[int, int, int] | None = None,
+    max_distance_km: float = 25.0,
+) -> Dict[str, Any]:
+    started = time.perf_counter()
+
+    def match() -> Matches:
+        return match_points(snapshot, plot_geometries(collection, snapshot.scale), max_distance_km)
+
+    matches = await asyncio.to_thread(match)
+    used = np.unique(matches.point_idx)
+    ids = [str(i) for i in snapshot.ids[used]]
+    if decade is None and ids:
+        decade = await _latest_decade(session, ids, depth, source)
+    values = await _point_values(session, ids, depth, source, decade) if decade is not None and ids else {}
+
+    pair_ids = snapshot.ids[matches.point_idx]
+    per_source = {
+        name: reduce_plots(
+            matches.plot_idx,
+            np.fromiter((values.get(name, {}).get(i, np.nan) for i in pair_ids), dtype=np.float64, count=len(pair_ids)),
+            matches.plots,
+        )
+        for name in (source, *EXTERNAL_SOURCES)
+    }
+    order = np.argsort(matches.plot_idx, kind="stable")
+    bounds = np.searchsorted(matches.plot_idx[order], np.arange(matches.plots + 1))
+
+    features = collection.get("features") or []
+    plots: List[Dict[str, Any]] = []
+    for p in range(matches.plots):
+        pairs = order[bounds[p]:bounds[p + 1]]
+        points = [
+            {
+                "soil_point_id": str(snapshot.ids[matches.point_idx[j]]),
+                "code": snapshot.codes[matches.point_idx[j]],
+                "distance_km": _clean(matches.distance_km[j]),
+            }
+            for j in pairs
+        ]
+        stats = {
+            name: {
+                "n": int(s["n"][p]), "mean": _clean(s["mean"][p]), "min": _clean(s["min"][p]),
+                "max": _clean(s["max"][p]), "coverage": _clean(s["coverage"][p]),
+            }
+            for name, s in per_source.items()
+            if s["n"][p] > 0
+        }
+        inside = len(pairs) > 0 and matches.distance_km[pairs].max() == 0.0
+        plots.append({
+            "index": p,
+            "id": features[p].get("id"),
+            "match": ("inside" if inside else "nearest") if len(pairs) else None,
+            "points": points,
+            "stats": stats,
+        })
+    return {
+        "decade": dict(zip(("year", "month", "decade"), decade)) if decade is not None else None,
+        "depth": depth,
+        "source": source,
+        "units": "mm",
+        "max_distance_km": max_distance_km,
+        "plots": plots,
+        "elapsed_s": round(time.perf_counter() - started, 3),
+    }
+
+
+class ZonalCache:
+    """Point snapshot (with its STRtree) plus an LRU of per-field results.
+
+    Same generation scheme as ComparisonCache: a result computed while the
+    data changed is not stored; the snapshot is rebuilt after `soil_points` changes.
+    """
+    def __init__(self, *, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._results: "OrderedDict[ZonalKey, Dict[str, Any]]" = OrderedDict()
+        self._points: PointSnapshot | None = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    async def points(self, session: AsyncSession) -> PointSnapshot:
+        snapshot = self._points
+        if snapshot is None:
+            generation = self._generation
+            rows = (await session.execute(POINTS_SQL)).all()
+            snapshot = await asyncio.to_thread(PointSnapshot.build, rows)
+            if generation == self._generation:
+                self._points = snapshot
+        return snapshot
+
+    def get(self, key: ZonalKey) -> Dict[str, Any] | None:
+        with self._lock:
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+                self.hits += 1
+                return result
+        self.misses += 1
+        return None
+
+    def put(self, key: ZonalKey, result: Dict[str, Any], generation: int) -> None:
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._results[key] = result
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+
+    def invalidate_table(self, table: str) -> None:
+        if table in DEPENDS_ON:
+            with self._lock:
+                self._generation += 1
+                self._results.clear()
+                if table == "soil_points":
+                    self._points = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._results), "generation": self._generation, "hits": self.hits, "misses": self.misses,
+            "points": len(self._points.ids) if self._points is not None else 0,
+        }
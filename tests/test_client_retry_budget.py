@@ -0,0 +1,40 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from backend.api.client import ExternalAPIClient
+from backend.api.config import ExternalAPISettings
+
+
+def test_retries_share_the_budget_with_slow_attempts():
+    timeouts = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        timeout = request.extensions["timeout"]["read"]
+        timeouts.append(timeout)
+        await asyncio.sleep(timeout)  # upstream as slow as the attempt allows
+        raise httpx.ReadTimeout("slow", request=request)
+
+    settings = ExternalAPISettings(
+        base_url="http://upstream.test", timeout=0.3, retry_budget=0.5, retry_attempts=5,
+        retry_base_delay=0.0, retry_max_delay=0.0, cache_enabled=False, hedge_enabled=False,
+    )
+
+    async def scenario():
+        api = await ExternalAPIClient(settings, transport=httpx.MockTransport(handler)).open()
+        try:
+            started = time.monotonic()
+            with pytest.raises(HTTPException) as exc:
+                await api._send("field", "GET", "/field/get/1")
+            return exc.value.status_code, time.monotonic() - started
+        finally:
+            await api.aclose()
+
+    status, elapsed = asyncio.run(scenario())
+    assert status == 504
+    assert timeouts[0] == pytest.approx(0.3)
+    assert all(t < 0.3 for t in timeouts[1:])
+    assert elapsed < 0.5 + 0.1
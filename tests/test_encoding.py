@@ -0,0 +1,46 @@
+import asyncio
+
+from starlette.requests import Request
+
+from backend.api.encoding import accepts, encoded_response, etag_for
+
+BODY = b'{"type": "FeatureCollection", "features": []}' * 100
+
+
+def _request(**headers):
+    raw = [(k.replace("_", "-").encode(), v.encode()) for k, v in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw, "query_string": b""})
+
+
+def _respond(**headers):
+    return asyncio.run(encoded_response(_request(**headers), BODY, media_type="application/json"))
+
+
+def test_each_coding_gets_its_own_etag():
+    identity = _respond(accept_encoding="identity").headers["etag"]
+    gzipped = _respond(accept_encoding="gzip").headers["etag"]
+    assert identity == etag_for(BODY)
+    assert gzipped == identity[:-1] + '-gzip"'
+    assert _respond(accept_encoding="gzip").headers["content-encoding"] == "gzip"
+
+
+def test_tag_of_any_coding_revalidates():
+    gzipped = _respond(accept_encoding="gzip").headers["etag"]
+    assert _respond(accept_encoding="gzip", if_none_match=gzipped).status_code == 304
+    assert _respond(accept_encoding="identity", if_none_match=f"W/{gzipped}").status_code == 304
+    assert _respond(accept_encoding="gzip", if_none_match='"other"').status_code == 200
+
+
+def test_gzip_refused_with_q_zero():
+    response = _respond(accept_encoding="gzip;q=0")
+    assert "content-encoding" not in response.headers
+
+
+def test_accepts_honours_q_values():
+    assert accepts("gzip, br", "gzip")
+    assert not accepts("gzip;q=0", "gzip")
+    assert not accepts("br;q=1.0, gzip;q=0", "gzip")
+    assert accepts("*;q=0.5", "gzip")
+    assert not accepts("*, gzip;q=0", "gzip")
+    assert not accepts("x-gzip", "gzip")
+    assert not accepts("", "gzip")
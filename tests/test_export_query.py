@@ -0,0 +1,28 @@
+import datetime as dt
+
+import pytest
+
+from backend.services.export import DATASETS, build_query
+
+
+def test_enum_filters_compare_as_the_enum_type():
+    sql, params = build_query(
+        DATASETS["soil_decadal_external"],
+        {"source": ["era5_land"], "depth": ["0-20", "0-50"], "soil_point_id": None},
+        dt.date(2024, 5, 15), None,
+    )
+    assert "source = ANY(CAST(:source AS source_type[]))" in sql
+    assert "depth = ANY(CAST(:depth AS depth_code[]))" in sql
+    assert "::text = ANY" not in sql
+    assert params["depth"] == ["0-20", "0-50"]
+    assert (params["y0"], params["m0"], params["d0"]) == (2024, 5, 2)
+
+
+def test_unknown_enum_label_is_rejected():
+    with pytest.raises(ValueError, match="source"):
+        build_query(DATASETS["meteo_daily"], {"source": ["kazhydromet", "nasa"]}, None, None)
+
+
+def test_filter_not_offered_by_dataset():
+    with pytest.raises(ValueError):
+        build_query(DATASETS["meteo_decadal"], {"source": ["uni"]}, None, None)
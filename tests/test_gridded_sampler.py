@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from backend.ingest.gridded import PRODUCTS, Sampler, fractional_index, geotiff_bands
+
+GRID_LAT = np.array([55.0, 54.8, 54.6])
+GRID_LON = np.array([70.0, 70.1, 70.2, 70.3])
+GRID = np.arange(12, dtype=np.float64).reshape(1, 3, 4)  # value = row * 4 + col
+
+
+def _sample(lat, lon, method="bilinear"):
+    sampler = Sampler.build(
+        fractional_index(GRID_LAT, np.asarray(lat)), fractional_index(GRID_LON, np.asarray(lon)),
+        GRID.shape[1:], method,
+    )
+    return sampler.sample(GRID[:, sampler.window[0], sampler.window[1]])[0]
+
+
+@pytest.mark.parametrize("method", ["bilinear", "nearest"])
+def test_points_on_grid_lines(method):
+    # (54.8, 70.1) sits exactly on a grid node: its y1/x1 corners carry zero weight
+    values = _sample([54.8, 54.85], [70.1, 70.15], method)
+    assert values[0] == pytest.approx(5.0)
+    if method == "bilinear":
+        assert values[1] == pytest.approx(4.5)
+
+
+def test_points_outside_grid_are_nan():
+    values = _sample([54.8, 40.0], [70.1, 70.15])
+    assert values[0] == pytest.approx(5.0)
+    assert np.isnan(values[1])
+    assert np.isnan(_sample([40.0], [60.0])).all()
+
+
+def test_geotiff_bands_by_description():
+    bands = geotiff_bands(("swvl1", "swvl2", "swvl3"), PRODUCTS["era5_land"])
+    assert bands == {"swvl1": 1, "swvl2": 2, "swvl3": 3}
+    assert geotiff_bands((None,), PRODUCTS["amsr2"]) == {"sm": 1}
+
+
+def test_geotiff_bands_undescribed_multilayer_product_is_rejected():
+    with pytest.raises(ValueError, match="swvl1"):
+        geotiff_bands((None, None), PRODUCTS["era5_land"])
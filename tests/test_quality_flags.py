@@ -0,0 +1,29 @@
+import numpy as np
+
+from backend.services.quality import flag_cube
+
+
+def _flags(series):
+    """Masks for a single 0-20 cm series at one point without neighbours."""
+    cube = np.full((3, len(series), 1), np.nan)
+    cube[0, :, 0] = series
+    frac = cube / 110.0
+    neighbours = np.full((1, 1), -1)
+    return {name: mask[0, :, 0] for name, mask in flag_cube(cube, frac, neighbours).items()}
+
+
+def test_step_is_flagged_when_the_new_level_persists():
+    flags = _flags([20.0, 21.0, 60.0, 61.0, 60.5])
+    assert flags["step"].tolist() == [False, False, True, False, False]
+
+
+def test_reading_after_spike_is_not_a_step():
+    flags = _flags([20.0, 21.0, 90.0, 22.0, 21.5])
+    assert flags["spike"].tolist() == [False, False, True, False, False]
+    assert not flags["step"].any()
+
+
+def test_reading_after_range_outlier_is_not_a_step():
+    flags = _flags([20.0, 21.0, 500.0, 500.0, 22.0, 21.5])
+    assert flags["range"].tolist() == [False, False, True, True, False, False]
+    assert flags["step"].tolist() == [False, False, True, False, False, False]
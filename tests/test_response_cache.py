@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+
+from backend.api.cache import ResponseCache
+
+
+def test_cancelled_leader_does_not_cancel_coalesced_waiters():
+    async def scenario():
+        cache = ResponseCache(ttl=60)
+        release = asyncio.Event()
+        calls = 0
+
+        async def fetch(stale):
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return cache.entry("value")
+
+        key = cache.make_key("field", 1)
+        leader = asyncio.create_task(cache.get_or_fetch(key, fetch))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get_or_fetch(key, fetch))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        assert await waiter == "value"
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        assert calls == 1
+        assert cache.peek(key).value == "value"
+        assert cache.stats()["coalesced"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_failed_fetch_is_shared_and_not_cached():
+    async def scenario():
+        cache = ResponseCache(ttl=60)
+
+        async def fail(stale):
+            await asyncio.sleep(0)
+            raise RuntimeError("upstream down")
+
+        async def succeed(stale):
+            return cache.entry("value")
+
+        key = cache.make_key("field", 1)
+        results = await asyncio.gather(
+            cache.get_or_fetch(key, fail), cache.get_or_fetch(key, fail), return_exceptions=True,
+        )
+        assert [type(r) for r in results] == [RuntimeError, RuntimeError]
+        assert await cache.get_or_fetch(key, succeed) == "value"
+
+    asyncio.run(scenario())
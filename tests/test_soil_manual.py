@@ -0,0 +1,55 @@
+import asyncio
+
+from backend.ingest import soil_manual
+from backend.services import quality
+
+
+def test_quality_control_runs_once_over_all_chunks(monkeypatch):
+    point = object()
+    checked = []
+
+    async def load(conn):
+        return soil_manual.SoilPointLookup({"P1": point})
+
+    async def copy_upsert(conn, table, columns, records, **kwargs):
+        return len(records)
+
+    async def check_decades(conn, decades):
+        checked.append(set(decades))
+        report = quality.QCReport(counts={name: 0 for name in (quality.OK, *quality.CHECKS)}, rows_updated=7)
+        report.counts[quality.OK] = 7
+        return report
+
+    monkeypatch.setattr(soil_manual.SoilPointLookup, "load", staticmethod(load))
+    monkeypatch.setattr(soil_manual, "copy_upsert", copy_upsert)
+    monkeypatch.setattr(quality, "check_decades", check_decades)
+
+    def row(year, month, decade):
+        return {"point": "P1", "year": year, "month": month, "decade": decade, "depth": "0-20", "mm": "25"}
+
+    chunks = iter([
+        [row(2023, 1, 1), row(2023, 1, 2)],
+        [row(2024, 6, 3)],
+        [row(2023, 1, 2)],
+    ])
+    report = asyncio.run(soil_manual.ingest_chunks(None, chunks))
+
+    assert report.chunks == 3
+    assert report.rows_written == 4
+    assert checked == [{
+        quality.absolute_decade(2023, 1, 1), quality.absolute_decade(2023, 1, 2), quality.absolute_decade(2024, 6, 3),
+    }]
+    assert report.qc_rows_updated == 7
+    assert report.qc_counts[quality.OK] == 7
+
+
+def test_parse_errors_are_capped():
+    report = soil_manual.IngestReport()
+    columns = {"point_code": "point", "year": "year", "month": "month", "decade": "decade", "depth": "depth",
+               "value_mm": "mm"}
+    points = soil_manual.SoilPointLookup({"P1": object()})
+    rows = [{"point": "P1", "year": 2024, "month": 1, "decade": 1, "depth": "0-30", "mm": "1"}] * 250
+    assert soil_manual.to_records(rows, columns, points, "kazhydromet", report) == []
+    assert len(report.errors) == soil_manual.MAX_ERRORS
+    assert report.errors_dropped == 250 - soil_manual.MAX_ERRORS
+    assert report.as_dict()["errors_dropped"] == 150
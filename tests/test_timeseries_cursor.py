@@ -0,0 +1,35 @@
+import datetime as dt
+
+import pytest
+
+from backend.services.timeseries import _cursor_date, _cursor_depth, _cursor_int, decode_cursor, encode_cursor
+
+
+def test_round_trip():
+    cursor = encode_cursor([2024, 5, 2, "0-50"])
+    assert decode_cursor(cursor, _cursor_int, _cursor_int, _cursor_int, _cursor_depth) == [2024, 5, 2, "0-50"]
+    assert decode_cursor(encode_cursor([dt.date(2024, 5, 3)]), _cursor_date) == [dt.date(2024, 5, 3)]
+
+
+@pytest.mark.parametrize("values", [
+    [2024, 5],  # too few
+    [2024, 5, 2, "0-50"],  # too many
+    [2024, "5", 2],
+    [2024, 5.0, 2],
+    [True, 5, 2],
+    [2024, 5, 2 ** 40],
+])
+def test_malformed_decade_cursor(values):
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor(values), _cursor_int, _cursor_int, _cursor_int)
+
+
+@pytest.mark.parametrize("cursor", [encode_cursor([20240503]), encode_cursor(["2024-13-01"]), "%%%", encode_cursor({})])
+def test_malformed_date_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, _cursor_date)
+
+
+def test_unknown_depth():
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor([2024, 5, 2, "0-30"]), _cursor_int, _cursor_int, _cursor_int, _cursor_depth)